@@ -2,107 +2,380 @@ import time
 import logging
 import os
 import json
-import requests
-import google.generativeai as genai
+import hashlib
+import threading
+from limitador_taxa import get_cnpja_rate_limiter
+from cache_sqlite import cache_enabled, lazy_singleton, open_cache
+from configuracao import CNAE_EDUCATION_FILE, env_flag, get_config_registry
+from clientes import get_http_session, get_gemini_model, load_genai
+from motor_scoring import SCORING_CRITERIA_FILE, compute_score, load_scoring_config
+from parser_json_incremental import IncrementalJSONListParser
+from metricas import analysis_trace, metrics, record_classification, record_llm_usage, stage
+from indice_receita import get_receita_index
+from corpus_cnpja import record_cnpja_response
+from lote_gemini import get_gemini_batcher
+from resiliencia import (
+    TRANSIENT_CLIENT_STATUS, CircuitBreaker, TransientCNPJAError, get_cnpja_circuit_breaker, parse_retry_after,
+    retry_delay,
+)
+from projecao_contexto import (
+    SCORING_FIELDS, build_business_context, build_scoring_context, compact_json, project,
+)
 
 # Funções de Interação com Gemini
 
-def initialize_gemini():
+DEFAULT_LLM_CACHE_MAX_BYTES = 100 * 1024 * 1024  # 100 MB
+
+def llm_cache_enabled() -> bool:
+    """Indica se a memoização das respostas do Gemini está habilitada (LLM_CACHE_ENABLED, padrão: true)."""
+    return env_flag("LLM_CACHE_ENABLED", True)
+
+def get_llm_cache():
+    """
+    Retorna o cache em disco das respostas do Gemini, ou None se LLM_CACHE_ENABLED for falso.
+    As entradas não expiram por tempo; o tamanho é limitado por LLM_CACHE_MAX_BYTES (remoção LRU).
+    """
+    return _open_llm_cache() if llm_cache_enabled() else None
+
+@lazy_singleton
+def _open_llm_cache():
+    max_bytes = int(os.getenv("LLM_CACHE_MAX_BYTES", DEFAULT_LLM_CACHE_MAX_BYTES))
+    return open_cache("gemini", ttl_seconds=0, max_entries=0, max_bytes=max_bytes)
+
+def get_generation_settings() -> dict:
     """
-    Inicializa a API do Google Gemini carregando a chave de API das variáveis de ambiente.
+    Retorna as configurações de geração enviadas ao Gemini (LLM_TEMPERATURE).
     """
-    gemini_api_key = os.getenv("GEMINI_API_KEY")
-    if not gemini_api_key:
-        logging.error("GEMINI_API_KEY não encontrada no arquivo .env.")
-        return False
-    genai.configure(api_key=gemini_api_key)
-    return True
+    settings = {}
+    temperature = os.getenv("LLM_TEMPERATURE")
+    if temperature:
+        settings["temperature"] = float(temperature)
+    return settings
 
-def interact_with_gemini(prompt: str, context_data: dict) -> str | None:
+def llm_cache_key(model_name: str, content: str, generation_settings: dict) -> str:
+    """
+    Gera a chave de memoização a partir do modelo, do prompt renderizado e das configurações de geração.
+    """
+    payload = json.dumps(
+        {"modelo": model_name, "conteudo": content, "geracao": generation_settings},
+        sort_keys=True, ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def interact_with_gemini(prompt: str, context_data: dict, use_cache: bool = True, on_text=None,
+                         agent_name: str = "gemini", batch_key: str | None = None,
+                         cancel_event: threading.Event | None = None) -> str | None:
     """
     Envia um prompt e dados contextuais para o modelo Gemini e retorna sua resposta.
+    Respostas idênticas (mesmo modelo, prompt renderizado e configurações) são servidas
+    do cache local; use_cache=False força uma nova chamada.
+    Se on_text for informado, a resposta é gerada em streaming e cada trecho recebido
+    é repassado a on_text(trecho) assim que chega.
+    agent_name identifica o agente nas métricas (duração, tokens e custo).
+    Com LLM_BATCH_SIZE > 1, chamadas simultâneas do mesmo agente com batch_key (o CNPJ)
+    são agrupadas em uma única requisição (ver lote_gemini.py).
+    Se cancel_event for sinalizado durante o streaming, a geração é interrompida no trecho
+    seguinte e a função retorna None (a resposta parcial não vai para o cache).
     """
-    if not initialize_gemini():
-        return None
+    with stage("gemini", agente=agent_name):
+        return _interact_with_gemini(prompt, context_data, use_cache, on_text, agent_name, batch_key, cancel_event)
 
-    try:
-        llm_model_name = os.getenv("LLM_MODEL", "gemini-pro")
-        model = genai.GenerativeModel(llm_model_name)
+def _interact_with_gemini(prompt: str, context_data: dict, use_cache: bool, on_text, agent_name: str,
+                          batch_key: str | None, cancel_event: threading.Event | None) -> str | None:
+    llm_model_name = os.getenv("LLM_MODEL", "gemini-pro")
+    generation_settings = get_generation_settings()
+    content_for_gemini = prompt.replace('{response.json}', compact_json(context_data))
 
-        content_for_gemini = prompt.replace('{response.json}', json.dumps(context_data, indent=2, ensure_ascii=False))
-        
-        response = model.generate_content(content_for_gemini)
+    cache = get_llm_cache() if use_cache else None
+    cache_key = llm_cache_key(llm_model_name, content_for_gemini, generation_settings)
+    if cache is not None:
+        cached_text = cache.get(cache_key)
+        if cached_text is not None:
+            logging.info("Resposta do Gemini obtida do cache.")
+            metrics.inc("cache_total", cache="gemini", resultado="acerto")
+            if on_text is not None:
+                on_text(cached_text)
+            return cached_text
+        metrics.inc("cache_total", cache="gemini", resultado="erro")
 
-        if response and response.text:
-            return response.text
+    batcher = get_gemini_batcher(_send_gemini_batch) if batch_key and on_text is None else None
+    response_text = None
+    if batcher is not None:
+        response_text, prompt_tokens, response_tokens = batcher.submit(agent_name, prompt, batch_key, context_data)
+        if prompt_tokens or response_tokens:
+            record_llm_usage(agent_name, prompt_tokens, response_tokens)
+    if response_text is None:
+        response_text = _generate_content(llm_model_name, generation_settings, content_for_gemini, on_text, agent_name,
+                                          cancel_event)
+
+    # No lote, o resultado de cada empresa é memoizado com a chave da chamada individual equivalente
+    if response_text and cache is not None:
+        cache.set(cache_key, response_text)
+    return response_text or None
+
+def _generate_content(llm_model_name: str, generation_settings: dict, content_for_gemini: str, on_text,
+                      agent_name: str, cancel_event: threading.Event | None = None) -> str | None:
+    model = get_gemini_model(llm_model_name, generation_settings)
+    if model is None:
+        return None
+
+    try:
+        if on_text is not None:
+            response_text, usage = _generate_streaming(model, content_for_gemini, on_text, cancel_event)
         else:
-            return None
-    except genai.types.BlockedPromptException:
+            response = model.generate_content(content_for_gemini)
+            response_text = response.text if response else None
+            usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            record_llm_usage(agent_name, getattr(usage, "prompt_token_count", 0) or 0,
+                             getattr(usage, "candidates_token_count", 0) or 0)
+        return response_text
+    except load_genai().types.BlockedPromptException: # Avaliado só quando há exceção; o SDK já foi carregado
         logging.error("O conteúdo do prompt foi bloqueado pelo Gemini.")
+        metrics.inc("erros_api_total", api="gemini", tipo="prompt_bloqueado")
         return None
     except Exception as e:
         logging.error(f"ERRO ao interagir com o Gemini: {e}")
+        metrics.inc("erros_api_total", api="gemini", tipo=type(e).__name__)
         return None
 
+def _send_gemini_batch(content_for_gemini: str) -> tuple[str | None, tuple[int, int]]:
+    """Envia uma requisição agrupada ao Gemini. Retorna o texto (None em caso de erro) e os tokens usados."""
+    model = get_gemini_model(os.getenv("LLM_MODEL", "gemini-pro"), get_generation_settings())
+    if model is None:
+        return None, (0, 0)
+    try:
+        with stage("gemini_lote"):
+            response = model.generate_content(content_for_gemini)
+    except Exception as e:
+        logging.error(f"ERRO na requisição agrupada ao Gemini: {e}")
+        metrics.inc("erros_api_total", api="gemini", tipo=type(e).__name__)
+        return None, (0, 0)
+    usage = getattr(response, "usage_metadata", None)
+    tokens = (getattr(usage, "prompt_token_count", 0) or 0, getattr(usage, "candidates_token_count", 0) or 0)
+    try:
+        return response.text, tokens
+    except ValueError: # Resposta sem partes de texto (ex.: bloqueada)
+        return None, tokens
+
+def _generate_streaming(model, content_for_gemini: str, on_text,
+                        cancel_event: threading.Event | None = None) -> tuple[str | None, object]:
+    """
+    Gera a resposta em streaming, repassando cada trecho a on_text. Se cancel_event for
+    sinalizado, para de consumir o stream após o trecho atual.
+
+    Returns:
+        tuple[str | None, object]: O texto completo (None se cancelado) e os metadados de uso
+        de tokens (usage_metadata, informados no último trecho; None se o Gemini não os enviar).
+    """
+    chunks = []
+    usage = None
+    for chunk in model.generate_content(content_for_gemini, stream=True):
+        usage = getattr(chunk, "usage_metadata", None) or usage
+        try:
+            chunk_text = chunk.text
+        except ValueError:  # Trecho sem partes de texto (ex.: apenas metadados)
+            continue
+        if chunk_text:
+            chunks.append(chunk_text)
+            on_text(chunk_text)
+        if cancel_event is not None and cancel_event.is_set():
+            logging.info("Streaming do Gemini interrompido: análise cancelada.")
+            return None, usage
+    return "".join(chunks), usage
+
 # Fim das Funções de Interação com Gemini
 
 MAX_RETRIES = 3
 RETRY_DELAY = 2  # segundos
+DEFAULT_CNPJA_BASE_URL = "https://open.cnpja.com"
+
+def get_cnpja_cache():
+    """
+    Retorna o cache em disco das respostas da API CNPJA, ou None se CACHE_ENABLED for falso.
+    """
+    return _open_cnpja_cache() if cache_enabled() else None
+
+@lazy_singleton
+def _open_cnpja_cache():
+    return open_cache("cnpja")
+
+CNPJ_DATA_SOURCES = ("api", "local", "local_then_api")
 
-def fetch_cnpj_data(cnpj: str) -> dict | None:
+def get_cnpj_data_source() -> str:
+    """
+    Retorna a fonte dos dados cadastrais (CNPJ_DATA_SOURCE): 'api' (API CNPJA), 'local' (índice
+    da Receita Federal gerado por indice_receita.py) ou 'local_then_api' (índice local e, se o
+    CNPJ não estiver nele, a API CNPJA).
+    """
+    source = os.getenv("CNPJ_DATA_SOURCE", "api").strip().lower()
+    if source not in CNPJ_DATA_SOURCES:
+        logging.warning(f"CNPJ_DATA_SOURCE '{source}' desconhecido. Usando 'api'.")
+        return "api"
+    return source
+
+def _fetch_local_cnpj_data(cnpj: str) -> dict | None:
+    """Consulta o CNPJ no índice local da Receita Federal."""
+    with stage("busca_local"):
+        index = get_receita_index()
+        company_data = index.get(cnpj) if index is not None else None
+    metrics.inc("fonte_dados_total", fonte="local", resultado="acerto" if company_data else "erro")
+    if company_data is not None:
+        logging.info(f"Dados do CNPJ {cnpj} obtidos do índice local da Receita Federal.")
+    return company_data
+
+def fetch_cnpj_data(cnpj: str, use_cache: bool = True, defer_retries: bool = False,
+                    cancel_event: threading.Event | None = None) -> dict | None:
     """
     Consulta os dados de um CNPJ na API CNPJA com retentativas.
+    Respostas bem-sucedidas são guardadas no cache em disco (CACHE_ENABLED / CACHE_TTL_SECONDS)
+    e reutilizadas nas consultas seguintes ao mesmo CNPJ.
+    Erros permanentes (4xx como 404) retornam None sem novas tentativas. Nas falhas temporárias
+    a espera segue o Retry-After da API ou o backoff exponencial com jitter; com defer_retries=True,
+    a falha é levantada como TransientCNPJAError para que o chamador reagende a consulta
+    em vez de bloquear a thread. Se cancel_event for sinalizado durante a espera entre as
+    tentativas, a consulta é abandonada e a função retorna None.
+    A fonte dos dados segue CNPJ_DATA_SOURCE (ver get_cnpj_data_source).
+    """
+    cnpj = "".join(filter(str.isdigit, cnpj))
+    source = get_cnpj_data_source()
+    if source != "api":
+        company_data = _fetch_local_cnpj_data(cnpj)
+        if company_data is not None or source == "local":
+            if company_data is None:
+                logging.error(f"CNPJ {cnpj} não encontrado no índice local da Receita Federal.")
+            return company_data
+
+    with stage("busca_cnpja"):
+        cache = get_cnpja_cache() if use_cache else None
+        if cache is not None:
+            cached_data = cache.get(cnpj)
+            if cached_data is not None:
+                logging.info(f"Dados do CNPJ {cnpj} obtidos do cache.")
+                metrics.inc("cache_total", cache="cnpja", resultado="acerto")
+                return cached_data
+            metrics.inc("cache_total", cache="cnpja", resultado="erro")
+
+        for attempt in range(MAX_RETRIES):
+            if attempt > 0:
+                metrics.inc("retentativas_total", api="cnpja")
+            try:
+                company_data = _request_cnpj_data(cnpj)
+                break
+            except TransientCNPJAError as e:
+                if defer_retries:
+                    raise
+                logging.warning(f"Erro na tentativa {attempt + 1}/{MAX_RETRIES} para CNPJ {cnpj}: {e}")
+                if attempt == MAX_RETRIES - 1:
+                    logging.error(f"Falha ao buscar dados para o CNPJ {cnpj} após {MAX_RETRIES} tentativas.")
+                    return None
+                delay = cnpja_retry_delay(e, attempt)
+                if cancel_event is None:
+                    time.sleep(delay)
+                elif cancel_event.wait(delay):
+                    logging.info(f"Consulta do CNPJ {cnpj} cancelada.")
+                    return None
+
+        if company_data is not None and cache is not None:
+            cache.set(cnpj, company_data)
+        return company_data
+
+def cnpja_retry_delay(error: TransientCNPJAError, attempt: int) -> float:
+    """Espera antes de repetir uma consulta à API CNPJA que falhou na tentativa `attempt` (0, 1, 2...)."""
+    return retry_delay(error, attempt, RETRY_DELAY)
+
+def _request_cnpj_data(cnpj: str) -> dict | None:
     """
+    Executa uma única requisição à API CNPJA, respeitando o limitador de taxa e o circuit breaker.
+    Retorna os dados, ou None em erros permanentes; falhas temporárias levantam TransientCNPJAError.
+    """
+    breaker = get_cnpja_circuit_breaker()
+    wait = breaker.time_until_allowed()
+    if wait > 0:
+        metrics.inc("erros_api_total", api="cnpja", tipo="circuito_aberto")
+        raise TransientCNPJAError(f"Circuito da API CNPJA aberto; nova tentativa em {wait:.1f}s.",
+                                  retry_after=wait, request_sent=False)
+    try:
+        return _send_cnpja_request(cnpj, breaker)
+    finally:
+        breaker.release_probe() # Caso a requisição de teste termine com uma exceção inesperada
+
+def _send_cnpja_request(cnpj: str, breaker: CircuitBreaker) -> dict | None:
     api_key = os.getenv("CNPJA_API_KEY")
-    url = f"https://open.cnpja.com/office/{cnpj}"
+    base_url = os.getenv("CNPJA_BASE_URL", DEFAULT_CNPJA_BASE_URL).rstrip('/')
+    url = f"{base_url}/office/{cnpj}"
     headers = {
         "Authorization": api_key}
 
-    for attempt in range(MAX_RETRIES):
-        try:
-            logging.info(f"Tentativa {attempt + 1}/{MAX_RETRIES} de buscar dados para o CNPJ {cnpj}...")
-            response = requests.get(url, headers=headers, timeout=10) # Adicionado timeout
-            response.raise_for_status() # Levanta HTTPError para códigos de status 4xx/5xx
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            logging.warning(f"Erro na tentativa {attempt + 1}/{MAX_RETRIES} para CNPJ {cnpj}: {e}")
-            if attempt < MAX_RETRIES - 1:
-                time.sleep(RETRY_DELAY * (2 ** attempt)) # Backoff exponencial
-            else:
-                logging.error(f"Falha ao buscar dados para o CNPJ {cnpj} após {MAX_RETRIES} tentativas.")
-                return None
-    return None
+    get_cnpja_rate_limiter().acquire() # Respeita o limite de requisições da API CNPJA
+    from requests.exceptions import RequestException # requests é carregado só na primeira consulta à API
+    logging.info(f"Buscando dados para o CNPJ {cnpj}...")
+    try:
+        response = get_http_session().get(url, headers=headers, timeout=10) # Sessão keep-alive compartilhada
+    except RequestException as e:
+        breaker.record_failure()
+        metrics.inc("erros_api_total", api="cnpja", tipo=type(e).__name__)
+        raise TransientCNPJAError(str(e)) from e
+
+    status_code = response.status_code
+    if status_code >= 400:
+        metrics.inc("erros_api_total", api="cnpja", tipo=str(status_code))
+        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        if status_code == 429:
+            breaker.record_success() # A API está no ar, apenas limitando a taxa
+            breaker.pause(retry_after if retry_after is not None else RETRY_DELAY) # Pausa todos os workers
+            raise TransientCNPJAError("429 Too Many Requests", retry_after=retry_after)
+        if status_code >= 500 or status_code in TRANSIENT_CLIENT_STATUS:
+            breaker.record_failure()
+            raise TransientCNPJAError(f"{status_code} {response.reason}", retry_after=retry_after)
+        breaker.record_success() # A API está respondendo; o erro é do pedido
+        logging.error(f"A API CNPJA recusou a consulta do CNPJ {cnpj} ({status_code} {response.reason}). "
+                      f"Não haverá novas tentativas.")
+        return None
+
+    try:
+        company_data = response.json()
+    except ValueError as e:
+        breaker.record_failure()
+        raise TransientCNPJAError(f"Resposta da API CNPJA não é um JSON válido: {e}") from e
+    breaker.record_success()
+    record_cnpja_response(cnpj, company_data) # Corpus para reexecutar os agentes sem consultar a API
+    return company_data
 
-def analyze_business_criteria(company_data: dict) -> dict | None:
+def parse_gemini_json(gemini_response_text: str, agent_name: str = "") -> dict:
     """
-    Utiliza o Gemini para analisar os critérios de negócio da empresa
-    com base no prompt do agente de negócio.
-    Retorna um dicionário com a análise (pontos positivos, negativos, atenção) ou None em caso de erro.
+    Extrai o objeto JSON da resposta do Gemini. Se não houver um JSON válido,
+    retorna {"analise_bruta": <texto>}.
     """
-    business_agent_path = os.path.join(os.path.dirname(__file__), '..', 'config', 'agente_negocio_cnpj.txt')
-    try:
-        with open(business_agent_path, 'r', encoding='utf-8') as f:
-            business_agent_prompt = f.read()
-    except FileNotFoundError:
-        logging.error(f"Arquivo de prompt do agente de negócio não encontrado em {business_agent_path}")
-        return None
+    with stage("parse_json"):
+        parsed = _parse_gemini_json(gemini_response_text, agent_name)
+    if "analise_bruta" in parsed:
+        metrics.inc("respostas_invalidas_total", agente=agent_name or "negocio")
+    return parsed
 
-    cnae_education_path = os.path.join(os.path.dirname(__file__), '..', 'config', 'cnae_educacao.json')
+def _parse_gemini_json(gemini_response_text: str, agent_name: str) -> dict:
     try:
-        with open(cnae_education_path, 'r', encoding='utf-8') as f:
-            cnae_education_data = json.load(f)
-    except FileNotFoundError:
-        logging.error(f"Arquivo de CNAE de educação não encontrado em {cnae_education_path}")
-        return None
+        json_start = gemini_response_text.find('{')
+        json_end = gemini_response_text.rfind('}') + 1
+        if json_start != -1 and json_end != -1 and json_end > json_start:
+            json_str = gemini_response_text[json_start:json_end]
+            return json.loads(json_str)
+        else:
+            return {"analise_bruta": gemini_response_text}
     except json.JSONDecodeError:
-        logging.error(f"Erro ao decodificar JSON do arquivo {cnae_education_path}")
-        return None
+        suffix = f" para {agent_name}" if agent_name else ""
+        logging.warning(f"Gemini não retornou um JSON válido{suffix}. Resposta bruta: {gemini_response_text[:200]}...")
+        return {"analise_bruta": gemini_response_text}
 
-    gemini_context_data = {
-        "dados_empresa": company_data,
-        "cnae_educacao": cnae_education_data
-    }
+def check_disqualification(company_data: dict) -> dict | None:
+    """
+    Aplica as regras de desqualificação automática (situação cadastral e CNAE principal).
+    Retorna o resultado de reprovação, ou None se a empresa segue para a análise dos agentes.
+    """
+    with stage("regras_desqualificacao"):
+        return _check_disqualification(company_data)
 
+def _check_disqualification(company_data: dict) -> dict | None:
     # Regra de Desqualificação Automática
     registration_status = company_data.get("status", {}).get("text", "").upper()
     if registration_status in ["SUSPENSA", "BAIXADA"]:
@@ -120,14 +393,7 @@ def analyze_business_criteria(company_data: dict) -> dict | None:
     primary_cnae_text = company_data.get('mainActivity', {}).get('text', 'N/A')
 
     if primary_cnae_id:
-        valid_cnae_ids = []
-        for cnae_item in cnae_education_data.get('cnaes_principais', []):
-            cnae_str = cnae_item.get('codigo_formatado', '')
-            normalized_cnae = "".join(filter(str.isdigit, cnae_str))
-            if normalized_cnae:
-                valid_cnae_ids.append(int(normalized_cnae))
-        
-        if primary_cnae_id not in valid_cnae_ids:
+        if primary_cnae_id not in get_config_registry().get_valid_cnae_ids():
             logging.info(f"CNAE principal '{primary_cnae_text}' ({primary_cnae_id}) não pertence ao setor educacional. Desqualificação automática.")
             return {
                 "classificacao": "REPROVADO",
@@ -137,74 +403,323 @@ def analyze_business_criteria(company_data: dict) -> dict | None:
                 "recomendacao": "Reprovação automática por não ser uma instituição de ensino."
             }
     # Fim da Regra de Desqualificação por CNAE
+    return None
+
+BUSINESS_LIST_KEYS = ("pontos_fortes", "pontos_fracos", "pontos_atencao")
+SCORING_LIST_KEYS = ("pontos_positivos", "pontos_negativos")
+
+def _is_cancelled(cancel_event: threading.Event | None) -> bool:
+    return cancel_event is not None and cancel_event.is_set()
+
+def _streaming_parser(on_item, keys):
+    """Retorna o callback de streaming que emite os itens das listas observadas, ou None."""
+    if on_item is None:
+        return None
+    return IncrementalJSONListParser(keys, on_item).feed
+
+def analyze_business_criteria(company_data: dict, on_item=None,
+                              cancel_event: threading.Event | None = None) -> dict | None:
+    """
+    Utiliza o Gemini para analisar os critérios de negócio da empresa
+    com base no prompt do agente de negócio.
+    Retorna um dicionário com a análise (pontos positivos, negativos, atenção) ou None em caso de erro.
+    Se on_item for informado, a resposta é gerada em streaming e on_item(chave, item) é chamado
+    para cada item de pontos_fortes/pontos_fracos/pontos_atencao assim que ele chega.
+    Se cancel_event for sinalizado, o streaming é interrompido e a função retorna None.
+    """
+    config = get_config_registry()
+    business_agent_prompt = config.get_prompt('agente_negocio_cnpj')
+    if business_agent_prompt is None:
+        logging.error("Prompt do agente de negócio indisponível.")
+        return None
 
-    gemini_response_text = interact_with_gemini(business_agent_prompt, gemini_context_data)
+    cnae_education_data = config.get_cnae_data()
+    if cnae_education_data is None:
+        logging.error("Tabela de CNAEs de educação indisponível.")
+        return None
+
+    disqualification = check_disqualification(company_data)
+    if disqualification is not None:
+        return disqualification
+
+    cnae_entry = config.find_cnae(company_data.get('mainActivity', {}).get('id'))
+    gemini_context_data = build_business_context(company_data, cnae_entry, cnae_education_data)
+
+    gemini_response_text = interact_with_gemini(
+        business_agent_prompt, gemini_context_data, on_text=_streaming_parser(on_item, BUSINESS_LIST_KEYS),
+        agent_name="negocio", batch_key=company_data.get("taxId"), cancel_event=cancel_event,
+    )
 
     if not gemini_response_text:
-        logging.error("Gemini não retornou uma resposta para a análise de negócio.")
+        if not _is_cancelled(cancel_event):
+            logging.error("Gemini não retornou uma resposta para a análise de negócio.")
         return None
 
-    try:
-        json_start = gemini_response_text.find('{')
-        json_end = gemini_response_text.rfind('}') + 1
-        if json_start != -1 and json_end != -1 and json_end > json_start:
-            json_str = gemini_response_text[json_start:json_end]
-            structured_analysis = json.loads(json_str)
-            return structured_analysis
-        else:
-            return {"analise_bruta": gemini_response_text}
-    except json.JSONDecodeError:
-        logging.warning(f"Gemini não retornou um JSON válido. Resposta bruta: {gemini_response_text[:200]}...")
-        return {"analise_bruta": gemini_response_text}
+    return parse_gemini_json(gemini_response_text)
 
-def analyze_scoring(company_data: dict, business_analysis: dict) -> dict | None:
+def analyze_scoring(company_data: dict, business_analysis: dict, on_item=None,
+                    cancel_event: threading.Event | None = None) -> dict | None:
     """
     Utiliza o Gemini para calcular o score e a classificação final da empresa.
+    Se on_item for informado, on_item(chave, item) é chamado para cada item de
+    pontos_positivos/pontos_negativos assim que ele chega (streaming).
+    Se cancel_event for sinalizado, o streaming é interrompido e a função retorna None.
     """
-    scoring_agent_path = os.path.join(os.path.dirname(__file__), '..', 'config', 'agente_scoring_cnpj.txt')
-    try:
-        with open(scoring_agent_path, 'r', encoding='utf-8') as f:
-            scoring_agent_prompt = f.read()
-    except FileNotFoundError:
-        logging.error(f"Arquivo de prompt do agente de scoring não encontrado em {scoring_agent_path}")
+    scoring_agent_prompt = get_config_registry().get_prompt('agente_scoring_cnpj')
+    if scoring_agent_prompt is None:
+        logging.error("Prompt do agente de scoring indisponível.")
         return None
 
-    gemini_context_data = {
-        "dados_empresa": company_data,
-        "analise_negocio": business_analysis,
-        "criterios_scoring": {
-            "situacao": {"peso": 20, "positivo": "ATIVA", "negativo": "SUSPENSA/BAIXADA"},
-            "cnae": {"peso": 25, "positivo": "Educação (85.xx)", "negativo": "Outro setor"},
-            "capital_social": {
-                "peso": 15,
-                "faixas": [
-                    {"limite_inferior": 500000, "pontos": 15},
-                    {"limite_inferior": 100000, "limite_superior": 499999, "pontos": 10},
-                    {"limite_inferior": 50000, "limite_superior": 99999, "pontos": 5},
-                    {"limite_superior": 49999, "pontos": 0}
-                ]
-            },
-            "tempo_atividade": {"peso": 15, "positivo": ">= 2 anos", "negativo": "< 2 anos"},
-            "restricoes": {"peso": 25, "positivo": "Nenhuma", "negativo": "2+ restrições"}
-        }
-    }
+    scoring_config = load_scoring_config()
+    if scoring_config is None:
+        logging.error("Critérios de scoring indisponíveis.")
+        return None
+
+    gemini_context_data = build_scoring_context(company_data, business_analysis, scoring_config["criterios"])
 
-    gemini_response_text = interact_with_gemini(scoring_agent_prompt, gemini_context_data)
+    gemini_response_text = interact_with_gemini(
+        scoring_agent_prompt, gemini_context_data, on_text=_streaming_parser(on_item, SCORING_LIST_KEYS),
+        agent_name="scoring", batch_key=company_data.get("taxId"), cancel_event=cancel_event,
+    )
 
     if not gemini_response_text:
-        logging.error("Gemini não retornou uma resposta para a análise de scoring.")
+        if not _is_cancelled(cancel_event):
+            logging.error("Gemini não retornou uma resposta para a análise de scoring.")
         return None
 
-    try:
-        json_start = gemini_response_text.find('{')
-        json_end = gemini_response_text.rfind('}') + 1
-        if json_start != -1 and json_end != -1 and json_end > json_start:
-            json_str = gemini_response_text[json_start:json_end]
-            structured_scoring = json.loads(json_str)
-            return structured_scoring
+    return parse_gemini_json(gemini_response_text, "scoring")
+
+def recommendation_enabled() -> bool:
+    """Indica se o Gemini redige a recomendação do modo local (LLM_RECOMENDACAO, padrão: false)."""
+    return env_flag("LLM_RECOMENDACAO", False)
+
+def analyze_scoring_local(company_data: dict, with_recommendation: bool | None = None) -> dict | None:
+    """
+    Calcula o score e a classificação com o motor de regras local (sem LLM).
+    Se with_recommendation for verdadeiro (padrão: LLM_RECOMENDACAO), o Gemini é chamado
+    apenas para redigir a 'recomendacao' narrativa; o score e a classificação não mudam.
+    """
+    scoring_result = compute_score(company_data)
+    if scoring_result is None:
+        return None
+
+    if with_recommendation is None:
+        with_recommendation = recommendation_enabled()
+    if not with_recommendation:
+        return scoring_result
+
+    recommendation_prompt = get_config_registry().get_prompt('agente_recomendacao_cnpj')
+    if recommendation_prompt is None:
+        logging.error("Prompt do agente de recomendação indisponível. Mantendo a recomendação padrão.")
+        return scoring_result
+
+    gemini_response_text = interact_with_gemini(recommendation_prompt, {
+        "dados_empresa": project(company_data, SCORING_FIELDS),
+        "resultado_scoring": scoring_result,
+    }, agent_name="recomendacao", batch_key=company_data.get("taxId"))
+    if gemini_response_text:
+        recommendation = parse_gemini_json(gemini_response_text, "recomendação").get("recomendacao")
+        if recommendation:
+            scoring_result["recomendacao"] = recommendation
+    else:
+        logging.warning("Gemini não retornou a recomendação. Mantendo a recomendação padrão.")
+    return scoring_result
+
+
+def analyze_combined(company_data: dict, on_item=None,
+                     cancel_event: threading.Event | None = None) -> tuple[dict, dict] | None:
+    """
+    Executa as análises de Negócio e Scoring em uma única chamada ao Gemini.
+    Retorna a tupla (analise_negocio, analise_scoring) nos mesmos formatos dos agentes
+    separados, ou None em caso de erro ou cancelamento. As regras de desqualificação
+    automática são aplicadas antes da chamada.
+    """
+    config = get_config_registry()
+    combined_agent_prompt = config.get_prompt('agente_combinado_cnpj')
+    if combined_agent_prompt is None:
+        logging.error("Prompt do agente combinado indisponível.")
+        return None
+
+    cnae_education_data = config.get_cnae_data()
+    scoring_config = load_scoring_config()
+    if cnae_education_data is None or scoring_config is None:
+        logging.error("Tabela de CNAEs de educação ou critérios de scoring indisponíveis.")
+        return None
+
+    disqualification = check_disqualification(company_data)
+    if disqualification is not None:
+        return disqualification, disqualification
+
+    cnae_entry = config.find_cnae(company_data.get('mainActivity', {}).get('id'))
+    gemini_context_data = build_business_context(company_data, cnae_entry, cnae_education_data)
+    gemini_context_data["criterios_scoring"] = scoring_config["criterios"]
+
+    gemini_response_text = interact_with_gemini(
+        combined_agent_prompt, gemini_context_data,
+        on_text=_streaming_parser(on_item, BUSINESS_LIST_KEYS + SCORING_LIST_KEYS),
+        agent_name="combinado", batch_key=company_data.get("taxId"), cancel_event=cancel_event,
+    )
+    if not gemini_response_text:
+        if not _is_cancelled(cancel_event):
+            logging.error("Gemini não retornou uma resposta para a análise combinada.")
+        return None
+
+    combined_analysis = parse_gemini_json(gemini_response_text, "análise combinada")
+    business_result = combined_analysis.get("analise_negocio")
+    scoring_result = combined_analysis.get("scoring")
+    if not isinstance(business_result, dict) or not isinstance(scoring_result, dict):
+        logging.warning("Resposta da análise combinada fora do esquema esperado.")
+        return combined_analysis, combined_analysis
+    return business_result, scoring_result
+
+
+# Orquestração do Pipeline
+
+PIPELINE_MODES = ("llm", "combinado", "local")
+
+def get_pipeline_mode() -> str:
+    """
+    Retorna o modo do pipeline (PIPELINE_MODE): 'llm' (agentes de Negócio e Scoring no Gemini),
+    'combinado' (os dois agentes em uma única chamada ao Gemini) ou 'local' (score calculado
+    pelo motor de regras, sem LLM).
+    """
+    mode = os.getenv("PIPELINE_MODE", "llm").strip().lower()
+    if mode not in PIPELINE_MODES:
+        logging.warning(f"PIPELINE_MODE '{mode}' desconhecido. Usando 'llm'.")
+        return "llm"
+    return mode
+
+def config_files_for_mode(mode: str) -> tuple[str, ...]:
+    """
+    Retorna os arquivos de config/ que o modo do pipeline lê: os prompts dos seus agentes
+    (no modo 'local', o de recomendação apenas com LLM_RECOMENDACAO), os critérios de
+    scoring e a tabela de CNAEs.
+    """
+    if mode == "local":
+        prompts = ("agente_recomendacao_cnpj",) if recommendation_enabled() else ()
+    elif mode == "combinado":
+        prompts = ("agente_combinado_cnpj",)
+    else:
+        prompts = ("agente_negocio_cnpj", "agente_scoring_cnpj")
+    return tuple(f"{prompt}.txt" for prompt in prompts) + (SCORING_CRITERIA_FILE, CNAE_EDUCATION_FILE)
+
+def analyze_company_data(cnpj: str, company_data: dict, mode: str | None = None, on_item=None,
+                         cancel_event: threading.Event | None = None) -> dict | None:
+    """
+    Executa os agentes de Negócio e Scoring sobre os dados já obtidos da API CNPJA.
+    Retorna um dicionário com o resultado final (mesmo formato do resultado.json)
+    e as saídas intermediárias de cada agente, ou None em caso de erro.
+    on_item(chave, item) recebe os itens das listas dos agentes à medida que chegam (streaming).
+    Se cancel_event for sinalizado, a análise é interrompida (no trecho seguinte do streaming ou
+    entre uma etapa e outra) e retorna None.
+    A análise é marcada com um trace ID (reaproveitado se já houver um em andamento, como em analyze_cnpj).
+    """
+    with analysis_trace(cnpj) as trace:
+        analysis = _analyze_company_data(cnpj, company_data, mode, on_item, cancel_event)
+        if analysis is not None:
+            analysis["trace_id"] = trace.trace_id
+            record_classification(analysis["resultado"]["classification"])
+        return analysis
+
+def _analyze_company_data(cnpj: str, company_data: dict, mode: str | None, on_item,
+                          cancel_event: threading.Event | None) -> dict | None:
+    mode = mode or get_pipeline_mode()
+    timings = {}
+    started = time.perf_counter()
+
+    if mode == "local":
+        business_result = check_disqualification(company_data)
+        if business_result is None:
+            scoring_result = analyze_scoring_local(company_data)
+            timings["scoring_segundos"] = round(time.perf_counter() - started, 3)
+            if not scoring_result:
+                logging.error(f"Não foi possível calcular o scoring do CNPJ {cnpj}.")
+                return None
         else:
-            return {"analise_bruta": gemini_response_text}
-    except json.JSONDecodeError:
-        logging.warning(f"Gemini não retornou um JSON válido para scoring. Resposta bruta: {gemini_response_text[:200]}...")
-        return {"analise_bruta": gemini_response_text}
+            logging.info(f"Análise do CNPJ {cnpj} concluída com desqualificação automática.")
+            scoring_result = business_result
+    elif mode == "combinado":
+        combined_result = analyze_combined(company_data, on_item, cancel_event)
+        timings["combinado_segundos"] = round(time.perf_counter() - started, 3)
+        if _is_cancelled(cancel_event):
+            logging.info(f"Análise do CNPJ {cnpj} cancelada.")
+            return None
+        if not combined_result:
+            logging.error(f"Não foi possível obter a análise combinada do CNPJ {cnpj}.")
+            return None
+        business_result, scoring_result = combined_result
+    else:
+        business_result = analyze_business_criteria(company_data, on_item, cancel_event)
+        timings["negocio_segundos"] = round(time.perf_counter() - started, 3)
+        if _is_cancelled(cancel_event):
+            logging.info(f"Análise do CNPJ {cnpj} cancelada.")
+            return None
+        if not business_result:
+            logging.error(f"Não foi possível obter a análise de negócio do CNPJ {cnpj}.")
+            return None
+
+        # Verifica se houve desqualificação automática na análise de negócio
+        if business_result.get("classificacao") == "REPROVADO":
+            logging.info(f"Análise do CNPJ {cnpj} concluída com desqualificação automática.")
+            scoring_result = business_result  # Pula a etapa de scoring
+        else:
+            scoring_started = time.perf_counter()
+            scoring_result = analyze_scoring(company_data, business_result, on_item, cancel_event)
+            timings["scoring_segundos"] = round(time.perf_counter() - scoring_started, 3)
+            if _is_cancelled(cancel_event):
+                logging.info(f"Análise do CNPJ {cnpj} cancelada.")
+                return None
+            if not scoring_result:
+                logging.error(f"Não foi possível obter o scoring do CNPJ {cnpj}.")
+                return None
+
+    timings["agentes_segundos"] = round(time.perf_counter() - started, 3)
+    return {
+        "resultado": build_result(cnpj, company_data, scoring_result),
+        "dados_empresa": company_data,
+        "analise_negocio": business_result,
+        "analise_scoring": scoring_result,
+        "tempos": timings,
+        "modo": mode,
+        "versao_config": get_config_registry().version(),
+    }
+
+def analyze_cnpj(cnpj: str, mode: str | None = None, on_item=None,
+                 cancel_event: threading.Event | None = None, defer_retries: bool = False) -> dict | None:
+    """
+    Executa o pipeline completo (Cadastral, Negócio e Scoring) para um CNPJ válido.
+    Com defer_retries=True, uma falha temporária da API CNPJA é levantada como
+    TransientCNPJAError (ver fetch_cnpj_data) para que o chamador reagende o CNPJ.
+    Se cancel_event for sinalizado, a análise é interrompida assim que possível e retorna None.
+    """
+    with analysis_trace(cnpj):
+        started = time.perf_counter()
+        company_data = fetch_cnpj_data(cnpj, defer_retries=defer_retries, cancel_event=cancel_event)
+        fetch_seconds = round(time.perf_counter() - started, 3)
+        if _is_cancelled(cancel_event):
+            logging.info(f"Análise do CNPJ {cnpj} cancelada.")
+            return None
+        if not company_data:
+            logging.error(f"Não foi possível obter os dados da API para o CNPJ {cnpj}.")
+            return None
+        analysis = analyze_company_data(cnpj, company_data, mode, on_item, cancel_event)
+        if analysis is not None:
+            analysis["tempos"]["busca_segundos"] = fetch_seconds
+            analysis["tempos"]["total_segundos"] = round(time.perf_counter() - started, 3)
+        return analysis
 
+def build_result(cnpj: str, company_data: dict, scoring_result: dict) -> dict:
+    """
+    Monta o dicionário de saída no formato do resultado.json.
+    """
+    return {
+        "cnpj": cnpj,
+        "razao_social": company_data.get('company', {}).get('name', 'N/A'),
+        "classification": scoring_result.get('classificacao', 'N/A'),
+        "score": scoring_result.get('score', 'N/A'),
+        "criteria": {
+            "positives": scoring_result.get('pontos_positivos', []),
+            "negatives": scoring_result.get('pontos_negativos', []),
+        },
+        "recommendation": scoring_result.get('recomendacao', 'N/A')
+    }
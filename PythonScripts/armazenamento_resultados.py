@@ -0,0 +1,206 @@
+"""
+    Módulo de Armazenamento de Resultados.
+
+    Guarda cada análise em um banco SQLite append-only, com o payload bruto da
+    API CNPJA, a saída de cada agente, os tempos de execução e a versão dos
+    prompts/configuração. As consultas por CNPJ, classificação, faixa de score
+    e data usam índices.
+
+    Uso (consulta):
+        python PythonScripts/armazenamento_resultados.py --classificacao APROVADO --score-min 70
+    """
+
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+from cache_sqlite import lazy_singleton, open_sqlite
+from configuracao import env_flag
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_RESULTS_DB_PATH = os.path.join(PROJECT_ROOT, 'dados', 'resultados.sqlite3')
+
+_JSON_COLUMNS = ("resultado", "dados_empresa", "analise_negocio", "analise_scoring", "tempos")
+
+
+class ResultStore:
+    """
+    Armazenamento append-only das análises em SQLite (modo WAL), seguro para
+    várias threads e processos gravando ao mesmo tempo.
+
+    Args:
+        path (str): Caminho do arquivo SQLite.
+    """
+
+    def __init__(self, path: str = DEFAULT_RESULTS_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = open_sqlite(path)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS analises (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                cnpj TEXT NOT NULL,
+                criado_em TEXT NOT NULL,
+                razao_social TEXT,
+                classificacao TEXT,
+                score REAL,
+                modo TEXT,
+                versao_config TEXT,
+                trace_id TEXT,
+                resultado TEXT NOT NULL,
+                dados_empresa TEXT,
+                analise_negocio TEXT,
+                analise_scoring TEXT,
+                tempos TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_analises_cnpj ON analises (cnpj, criado_em);
+            CREATE INDEX IF NOT EXISTS idx_analises_classificacao ON analises (classificacao, criado_em);
+            CREATE INDEX IF NOT EXISTS idx_analises_score ON analises (score);
+            CREATE INDEX IF NOT EXISTS idx_analises_criado_em ON analises (criado_em);
+            """
+        )
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(analises)")]
+        if "trace_id" not in columns:  # Bancos criados antes do rastreamento por trace ID
+            self._conn.execute("ALTER TABLE analises ADD COLUMN trace_id TEXT")
+
+    def append(self, analysis: dict) -> int:
+        """
+        Grava uma análise (o dicionário retornado por analyze_cnpj) em uma única transação.
+
+        Returns:
+            int: O id da análise gravada.
+        """
+        result = analysis["resultado"]
+        score = result.get("score")
+        row = (
+            result["cnpj"],
+            datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            result.get("razao_social"),
+            result.get("classification"),
+            score if isinstance(score, (int, float)) else None,
+            analysis.get("modo"),
+            analysis.get("versao_config"),
+            analysis.get("trace_id"),
+            *(json.dumps(analysis.get(column), ensure_ascii=False) for column in _JSON_COLUMNS),
+        )
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO analises (cnpj, criado_em, razao_social, classificacao, score, modo, versao_config,"
+                " trace_id, resultado, dados_empresa, analise_negocio, analise_scoring, tempos)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                row,
+            )
+            return cursor.lastrowid
+
+    def query(self, cnpj: str | None = None, classificacao: str | None = None,
+              score_min: float | None = None, score_max: float | None = None,
+              desde: str | None = None, ate: str | None = None,
+              limit: int | None = None, include_payload: bool = False) -> list[dict]:
+        """
+        Consulta as análises gravadas, da mais recente para a mais antiga.
+
+        Args:
+            cnpj (str | None): Filtra pelo CNPJ (apenas dígitos).
+            classificacao (str | None): Filtra pela classificação (APROVADO, ATENÇÃO, REPROVADO).
+            score_min (float | None): Score mínimo (inclusive).
+            score_max (float | None): Score máximo (inclusive).
+            desde (str | None): Data/hora ISO mínima (inclusive), ex.: '2025-10-01'.
+            ate (str | None): Data/hora ISO máxima (exclusive), ex.: '2025-11-01'.
+            limit (int | None): Número máximo de análises retornadas.
+            include_payload (bool): Inclui o payload bruto da API CNPJA e as saídas dos agentes.
+
+        Returns:
+            list[dict]: As análises encontradas.
+        """
+        conditions = []
+        params = []
+        for column, operator, value in (("cnpj", "=", cnpj), ("classificacao", "=", classificacao),
+                                        ("score", ">=", score_min), ("score", "<=", score_max),
+                                        ("criado_em", ">=", desde), ("criado_em", "<", ate)):
+            if value is not None:
+                conditions.append(f"{column} {operator} ?")
+                params.append(value)
+
+        columns = ("id, cnpj, criado_em, razao_social, classificacao, score, modo, versao_config, trace_id,"
+                   " resultado, tempos")
+        if include_payload:
+            columns += ", dados_empresa, analise_negocio, analise_scoring"
+        sql = f"SELECT {columns} FROM analises"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY criado_em DESC, id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        analyses = []
+        for row in rows:
+            analysis = dict(row)
+            for column in _JSON_COLUMNS:
+                if column in analysis and analysis[column] is not None:
+                    analysis[column] = json.loads(analysis[column])
+            analyses.append(analysis)
+        return analyses
+
+    def latest(self, cnpj: str, include_payload: bool = False) -> dict | None:
+        """Retorna a análise mais recente do CNPJ, ou None."""
+        analyses = self.query(cnpj=cnpj, limit=1, include_payload=include_payload)
+        return analyses[0] if analyses else None
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def results_store_enabled() -> bool:
+    """Indica se as análises devem ser gravadas (RESULTS_STORE_ENABLED, padrão: true)."""
+    return env_flag("RESULTS_STORE_ENABLED", True)
+
+
+@lazy_singleton
+def get_result_store() -> ResultStore:
+    """Retorna o armazenamento compartilhado, aberto em RESULTS_DB_PATH (relativo à raiz do projeto)."""
+    return ResultStore(os.path.join(PROJECT_ROOT, os.getenv("RESULTS_DB_PATH", DEFAULT_RESULTS_DB_PATH)))
+
+
+def save_analysis(analysis: dict) -> int | None:
+    """
+    Grava a análise no armazenamento compartilhado, se habilitado.
+    Falhas de gravação são registradas, mas não interrompem a análise.
+    """
+    if not results_store_enabled():
+        return None
+    try:
+        return get_result_store().append(analysis)
+    except sqlite3.Error as e:
+        logging.error(f"ERRO ao gravar a análise do CNPJ {analysis['resultado'].get('cnpj')}: {e}")
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consulta o histórico de análises de CNPJ.")
+    parser.add_argument("--cnpj")
+    parser.add_argument("--classificacao")
+    parser.add_argument("--score-min", type=float)
+    parser.add_argument("--score-max", type=float)
+    parser.add_argument("--desde", help="Data ISO mínima, ex.: 2025-10-01")
+    parser.add_argument("--ate", help="Data ISO máxima (exclusive), ex.: 2025-11-01")
+    parser.add_argument("--limite", type=int, default=50)
+    args = parser.parse_args()
+
+    cnpj = "".join(filter(str.isdigit, args.cnpj)) if args.cnpj else None
+    for analysis in get_result_store().query(cnpj, args.classificacao, args.score_min, args.score_max,
+                                             args.desde, args.ate, args.limite):
+        print(json.dumps(analysis, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+    Módulo de Cache em Disco.
+
+    Fornece um cache chave-valor persistente em SQLite, com expiração por TTL,
+    remoção LRU quando o número de entradas ou o tamanho total excede o limite
+    e contadores de acertos/erros. Pode ser usado simultaneamente pela thread da GUI e pelos
+    workers do modo lote.
+
+    O número de entradas e o tamanho total são mantidos em contadores atualizados a cada
+    escrita, para que set() não percorra a tabela; a contagem exata só é refeita quando um
+    limite é ultrapassado, e a remoção LRU então libera uma folga abaixo do limite.
+    """
+
+import functools
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from configuracao import env_flag
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_CACHE_DIR = os.path.join(PROJECT_ROOT, '.cache')
+DEFAULT_CACHE_TTL_SECONDS = 604800  # 7 dias
+DEFAULT_CACHE_MAX_ENTRIES = 50000
+DEFAULT_CACHE_MAX_BYTES = 0  # sem limite
+EVICTION_LOW_WATER = 0.9  # A remoção LRU deixa o cache com 90% do limite, evitando recontagens a cada escrita
+PURGE_INTERVAL_WRITES = 1000  # Escritas entre as remoções periódicas das entradas expiradas
+
+
+def open_sqlite(path: str, read_only: bool = False) -> sqlite3.Connection:
+    """
+    Abre um banco SQLite compartilhável entre threads (o chamador serializa o uso com um
+    threading.Lock), em modo autocommit, WAL e synchronous=NORMAL. Com read_only=True, o
+    arquivo precisa existir e é aberto somente para leitura.
+    """
+    if read_only:
+        return sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", uri=True, check_same_thread=False)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def lazy_singleton(factory):
+    """
+    Decorador para as funções get_*() que abrem um recurso compartilhado pelo processo: a
+    primeira chamada executa factory() sob um Lock e as seguintes reutilizam o resultado.
+    Se factory() retornar None, a próxima chamada tenta de novo. reset() descarta a
+    instância (ex.: após mudar o caminho no ambiente) e a retorna.
+    """
+    instance = None
+    lock = threading.Lock()
+
+    @functools.wraps(factory)
+    def get():
+        nonlocal instance
+        with lock:
+            if instance is None:
+                instance = factory()
+            return instance
+
+    def reset():
+        nonlocal instance
+        with lock:
+            previous, instance = instance, None
+            return previous
+
+    get.reset = reset
+    return get
+
+
+class SQLiteCache:
+    """
+    Cache chave-valor persistente em SQLite.
+
+    Args:
+        path (str): Caminho do arquivo SQLite.
+        ttl_seconds (float): Tempo de vida das entradas (<= 0 = sem expiração).
+        max_entries (int): Número máximo de entradas antes da remoção LRU (<= 0 = sem limite).
+        max_bytes (int): Tamanho máximo total dos valores antes da remoção LRU (<= 0 = sem limite).
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = DEFAULT_CACHE_TTL_SECONDS,
+                 max_entries: int = DEFAULT_CACHE_MAX_ENTRIES, max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        self._conn = open_sqlite(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " chave TEXT PRIMARY KEY,"
+            " valor TEXT NOT NULL,"
+            " criado_em REAL NOT NULL,"
+            " acessado_em REAL NOT NULL,"
+            " tamanho INTEGER NOT NULL DEFAULT 0)"
+        )
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(cache)")]
+        if "tamanho" not in columns:  # Caches criados antes do limite por tamanho
+            self._conn.execute("ALTER TABLE cache ADD COLUMN tamanho INTEGER NOT NULL DEFAULT 0")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_acessado_em ON cache (acessado_em)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_criado_em ON cache (criado_em)")
+        self._sync_totals()
+
+    def get(self, key: str):
+        """
+        Retorna o valor armazenado para a chave, ou None se ausente ou expirado.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT valor, criado_em, tamanho FROM cache WHERE chave = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            value, created_at, size = row
+            if self.ttl_seconds > 0 and now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM cache WHERE chave = ?", (key,))
+                self._entries -= 1
+                self._bytes -= size
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE cache SET acessado_em = ? WHERE chave = ?", (now, key))
+            self.hits += 1
+        return json.loads(value)
+
+    def set(self, key: str, value):
+        """
+        Armazena um valor serializável em JSON, removendo as entradas menos usadas se necessário.
+        """
+        now = time.time()
+        serialized = json.dumps(value, ensure_ascii=False)
+        size = len(serialized.encode('utf-8'))
+        with self._lock:
+            previous = self._conn.execute("SELECT tamanho FROM cache WHERE chave = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (chave, valor, criado_em, acessado_em, tamanho) VALUES (?, ?, ?, ?, ?)",
+                (key, serialized, now, now, size),
+            )
+            if previous is None:
+                self._entries += 1
+                self._bytes += size
+            else:
+                self._bytes += size - previous[0]
+            self._evict()
+
+    def delete(self, key: str):
+        """Remove uma entrada do cache."""
+        with self._lock:
+            row = self._conn.execute("SELECT tamanho FROM cache WHERE chave = ?", (key,)).fetchone()
+            if row is not None:
+                self._conn.execute("DELETE FROM cache WHERE chave = ?", (key,))
+                self._entries -= 1
+                self._bytes -= row[0]
+
+    def _sync_totals(self):
+        """Recalcula os contadores de entradas e bytes (corrige escritas de outros processos)."""
+        self._entries, self._bytes = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(tamanho), 0) FROM cache").fetchone()
+
+    def _over_limit(self) -> bool:
+        return ((self.max_entries > 0 and self._entries > self.max_entries)
+                or (self.max_bytes > 0 and self._bytes > self.max_bytes))
+
+    def _purge_expired(self):
+        """Remove as entradas expiradas (consulta pelo índice de criado_em)."""
+        cutoff = time.time() - self.ttl_seconds
+        count, total_bytes = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(tamanho), 0) FROM cache WHERE criado_em < ?", (cutoff,)).fetchone()
+        if count:
+            self._conn.execute("DELETE FROM cache WHERE criado_em < ?", (cutoff,))
+            self._entries -= count
+            self._bytes -= total_bytes
+
+    def _evict(self):
+        self._writes += 1
+        if self.ttl_seconds > 0 and self._writes % PURGE_INTERVAL_WRITES == 0:
+            self._purge_expired()
+        if not self._over_limit():
+            return
+
+        if self.ttl_seconds > 0:
+            self._purge_expired()
+        self._sync_totals()
+        if not self._over_limit():
+            return
+
+        # Remove as entradas menos usadas até o cache ficar com EVICTION_LOW_WATER dos limites
+        max_entries = max(1, int(self.max_entries * EVICTION_LOW_WATER)) if self.max_entries > 0 else None
+        max_bytes = int(self.max_bytes * EVICTION_LOW_WATER) if self.max_bytes > 0 else None
+        entries, total_bytes = self._entries, self._bytes
+        stale_keys = []
+        for key, size in self._conn.execute("SELECT chave, tamanho FROM cache ORDER BY acessado_em"):
+            if (max_entries is None or entries <= max_entries) and (max_bytes is None or total_bytes <= max_bytes):
+                break
+            stale_keys.append((key,))
+            entries -= 1
+            total_bytes -= size
+        self._conn.executemany("DELETE FROM cache WHERE chave = ?", stale_keys)
+        self._entries, self._bytes = entries, total_bytes
+
+    def stats(self) -> dict:
+        """Retorna os contadores de acertos/erros e o número de entradas."""
+        with self._lock:
+            count, total_bytes = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(tamanho), 0) FROM cache").fetchone()
+        total = self.hits + self.misses
+        return {
+            "acertos": self.hits,
+            "erros": self.misses,
+            "entradas": count,
+            "bytes": total_bytes,
+            "taxa_acerto": round(self.hits / total, 4) if total else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def cache_enabled() -> bool:
+    """Indica se o cache está habilitado (CACHE_ENABLED, padrão: true)."""
+    return env_flag("CACHE_ENABLED", True)
+
+
+def open_cache(name: str, ttl_seconds: float | None = None, max_entries: int | None = None,
+               max_bytes: int | None = None) -> SQLiteCache:
+    """
+    Abre o cache com o nome informado em CACHE_DIR. Os limites não informados
+    vêm de CACHE_TTL_SECONDS, CACHE_MAX_ENTRIES e CACHE_MAX_BYTES.
+    """
+    cache_dir = os.path.join(PROJECT_ROOT, os.getenv("CACHE_DIR", DEFAULT_CACHE_DIR))  # Relativo à raiz do projeto
+    if ttl_seconds is None:
+        ttl_seconds = float(os.getenv("CACHE_TTL_SECONDS", DEFAULT_CACHE_TTL_SECONDS))
+    if max_entries is None:
+        max_entries = int(os.getenv("CACHE_MAX_ENTRIES", DEFAULT_CACHE_MAX_ENTRIES))
+    if max_bytes is None:
+        max_bytes = int(os.getenv("CACHE_MAX_BYTES", DEFAULT_CACHE_MAX_BYTES))
+    path = os.path.join(cache_dir, f"{name}.sqlite3")
+    logging.debug(f"Abrindo cache '{name}' em {path}")
+    return SQLiteCache(path, ttl_seconds=ttl_seconds, max_entries=max_entries, max_bytes=max_bytes)
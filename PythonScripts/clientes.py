@@ -0,0 +1,92 @@
+"""
+    Módulo de Clientes Compartilhados.
+
+    Mantém uma sessão HTTP keep-alive com pool de conexões para a API CNPJA e
+    os objetos GenerativeModel do Gemini já configurados, reutilizados por
+    main.py, gui.py e pelos workers do modo lote.
+
+    Os SDKs (requests e google.generativeai) são importados apenas no primeiro
+    uso: o import do Gemini sozinho leva quase um segundo e não é necessário
+    para validar CNPJs, abrir a GUI ou desqualificar uma empresa pelas regras.
+    """
+
+import logging
+import os
+import threading
+
+DEFAULT_HTTP_POOL_SIZE = 10
+
+_lock = threading.Lock()
+_http_session = None
+_gemini_api_key = None
+_gemini_models = {}
+
+
+def load_genai():
+    """Retorna o módulo google.generativeai, importado na primeira chamada."""
+    import google.generativeai as genai
+    return genai
+
+
+def get_http_session():
+    """
+    Retorna a sessão HTTP compartilhada, criada na primeira chamada com um pool
+    de HTTP_POOL_SIZE conexões por host.
+    """
+    global _http_session
+    with _lock:
+        if _http_session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            pool_size = int(os.getenv("HTTP_POOL_SIZE", DEFAULT_HTTP_POOL_SIZE))
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _http_session = session
+        return _http_session
+
+
+def configure_gemini() -> bool:
+    """
+    Configura a API do Google Gemini com GEMINI_API_KEY. Só reconfigura se a chave mudar.
+    """
+    global _gemini_api_key
+    gemini_api_key = os.getenv("GEMINI_API_KEY")
+    if not gemini_api_key:
+        logging.error("GEMINI_API_KEY não encontrada no arquivo .env.")
+        return False
+    with _lock:
+        if gemini_api_key != _gemini_api_key:
+            load_genai().configure(api_key=gemini_api_key)
+            _gemini_api_key = gemini_api_key
+            _gemini_models.clear()
+    return True
+
+
+def get_gemini_model(model_name: str, generation_settings: dict | None = None):
+    """
+    Retorna um GenerativeModel configurado para o modelo e as configurações de geração
+    informados, reutilizando a mesma instância entre as análises. Retorna None se a
+    API do Gemini não puder ser configurada.
+    """
+    if not configure_gemini():
+        return None
+    key = (model_name, tuple(sorted((generation_settings or {}).items())))
+    with _lock:
+        model = _gemini_models.get(key)
+        if model is None:
+            model = load_genai().GenerativeModel(model_name, generation_config=generation_settings or None)
+            _gemini_models[key] = model
+        return model
+
+
+def close_clients():
+    """Fecha a sessão HTTP e descarta os modelos em cache."""
+    global _http_session
+    with _lock:
+        if _http_session is not None:
+            _http_session.close()
+            _http_session = None
+        _gemini_models.clear()
@@ -0,0 +1,192 @@
+"""
+    Módulo de Configuração.
+
+    Carrega uma única vez os prompts dos agentes e a tabela de CNAEs de educação
+    da pasta config/, mantendo um índice dos CNAEs válidos. Os arquivos só são
+    relidos quando sua data de modificação (mtime) muda.
+    """
+
+import hashlib
+import json
+import logging
+import os
+import threading
+
+CONFIG_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'config'))
+CNAE_EDUCATION_FILE = 'cnae_educacao.json'
+
+
+TRUE_VALUES = ("1", "true", "yes", "sim")
+
+
+def env_flag(name: str, default: bool) -> bool:
+    """Lê uma variável de ambiente booleana: 1/true/yes/sim (sem diferenciar maiúsculas) é verdadeiro."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in TRUE_VALUES
+
+
+def normalize_cnae(cnae: str | int) -> int | None:
+    """
+    Converte um código CNAE (ex.: '8531-7/00' ou 8531700) para o id numérico usado pela API CNPJA.
+    """
+    digits = "".join(filter(str.isdigit, str(cnae)))
+    return int(digits) if digits else None
+
+
+class ConfigRegistry:
+    """
+    Registro thread-safe dos arquivos de configuração, recarregados apenas quando o mtime muda.
+
+    Args:
+        config_dir (str): Diretório onde ficam os prompts e a tabela de CNAEs.
+    """
+
+    def __init__(self, config_dir: str = CONFIG_DIR):
+        self.config_dir = config_dir
+        self._entries = {}
+        self._digests = {} # file_name -> (mtime, sha256 do conteúdo)
+        self._listed = False # version() já leu todos os arquivos da pasta
+        self._versions = {} # seleção de arquivos -> (((file_name, mtime), ...), versão)
+        self._lock = threading.Lock()
+
+    def _load(self, file_name: str, parser):
+        """
+        Retorna o conteúdo processado do arquivo, relendo-o apenas se o mtime mudou.
+        Retorna None (e registra o erro) se o arquivo não existir ou for inválido.
+        """
+        path = os.path.join(self.config_dir, file_name)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            logging.error(f"Arquivo de configuração não encontrado em {path}")
+            return None
+
+        key = (file_name, parser)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == mtime:
+                return entry[1]
+
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    raw_content = f.read()
+                value = parser(raw_content)
+            except FileNotFoundError:
+                logging.error(f"Arquivo de configuração não encontrado em {path}")
+                return None
+            except json.JSONDecodeError:
+                logging.error(f"Erro ao decodificar JSON do arquivo {path}")
+                return None
+
+            if entry is not None:
+                logging.info(f"Arquivo de configuração {file_name} alterado. Recarregando.")
+            self._entries[key] = (mtime, value)
+            self._digests[file_name] = (mtime, hashlib.sha256(raw_content.encode('utf-8')).hexdigest())
+            return value
+
+    def get_prompt(self, name: str) -> str | None:
+        """
+        Retorna o texto do prompt config/<name>.txt (ex.: 'agente_negocio_cnpj').
+        """
+        return self._load(f"{name}.txt", _parse_text)
+
+    def get_json(self, file_name: str) -> dict | None:
+        """
+        Retorna o conteúdo de um arquivo JSON da pasta config/ (ex.: 'cnae_educacao.json').
+        """
+        return self._load(file_name, json.loads)
+
+    def _get_cnae_table(self) -> dict | None:
+        return self._load(CNAE_EDUCATION_FILE, _parse_cnae_table)
+
+    def get_cnae_data(self) -> dict | None:
+        """
+        Retorna a tabela de CNAEs de educação, exatamente como está no arquivo.
+        """
+        cnae_table = self._get_cnae_table()
+        return cnae_table["tabela"] if cnae_table else None
+
+    def get_cnae_index(self) -> dict:
+        """
+        Retorna o dicionário {id do CNAE: entrada da tabela} dos CNAEs principais de educação.
+        """
+        cnae_table = self._get_cnae_table()
+        return cnae_table["indice"] if cnae_table else {}
+
+    def get_valid_cnae_ids(self) -> frozenset:
+        """
+        Retorna o conjunto de ids de CNAE principais aceitos como educacionais.
+        """
+        cnae_table = self._get_cnae_table()
+        return cnae_table["ids_validos"] if cnae_table else frozenset()
+
+    def find_cnae(self, cnae_id) -> dict | None:
+        """
+        Retorna a entrada da tabela (com 'grupo' e 'prioridade') para o CNAE informado, ou None.
+        """
+        normalized = normalize_cnae(cnae_id) if cnae_id is not None else None
+        return self.get_cnae_index().get(normalized)
+
+    def version(self, file_names=None) -> str:
+        """
+        Retorna um identificador curto da versão atual dos prompts e arquivos JSON da
+        pasta config/, derivado do conteúdo dos arquivos.
+
+        Só a primeira chamada lista e lê a pasta; depois a versão vem dos mtimes que o
+        registro já acompanha (cada get_prompt/get_json confere o arquivo e o relê se mudou)
+        e é memorizada por eles, sem acesso ao disco nem novo hash enquanto nada muda.
+
+        Args:
+            file_names (Iterable[str] | None): Restringe a versão a esses arquivos de config/
+                (ex.: os que um modo do pipeline lê), conferindo o mtime de cada um na chamada.
+        """
+        if file_names is not None:
+            selection = tuple(sorted(set(file_names)))
+            for file_name in selection:
+                if file_name.endswith('.txt'):
+                    self.get_prompt(file_name[:-4])
+                else:
+                    self.get_json(file_name)
+        else:
+            selection = None
+            if not self._listed:
+                for file_name in sorted(os.listdir(self.config_dir)):
+                    if file_name.endswith('.txt'):
+                        self.get_prompt(file_name[:-4])
+                    elif file_name.endswith('.json'):
+                        self.get_json(file_name)
+                self._listed = True
+        with self._lock:
+            digests = sorted((file_name, entry) for file_name, entry in self._digests.items()
+                             if selection is None or file_name in selection)
+            state = tuple((file_name, mtime) for file_name, (mtime, _) in digests)
+            cached = self._versions.get(selection)
+            if cached is not None and cached[0] == state:
+                return cached[1]
+            combined = [(file_name, digest) for file_name, (_, digest) in digests]
+            version = hashlib.sha256(json.dumps(combined).encode('utf-8')).hexdigest()[:12]
+            self._versions[selection] = (state, version)
+            return version
+
+
+def _parse_text(content: str) -> str:
+    return content
+
+
+def _parse_cnae_table(content: str) -> dict:
+    cnae_data = json.loads(content)
+    index = {}
+    for cnae_item in cnae_data.get('cnaes_principais', []):
+        cnae_id = normalize_cnae(cnae_item.get('codigo_formatado', ''))
+        if cnae_id is not None:
+            index[cnae_id] = cnae_item
+    return {"tabela": cnae_data, "indice": index, "ids_validos": frozenset(index)}
+
+
+_registry = ConfigRegistry()
+
+def get_config_registry() -> ConfigRegistry:
+    """Retorna o registro de configuração compartilhado pelo processo."""
+    return _registry
@@ -0,0 +1,168 @@
+"""
+    Módulo do Corpus de Respostas da API CNPJA.
+
+    Grava a resposta bruta de cada consulta bem-sucedida à API CNPJA (a mais
+    recente de cada CNPJ) e os resultados das reexecuções feitas por
+    reexecucao_corpus.py, para que as regras e os agentes possam ser
+    reavaliados após mudanças nos prompts ou na tabela de CNAEs sem consultar
+    a API novamente.
+    """
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+from armazenamento_resultados import PROJECT_ROOT
+from cache_sqlite import lazy_singleton, open_sqlite
+from configuracao import env_flag
+
+DEFAULT_CORPUS_DB_PATH = os.path.join(PROJECT_ROOT, 'dados', 'corpus_cnpja.sqlite3')
+
+
+class CorpusStore:
+    """
+    Respostas da API CNPJA e execuções de reexecução em SQLite (modo WAL), seguro
+    para várias threads.
+
+    Args:
+        path (str): Caminho do arquivo SQLite.
+    """
+
+    def __init__(self, path: str = DEFAULT_CORPUS_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = open_sqlite(path)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS respostas (
+                cnpj TEXT PRIMARY KEY,
+                obtido_em TEXT NOT NULL,
+                payload TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS execucoes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                iniciada_em TEXT NOT NULL,
+                modo TEXT NOT NULL,
+                versao_config TEXT,
+                descricao TEXT
+            );
+            CREATE TABLE IF NOT EXISTS resultados_execucao (
+                execucao_id INTEGER NOT NULL,
+                cnpj TEXT NOT NULL,
+                classificacao TEXT,
+                score REAL,
+                resultado TEXT,
+                PRIMARY KEY (execucao_id, cnpj)
+            ) WITHOUT ROWID;
+            """
+        )
+
+    # Respostas da API CNPJA
+
+    def record(self, cnpj: str, payload: dict, obtained_at: str | None = None):
+        """Grava a resposta da API para o CNPJ, mantendo apenas a mais recente."""
+        obtained_at = obtained_at or datetime.now(timezone.utc).isoformat(timespec="seconds")
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO respostas (cnpj, obtido_em, payload) VALUES (?, ?, ?)"
+                " ON CONFLICT (cnpj) DO UPDATE SET obtido_em = excluded.obtido_em, payload = excluded.payload"
+                " WHERE excluded.obtido_em >= respostas.obtido_em",
+                (cnpj, obtained_at, json.dumps(payload, ensure_ascii=False)),
+            )
+
+    def get(self, cnpj: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute("SELECT payload FROM respostas WHERE cnpj = ?", (cnpj,)).fetchone()
+        return json.loads(row["payload"]) if row else None
+
+    def cnpjs(self) -> list[str]:
+        """Retorna os CNPJs do corpus, em ordem."""
+        with self._lock:
+            return [row["cnpj"] for row in self._conn.execute("SELECT cnpj FROM respostas ORDER BY cnpj")]
+
+    # Execuções
+
+    def start_run(self, mode: str, config_version: str | None, description: str | None = None) -> int:
+        """Registra uma nova execução e retorna o seu id."""
+        started_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO execucoes (iniciada_em, modo, versao_config, descricao) VALUES (?, ?, ?, ?)",
+                (started_at, mode, config_version, description),
+            )
+            return cursor.lastrowid
+
+    def save_run_result(self, run_id: int, cnpj: str, result: dict | None):
+        """Grava o resultado (formato do resultado.json) de um CNPJ na execução; None indica erro."""
+        score = result.get("score") if result else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO resultados_execucao (execucao_id, cnpj, classificacao, score, resultado)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (run_id, cnpj, result.get("classification") if result else "ERRO",
+                 score if isinstance(score, (int, float)) else None,
+                 json.dumps(result, ensure_ascii=False) if result else None),
+            )
+
+    def run_results(self, run_id: int) -> dict:
+        """Retorna {cnpj: {"classificacao", "score"}} da execução."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT cnpj, classificacao, score FROM resultados_execucao WHERE execucao_id = ?", (run_id,)
+            ).fetchall()
+        return {row["cnpj"]: {"classificacao": row["classificacao"], "score": row["score"]} for row in rows}
+
+    def runs(self, limit: int | None = None) -> list[dict]:
+        """Lista as execuções, da mais recente para a mais antiga, com a quantidade de CNPJs."""
+        sql = ("SELECT e.id, e.iniciada_em, e.modo, e.versao_config, e.descricao, COUNT(r.cnpj) AS cnpjs"
+               " FROM execucoes e LEFT JOIN resultados_execucao r ON r.execucao_id = e.id"
+               " GROUP BY e.id ORDER BY e.id DESC")
+        params = ()
+        if limit is not None:
+            sql += " LIMIT ?"
+            params = (limit,)
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params)]
+
+    def previous_run(self, run_id: int, mode: str | None = None) -> int | None:
+        """Retorna o id da execução anterior a run_id (no mesmo modo, se informado), ou None."""
+        sql = "SELECT id FROM execucoes WHERE id < ?"
+        params = [run_id]
+        if mode is not None:
+            sql += " AND modo = ?"
+            params.append(mode)
+        with self._lock:
+            row = self._conn.execute(sql + " ORDER BY id DESC LIMIT 1", params).fetchone()
+        return row["id"] if row else None
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def corpus_recording_enabled() -> bool:
+    """Indica se as respostas da API CNPJA devem ser gravadas no corpus (CNPJA_CORPUS_ENABLED, padrão: true)."""
+    return env_flag("CNPJA_CORPUS_ENABLED", True)
+
+
+@lazy_singleton
+def get_corpus_store() -> CorpusStore:
+    """Retorna o corpus compartilhado, aberto em CNPJA_CORPUS_PATH (relativo à raiz do projeto)."""
+    return CorpusStore(os.path.join(PROJECT_ROOT, os.getenv("CNPJA_CORPUS_PATH", DEFAULT_CORPUS_DB_PATH)))
+
+
+def record_cnpja_response(cnpj: str, payload: dict):
+    """
+    Grava a resposta da API CNPJA no corpus, se habilitado.
+    Falhas de gravação são registradas, mas não interrompem a consulta.
+    """
+    if not corpus_recording_enabled():
+        return
+    try:
+        get_corpus_store().record(cnpj, payload)
+    except sqlite3.Error as e:
+        logging.error(f"ERRO ao gravar a resposta da API CNPJA do CNPJ {cnpj} no corpus: {e}")
@@ -1,116 +1,276 @@
 import tkinter as tk
-from tkinter import scrolledtext, messagebox
+from tkinter import scrolledtext, messagebox, filedialog, ttk
 import os
 import sys
+import queue
 from dotenv import load_dotenv
 import threading
+from concurrent.futures import ThreadPoolExecutor
 
-# Adiciona o diretório pai ao sys.path para permitir importações relativas
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# Adiciona o diretório dos scripts ao sys.path para que a GUI use os mesmos módulos que main.py
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
-from PythonScripts.validador_cnpj import validate_cnpj
-from PythonScripts.analise_cnpj import fetch_cnpj_data, analyze_business_criteria, analyze_scoring
+from validador_cnpj import validate_cnpj, format_cnpj
+from analise_cnpj import fetch_cnpj_data, analyze_company_data
+from lote_cnpj import read_cnpjs, DEFAULT_BATCH_WORKERS
+from armazenamento_resultados import save_analysis
+from metricas import analysis_trace
 
 load_dotenv() # Carrega as variáveis de ambiente
 
+# Títulos das listas exibidas à medida que os agentes respondem (streaming)
+STREAMED_LIST_TITLES = {
+    "pontos_fortes": "Pontos Fortes (Agente de Negócio)",
+    "pontos_fracos": "Pontos Fracos (Agente de Negócio)",
+    "pontos_atencao": "Pontos de Atenção (Agente de Negócio)",
+    "pontos_positivos": "Pontos Positivos (Agente de Scoring)",
+    "pontos_negativos": "Pontos Negativos (Agente de Scoring)",
+}
+
+POLL_INTERVAL_MS = 100 # Intervalo de leitura da fila de eventos dos workers
+MAX_EVENTS_PER_POLL = 200 # Limita o trabalho por ciclo para manter o mainloop responsivo
+FINAL_STATUSES = ("Concluído", "Erro", "Inválido", "Cancelado")
+
+class AnalysisItem:
+    """Um CNPJ na fila de análise da GUI."""
+
+    def __init__(self, item_id, raw_cnpj):
+        self.item_id = item_id
+        self.raw_cnpj = raw_cnpj
+        self.cnpj = validate_cnpj(raw_cnpj)
+        self.cancel_event = threading.Event()
+        self.future = None
+        self.status = "Na fila"
+        self.company_data = None
+        self.final_analysis = None
+        self.error = None
+        self.streamed_items = []
+
 class CNPJAnalyzerGUI:
     def __init__(self, master):
         self.master = master
         master.title("Analisador de CNPJ - B2B Principia")
 
-        # Frame para o input do CNPJ
+        self.items = {}
+        self.events = queue.Queue()
+        workers = int(os.getenv("GUI_WORKERS", os.getenv("BATCH_WORKERS", DEFAULT_BATCH_WORKERS)))
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+
+        # Frame para o input dos CNPJs (um ou vários, um por linha)
         self.cnpj_frame = tk.Frame(master)
         self.cnpj_frame.pack(pady=10)
 
-        self.cnpj_label = tk.Label(self.cnpj_frame, text="Digite o CNPJ para análise:")
-        self.cnpj_label.pack(side=tk.LEFT)
+        self.cnpj_label = tk.Label(self.cnpj_frame, text="Digite ou cole os CNPJs para análise (um por linha):")
+        self.cnpj_label.pack(anchor=tk.W)
 
-        self.cnpj_entry = tk.Entry(self.cnpj_frame, width=25) # Aumenta a largura para CNPJ formatado
+        self.cnpj_entry = tk.Text(self.cnpj_frame, width=40, height=4)
         self.cnpj_entry.pack(side=tk.LEFT, padx=5)
 
-        self.analyze_button = tk.Button(self.cnpj_frame, text="Analisar CNPJ", command=self.start_analysis_thread)
-        self.analyze_button.pack(side=tk.LEFT)
+        self.buttons_frame = tk.Frame(self.cnpj_frame)
+        self.buttons_frame.pack(side=tk.LEFT)
+
+        self.analyze_button = tk.Button(self.buttons_frame, text="Analisar CNPJ(s)", command=self.start_analysis_thread)
+        self.analyze_button.pack(fill=tk.X)
+
+        self.load_csv_button = tk.Button(self.buttons_frame, text="Carregar CSV...", command=self.load_csv)
+        self.load_csv_button.pack(fill=tk.X, pady=2)
+
+        self.cancel_button = tk.Button(self.buttons_frame, text="Cancelar selecionados", command=self.cancel_selected)
+        self.cancel_button.pack(fill=tk.X)
+
+        self.cancel_all_button = tk.Button(self.buttons_frame, text="Cancelar todos", command=self.cancel_all)
+        self.cancel_all_button.pack(fill=tk.X, pady=2)
+
+        # Tabela com o status de cada CNPJ da fila
+        self.table = ttk.Treeview(master, columns=("cnpj", "razao_social", "status", "classificacao", "score"),
+                                  show="headings", height=10)
+        for column, title, width in (("cnpj", "CNPJ", 140), ("razao_social", "Razão Social", 260),
+                                     ("status", "Status", 110), ("classificacao", "Classificação", 100),
+                                     ("score", "Score", 60)):
+            self.table.heading(column, text=title)
+            self.table.column(column, width=width, anchor=tk.W)
+        self.table.pack(padx=10, fill=tk.X)
+        self.table.bind("<<TreeviewSelect>>", self.show_selected_item)
+
+        # Progresso e Status Label
+        self.progress = ttk.Progressbar(master, mode="determinate", length=400)
+        self.progress.pack(pady=5)
 
-        # Status Label
         self.status_label = tk.Label(master, text="", fg="blue")
         self.status_label.pack(pady=5)
 
-        # Área de texto para exibir os resultados
-        self.result_text = scrolledtext.ScrolledText(master, width=80, height=25, wrap=tk.WORD)
+        # Área de texto para exibir os resultados do CNPJ selecionado
+        self.result_text = scrolledtext.ScrolledText(master, width=80, height=18, wrap=tk.WORD)
         self.result_text.pack(pady=10)
         self.result_text.config(state=tk.DISABLED) # Torna a área de texto somente leitura
+        self.result_text.tag_config('error', foreground='red')
+
+        master.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.master.after(POLL_INTERVAL_MS, self._process_events)
+
+    # Fila de análise
 
     def start_analysis_thread(self):
-        self.analyze_button.config(state=tk.DISABLED)
-        self.cnpj_entry.config(state=tk.DISABLED)
-        self.status_label.config(text="Analisando... Por favor, aguarde.", fg="blue")
-        self.result_text.config(state=tk.NORMAL)
-        self.result_text.delete(1.0, tk.END)
-        self.result_text.config(state=tk.DISABLED)
-        self.master.update_idletasks()
+        raw_cnpjs = [line.strip() for line in self.cnpj_entry.get(1.0, tk.END).splitlines() if line.strip()]
+        if not raw_cnpjs:
+            messagebox.showwarning("Analisador de CNPJ", "Digite ao menos um CNPJ.")
+            return
+        self.cnpj_entry.delete(1.0, tk.END)
+        self.enqueue(raw_cnpjs)
+
+    def load_csv(self):
+        path = filedialog.askopenfilename(title="Selecione o arquivo CSV",
+                                          filetypes=(("CSV", "*.csv"), ("Texto", "*.txt"), ("Todos", "*.*")))
+        if not path:
+            return
+        try:
+            raw_cnpjs = list(read_cnpjs(path))
+        except (OSError, UnicodeDecodeError) as e:
+            messagebox.showerror("Analisador de CNPJ", f"Não foi possível ler o arquivo: {e}")
+            return
+        self.enqueue(raw_cnpjs)
 
-        analysis_thread = threading.Thread(target=self._run_analysis_task)
-        analysis_thread.start()
+    def enqueue(self, raw_cnpjs):
+        for raw_cnpj in raw_cnpjs:
+            item_id = self.table.insert("", tk.END, values=(raw_cnpj, "", "Na fila", "", ""))
+            item = AnalysisItem(item_id, raw_cnpj)
+            self.items[item_id] = item
+            if item.cnpj is None:
+                self._apply_update(item, status="Inválido")
+                continue
+            self.table.item(item_id, values=(format_cnpj(item.cnpj), "", "Na fila", "", ""))
+            item.future = self.executor.submit(self._run_analysis_task, item)
+        self._update_progress()
 
-    def _run_analysis_task(self):
-        raw_cnpj = self.cnpj_entry.get()
-        cnpj = ''.join(filter(str.isdigit, raw_cnpj))
+    def cancel_selected(self):
+        for item_id in self.table.selection():
+            self._cancel(self.items[item_id])
 
-        self.display_message(f"Iniciando análise para o CNPJ: {raw_cnpj} (limpo: {cnpj})\n")
+    def cancel_all(self):
+        for item in self.items.values():
+            self._cancel(item)
 
-        if not validate_cnpj(cnpj):
-            self.display_message("ERRO: CNPJ inválido. Por favor, digite um CNPJ válido (apenas números, ou com formatação padrão).", is_error=True)
-            self._enable_ui()
+    def _cancel(self, item):
+        if item.status in FINAL_STATUSES:
             return
+        item.cancel_event.set()
+        if item.future is not None and item.future.cancel():
+            self._apply_update(item, status="Cancelado") # Ainda não tinha começado
+        else:
+            self._apply_update(item, status="Cancelando...") # Para ao fim da etapa em andamento
+
+    def _run_analysis_task(self, item):
+        """Executa o pipeline de um CNPJ (em uma thread do pool) e publica os eventos na fila."""
+        def post(**changes):
+            self.events.put((item.item_id, changes))
+
+        def on_item(key, text):
+            self.events.put((item.item_id, {"stream": (key, text)}))
+
+        with analysis_trace(item.cnpj): # Busca e agentes compartilham o mesmo trace ID
+            try:
+                if item.cancel_event.is_set():
+                    post(status="Cancelado")
+                    return
 
+                # 1. Buscar dados do CNPJ
+                post(status="Buscando dados")
+                company_data = fetch_cnpj_data(item.cnpj, cancel_event=item.cancel_event)
+                if item.cancel_event.is_set():
+                    post(status="Cancelado")
+                    return
+                if company_data is None:
+                    post(status="Erro", error="Não foi possível buscar os dados do CNPJ. Verifique a chave da API CNPJA ou o CNPJ.")
+                    return
+                post(company_data=company_data)
+
+                # 2 e 3. Análise de Negócio e Scoring
+                post(status="Analisando")
+                analysis = analyze_company_data(item.cnpj, company_data, on_item=on_item, cancel_event=item.cancel_event)
+                if item.cancel_event.is_set():
+                    post(status="Cancelado")
+                elif analysis is None:
+                    post(status="Erro", error="Falha na análise dos critérios de negócio ou de scoring.")
+                else:
+                    save_analysis(analysis)
+                    post(status="Concluído", final_analysis=analysis["analise_scoring"])
+            except ValueError as e:
+                post(status="Erro", error=f"ERRO de Configuração: {e}")
+            except Exception as e:
+                post(status="Erro", error=f"ERRO Inesperado: {e}")
+
+    def _process_events(self):
+        """Aplica na thread principal os eventos publicados pelos workers, em lotes limitados."""
         try:
-            # 1. Buscar dados do CNPJ
-            self.display_message("Buscando dados do CNPJ...", is_error=False)
-            company_data = fetch_cnpj_data(cnpj)
-            if company_data is None:
-                self.display_message("ERRO: Não foi possível buscar os dados do CNPJ. Verifique a chave da API CNPJA ou o CNPJ.", is_error=True)
-                self._enable_ui()
-                return
-
-            # 2. Análise de Critérios de Negócio
-            self.display_message("Analisando critérios de negócio...", is_error=False)
-            business_analysis = analyze_business_criteria(company_data)
-            if business_analysis is None:
-                self.display_message("ERRO: Falha na análise dos critérios de negócio.", is_error=True)
-                self._enable_ui()
-                return
-
-            # Verifica se houve desqualificação automática no business_analysis
-            if business_analysis.get("classificacao") == "REPROVADO":
-                self.display_message("Análise de Negócio: REPROVADO (Desqualificação Automática)\n", is_error=True)
-                self.display_message(f"Recomendação: {business_analysis.get('recomendacao', 'N/A')}\n", is_error=True)
-                self.display_message(f"Pontos Negativos: {', '.join(business_analysis.get('pontos_negativos', []))}\n", is_error=True)
-                self._enable_ui()
-                return
-
-            # 3. Análise de Scoring
-            self.display_message("Calculando score e classificação final...", is_error=False)
-            final_analysis = analyze_scoring(company_data, business_analysis)
-            if final_analysis is None:
-                self.display_message("ERRO: Falha na análise de scoring.", is_error=True)
-                self._enable_ui()
-                return
-
-            # Exibir resultados finais
-            self.display_results(cnpj, company_data, final_analysis)
-
-        except ValueError as e:
-            self.display_message(f"ERRO de Configuração: {e}", is_error=True)
-        except Exception as e:
-            self.display_message(f"ERRO Inesperado: {e}", is_error=True)
-        finally:
-            self._enable_ui()
-
-    def _enable_ui(self):
-        if self.master.winfo_exists(): # Verifica se a janela principal ainda existe
-            self.master.after(0, lambda: self.analyze_button.config(state=tk.NORMAL))
-            self.master.after(0, lambda: self.cnpj_entry.config(state=tk.NORMAL))
-            self.master.after(0, lambda: self.status_label.config(text="Análise Concluída.", fg="green"))
+            for _ in range(MAX_EVENTS_PER_POLL):
+                item_id, changes = self.events.get_nowait()
+                self._apply_update(self.items[item_id], **changes)
+        except queue.Empty:
+            pass
+        self._update_progress()
+        if self.master.winfo_exists():
+            self.master.after(POLL_INTERVAL_MS, self._process_events)
+
+    def _apply_update(self, item, status=None, company_data=None, final_analysis=None, error=None, stream=None):
+        if item.status in FINAL_STATUSES and status not in (None, *FINAL_STATUSES):
+            return
+        if status is not None and status not in FINAL_STATUSES and item.cancel_event.is_set():
+            status = "Cancelando..."
+        selected = item.item_id in self.table.selection()
+        if company_data is not None:
+            item.company_data = company_data
+        if final_analysis is not None:
+            item.final_analysis = final_analysis
+        if error is not None:
+            item.error = error
+            if selected:
+                self.display_message(error, is_error=True)
+        if stream is not None:
+            item.streamed_items.append(stream)
+            if selected:
+                self.display_streamed_item(*stream, previous=item.streamed_items[:-1])
+        if status is not None:
+            item.status = status
+            if selected and status == "Concluído":
+                self.display_results(item.cnpj, item.company_data, item.final_analysis)
+
+        company_name = (item.company_data or {}).get('company', {}).get('name', '')
+        classification = (item.final_analysis or {}).get('classificacao', '')
+        score = (item.final_analysis or {}).get('score', '')
+        cnpj_label = format_cnpj(item.cnpj) if item.cnpj else item.raw_cnpj
+        self.table.item(item.item_id, values=(cnpj_label, company_name, item.status, classification, score))
+
+    def _update_progress(self):
+        total = len(self.items)
+        done = sum(1 for item in self.items.values() if item.status in FINAL_STATUSES)
+        self.progress.config(maximum=max(total, 1), value=done)
+        if total:
+            running = sum(1 for item in self.items.values() if item.status in ("Buscando dados", "Analisando", "Cancelando..."))
+            self.status_label.config(text=f"{done}/{total} concluídos - {running} em andamento",
+                                     fg="green" if done == total else "blue")
+
+    def show_selected_item(self, event=None):
+        selection = self.table.selection()
+        self.result_text.config(state=tk.NORMAL)
+        self.result_text.delete(1.0, tk.END)
+        self.result_text.config(state=tk.DISABLED)
+        if len(selection) != 1:
+            return
+        item = self.items[selection[0]]
+        self.display_message(f"CNPJ: {item.raw_cnpj} - {item.status}\n")
+        for index, (key, text) in enumerate(item.streamed_items):
+            self.display_streamed_item(key, text, previous=item.streamed_items[:index])
+        if item.status == "Concluído":
+            self.display_results(item.cnpj, item.company_data, item.final_analysis)
+        elif item.error:
+            self.display_message(item.error, is_error=True)
+
+    def on_close(self):
+        self.cancel_all()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.master.destroy()
+
+    # Exibição dos resultados
 
     def display_message(self, message, is_error=False):
         if not self.master.winfo_exists(): # Verifica se a janela principal ainda existe
@@ -120,13 +280,18 @@ class CNPJAnalyzerGUI:
             self.result_text.config(state=tk.NORMAL)
             if is_error:
                 self.result_text.insert(tk.END, f"\n{message}\n", 'error')
-                self.result_text.tag_config('error', foreground='red')
             else:
                 self.result_text.insert(tk.END, f"{message}\n")
             self.result_text.config(state=tk.DISABLED)
             self.result_text.see(tk.END) # Rola para o final
         self.master.after(0, _update_message)
 
+    def display_streamed_item(self, key, item, previous=()):
+        """Exibe um item de lista recebido do Gemini, com o título da lista na primeira ocorrência."""
+        if all(previous_key != key for previous_key, _ in previous):
+            self.display_message(f"\n{STREAMED_LIST_TITLES.get(key, key)}:")
+        self.display_message(f"  - {item}")
+
     def display_results(self, cnpj, company_data, final_analysis):
         if not self.master.winfo_exists(): # Verifica se a janela principal ainda existe
             return
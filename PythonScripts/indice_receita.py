@@ -0,0 +1,385 @@
+"""
+    Módulo do Índice Local da Receita Federal.
+
+    Converte os arquivos de dados abertos do CNPJ publicados pela Receita Federal
+    (Estabelecimentos e Empresas, e as tabelas de Municípios e CNAEs: CSV sem
+    cabeçalho, separado por ';', em latin-1, soltos ou dentro dos .zip originais)
+    em um índice SQLite compacto, com tabelas WITHOUT ROWID ordenadas pelo CNPJ.
+    O índice serve de fonte para fetch_cnpj_data (CNPJ_DATA_SOURCE=local ou
+    local_then_api), com os registros convertidos para o mesmo formato da API
+    CNPJA, e permite a triagem em lote sem consultas externas.
+
+    Os dumps não trazem sócios nem inscrições estaduais: os registros convertidos
+    listam esses campos em 'dados_indisponiveis', e o critério de restrições do
+    motor de scoring não é pontuado para eles.
+
+    Uso:
+        python PythonScripts/indice_receita.py importar --estabelecimentos dumps/Estabelecimentos*.zip \\
+            --empresas dumps/Empresas*.zip --municipios dumps/Municipios.zip --cnaes dumps/Cnaes.zip \\
+            --cnae-prefixo 85
+        python PythonScripts/indice_receita.py listar --cnae-prefixo 85 --situacao 2 > escolas.csv
+    """
+
+import argparse
+import csv
+import io
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zipfile
+
+from cache_sqlite import lazy_singleton, open_sqlite
+from configuracao import get_config_registry
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_RECEITA_INDEX_PATH = os.path.join(PROJECT_ROOT, 'dados', 'receita.sqlite3')
+DUMP_ENCODING = 'latin-1'
+IMPORT_BATCH_SIZE = 50_000
+
+# Colunas usadas dos arquivos da Receita (posição no layout oficial)
+EST_CNPJ_BASICO, EST_CNPJ_ORDEM, EST_CNPJ_DV, EST_MATRIZ_FILIAL, EST_NOME_FANTASIA = 0, 1, 2, 3, 4
+EST_SITUACAO, EST_DATA_SITUACAO, EST_DATA_INICIO = 5, 6, 10
+EST_CNAE_PRINCIPAL, EST_CNAES_SECUNDARIOS, EST_UF, EST_MUNICIPIO = 11, 12, 19, 20
+EMP_CNPJ_BASICO, EMP_RAZAO_SOCIAL, EMP_NATUREZA, EMP_CAPITAL, EMP_PORTE = 0, 1, 2, 4, 5
+TABLE_CODE, TABLE_DESCRIPTION = 0, 1 # Municípios e CNAEs: código;descrição
+
+# Códigos da Receita -> textos usados pela API CNPJA
+SITUACOES = {1: "Nula", 2: "Ativa", 3: "Suspensa", 4: "Inapta", 8: "Baixada"}
+PORTES = {0: "Não Informado", 1: "Microempresa", 3: "Empresa de Pequeno Porte", 5: "Demais"}
+
+# Campos do formato da API CNPJA que os dumps não trazem
+UNAVAILABLE_FIELDS = ["company.members", "registrations"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS estabelecimentos (
+    cnpj TEXT PRIMARY KEY,
+    matriz INTEGER,
+    nome_fantasia TEXT,
+    situacao INTEGER,
+    data_situacao TEXT,
+    data_inicio TEXT,
+    cnae_principal INTEGER,
+    cnaes_secundarios TEXT,
+    uf TEXT,
+    municipio TEXT
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS empresas (
+    cnpj_basico TEXT PRIMARY KEY,
+    razao_social TEXT,
+    natureza_juridica TEXT,
+    capital_social REAL,
+    porte INTEGER
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS municipios (
+    codigo TEXT PRIMARY KEY,
+    nome TEXT
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS cnaes (
+    codigo INTEGER PRIMARY KEY,
+    descricao TEXT
+);
+"""
+# Índice de cobertura para a triagem por CNAE e situação (listar_cnpjs não lê a tabela)
+SCREENING_INDEX = ("CREATE INDEX IF NOT EXISTS idx_estabelecimentos_cnae "
+                   "ON estabelecimentos (cnae_principal, situacao, cnpj)")
+
+
+def _open_dump(path: str):
+    """Abre um arquivo da Receita, solto ou como o primeiro membro de um .zip, para leitura em texto."""
+    if zipfile.is_zipfile(path):
+        archive = zipfile.ZipFile(path)
+        member = archive.open(archive.namelist()[0])
+        return io.TextIOWrapper(member, encoding=DUMP_ENCODING, newline='')
+    return open(path, 'r', encoding=DUMP_ENCODING, newline='')
+
+
+def _read_rows(paths):
+    for path in paths:
+        logging.info(f"Lendo {path}...")
+        with _open_dump(path) as stream:
+            yield from csv.reader(stream, delimiter=';', quotechar='"')
+
+
+def _to_int(value: str) -> int | None:
+    value = value.strip()
+    return int(value) if value.isdigit() else None
+
+
+def _to_iso_date(value: str) -> str | None:
+    """Converte AAAAMMDD em AAAA-MM-DD (datas zeradas ou vazias viram None)."""
+    value = value.strip()
+    if len(value) != 8 or not value.isdigit() or value == "00000000":
+        return None
+    return f"{value[:4]}-{value[4:6]}-{value[6:]}"
+
+
+def _to_float(value: str) -> float | None:
+    try:
+        return float(value.strip().replace('.', '').replace(',', '.'))
+    except ValueError:
+        return None
+
+
+def _cnae_digits(cnae_prefix: str | None) -> str | None:
+    """Normaliza o prefixo do CNAE (ex.: '85', '85.1', '8531-7') para até 7 dígitos."""
+    digits = "".join(filter(str.isdigit, cnae_prefix or ""))[:7]
+    return digits or None
+
+
+def _batched(rows, size: int = IMPORT_BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def import_dumps(estabelecimentos_paths: list[str], empresas_paths: list[str],
+                 index_path: str = DEFAULT_RECEITA_INDEX_PATH, cnae_prefix: str | None = None,
+                 municipios_paths: list[str] | None = None, cnaes_paths: list[str] | None = None) -> dict:
+    """
+    Importa os arquivos de Estabelecimentos e Empresas (e, se informadas, as tabelas de
+    Municípios e CNAEs) para o índice SQLite.
+
+    Args:
+        estabelecimentos_paths (list[str]): Arquivos (ou .zip) de Estabelecimentos.
+        empresas_paths (list[str]): Arquivos (ou .zip) de Empresas.
+        index_path (str): Caminho do índice (criado ou atualizado).
+        cnae_prefix (str | None): Se informado (ex.: '85'), importa apenas os estabelecimentos
+            cujo CNAE principal começa com o prefixo, e apenas as empresas desses estabelecimentos.
+        municipios_paths (list[str] | None): Tabela de Municípios (nome da cidade no endereço).
+        cnaes_paths (list[str] | None): Tabela de CNAEs (descrição das atividades fora de cnae_educacao.json).
+
+    Returns:
+        dict: Quantidade de registros importados por tabela e o tempo gasto.
+    """
+    started = time.perf_counter()
+    cnae_prefix = _cnae_digits(cnae_prefix)
+    os.makedirs(os.path.dirname(os.path.abspath(index_path)), exist_ok=True)
+    conn = sqlite3.connect(index_path)
+    conn.execute("PRAGMA journal_mode=OFF") # Importação em massa: o índice pode ser refeito a partir dos dumps
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.executescript(SCHEMA)
+
+    imported_bases = set() if cnae_prefix else None
+    stats = {"estabelecimentos": 0, "empresas": 0, "municipios": 0, "cnaes": 0}
+
+    def establishment_records():
+        for row in _read_rows(estabelecimentos_paths):
+            if len(row) <= EST_MUNICIPIO:
+                continue
+            cnae = row[EST_CNAE_PRINCIPAL].strip()
+            if cnae_prefix and not cnae.startswith(cnae_prefix):
+                continue
+            if imported_bases is not None:
+                imported_bases.add(row[EST_CNPJ_BASICO])
+            yield (
+                row[EST_CNPJ_BASICO] + row[EST_CNPJ_ORDEM] + row[EST_CNPJ_DV],
+                1 if row[EST_MATRIZ_FILIAL].strip() == "1" else 0,
+                row[EST_NOME_FANTASIA].strip() or None,
+                _to_int(row[EST_SITUACAO]),
+                _to_iso_date(row[EST_DATA_SITUACAO]),
+                _to_iso_date(row[EST_DATA_INICIO]),
+                _to_int(cnae),
+                row[EST_CNAES_SECUNDARIOS].strip() or None,
+                row[EST_UF].strip() or None,
+                row[EST_MUNICIPIO].strip() or None,
+            )
+
+    def company_records():
+        for row in _read_rows(empresas_paths):
+            if len(row) <= EMP_PORTE:
+                continue
+            if imported_bases is not None and row[EMP_CNPJ_BASICO] not in imported_bases:
+                continue
+            yield (
+                row[EMP_CNPJ_BASICO],
+                row[EMP_RAZAO_SOCIAL].strip(),
+                row[EMP_NATUREZA].strip() or None,
+                _to_float(row[EMP_CAPITAL]),
+                _to_int(row[EMP_PORTE]),
+            )
+
+    def table_records(paths, convert_code):
+        for row in _read_rows(paths or []):
+            code = convert_code(row[TABLE_CODE]) if len(row) > TABLE_DESCRIPTION else None
+            if code is not None:
+                yield code, row[TABLE_DESCRIPTION].strip()
+
+    with conn:
+        for table, paths, convert_code in (("municipios", municipios_paths, lambda code: code.strip() or None),
+                                           ("cnaes", cnaes_paths, _to_int)):
+            for batch in _batched(table_records(paths, convert_code)):
+                conn.executemany(f"INSERT OR REPLACE INTO {table} VALUES (?, ?)", batch)
+                stats[table] += len(batch)
+        for batch in _batched(establishment_records()):
+            conn.executemany("INSERT OR REPLACE INTO estabelecimentos VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", batch)
+            stats["estabelecimentos"] += len(batch)
+        for batch in _batched(company_records()):
+            conn.executemany("INSERT OR REPLACE INTO empresas VALUES (?, ?, ?, ?, ?)", batch)
+            stats["empresas"] += len(batch)
+    conn.execute(SCREENING_INDEX)
+    conn.execute("ANALYZE")
+    conn.close()
+
+    stats["tempo_segundos"] = round(time.perf_counter() - started, 3)
+    logging.info(f"Índice da Receita atualizado em {index_path}: {stats['estabelecimentos']} estabelecimentos, "
+                 f"{stats['empresas']} empresas em {stats['tempo_segundos']}s.")
+    return stats
+
+
+class ReceitaIndex:
+    """
+    Consulta somente leitura ao índice local, segura para várias threads.
+
+    Args:
+        path (str): Caminho do índice SQLite gerado por import_dumps.
+    """
+
+    def __init__(self, path: str = DEFAULT_RECEITA_INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+        tables = {row["name"] for row in self._conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        # Índices gerados antes das tabelas de Municípios e CNAEs não têm nomes nem descrições
+        city_column, city_join = ("c.nome AS municipio_nome", " LEFT JOIN municipios c ON c.codigo = e.municipio") \
+            if "municipios" in tables else ("NULL AS municipio_nome", "")
+        self._get_sql = (f"SELECT e.*, m.razao_social, m.natureza_juridica, m.capital_social, m.porte, {city_column}"
+                         f" FROM estabelecimentos e LEFT JOIN empresas m ON m.cnpj_basico = substr(e.cnpj, 1, 8)"
+                         f"{city_join} WHERE e.cnpj = ?")
+        self._cnae_descriptions = dict(self._conn.execute("SELECT codigo, descricao FROM cnaes")) \
+            if "cnaes" in tables else {}
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = open_sqlite(self.path, read_only=True)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def get(self, cnpj: str) -> dict | None:
+        """Retorna o estabelecimento no formato da API CNPJA, ou None se o CNPJ não estiver no índice."""
+        with self._lock:
+            row = self._conn.execute(self._get_sql, (cnpj,)).fetchone()
+        return to_cnpja_format(dict(row), self._cnae_descriptions) if row is not None else None
+
+    def list_cnpjs(self, cnae_prefix: str | None = None, situacao: int | None = None):
+        """Percorre os CNPJs do índice, filtrando pelo prefixo do CNAE principal e pela situação cadastral."""
+        conditions, params = [], []
+        digits = _cnae_digits(cnae_prefix)
+        if digits:
+            width = 7 - len(digits) # CNAE com 7 dígitos: o prefixo vira um intervalo no índice
+            conditions.append("cnae_principal BETWEEN ? AND ?")
+            params += [int(digits) * 10 ** width, (int(digits) + 1) * 10 ** width - 1]
+        if situacao is not None:
+            conditions.append("situacao = ?")
+            params.append(situacao)
+        sql = "SELECT cnpj FROM estabelecimentos"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        # Conexão própria: a listagem pode ter milhões de linhas e não deve bloquear get() enquanto é consumida
+        conn = self._connect()
+        try:
+            for (cnpj,) in conn.execute(sql, params):
+                yield cnpj
+        finally:
+            conn.close()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _activity(cnae_id: int, cnae_descriptions: dict) -> dict:
+    """Monta a atividade com a descrição de cnae_educacao.json ou da tabela de CNAEs da Receita."""
+    entry = get_config_registry().find_cnae(cnae_id)
+    text = entry.get("descricao") if entry else cnae_descriptions.get(cnae_id)
+    return {"id": cnae_id, "text": text} if text else {"id": cnae_id}
+
+
+def to_cnpja_format(record: dict, cnae_descriptions: dict | None = None) -> dict:
+    """
+    Converte um registro do índice para o formato retornado pela API CNPJA
+    (taxId, status, mainActivity, company, founded...). Os dumps de Estabelecimentos
+    e Empresas não trazem sócios nem inscrições estaduais: esses campos ficam fora do
+    registro e são listados em 'dados_indisponiveis', para não serem lidos como
+    "nenhum sócio" ou "nenhuma restrição".
+
+    Args:
+        record (dict): Linha do índice (estabelecimento, empresa e nome do município).
+        cnae_descriptions (dict | None): {código do CNAE: descrição} da tabela de CNAEs da Receita.
+    """
+    cnae_descriptions = cnae_descriptions or {}
+    side_activities = [_activity(int(code), cnae_descriptions)
+                       for code in (record["cnaes_secundarios"] or "").split(",") if code.strip().isdigit()]
+    size = record["porte"]
+    return {
+        "taxId": record["cnpj"],
+        "alias": record["nome_fantasia"],
+        "founded": record["data_inicio"],
+        "head": bool(record["matriz"]),
+        "status": {"id": record["situacao"], "text": SITUACOES.get(record["situacao"], "Desconhecida")},
+        "statusDate": record["data_situacao"],
+        "company": {
+            "name": record["razao_social"] or "N/A",
+            "equity": record["capital_social"],
+            "nature": {"id": record["natureza_juridica"], "text": record["natureza_juridica"]},
+            "size": {"id": size, "text": PORTES.get(size, "Não Informado")},
+        },
+        "address": {"state": record["uf"], "city": record.get("municipio_nome")},
+        "mainActivity": _activity(record["cnae_principal"], cnae_descriptions) if record["cnae_principal"] else {},
+        "sideActivities": side_activities,
+        "fonte": "receita_local",
+        "dados_indisponiveis": list(UNAVAILABLE_FIELDS),
+    }
+
+
+@lazy_singleton
+def get_receita_index() -> ReceitaIndex | None:
+    """
+    Retorna o índice compartilhado, aberto em RECEITA_INDEX_PATH (relativo à raiz do projeto),
+    ou None se o arquivo não existir.
+    """
+    path = os.path.join(PROJECT_ROOT, os.getenv("RECEITA_INDEX_PATH", DEFAULT_RECEITA_INDEX_PATH))
+    if not os.path.exists(path):
+        logging.error(f"Índice da Receita não encontrado em {path}. Execute indice_receita.py importar.")
+        return None
+    return ReceitaIndex(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Índice local dos dados abertos do CNPJ (Receita Federal).")
+    parser.add_argument("--indice", default=None, help="Caminho do índice (padrão: RECEITA_INDEX_PATH).")
+    commands = parser.add_subparsers(dest="comando", required=True)
+
+    import_parser = commands.add_parser("importar", help="Importa os arquivos de Estabelecimentos e Empresas.")
+    import_parser.add_argument("--estabelecimentos", nargs="+", required=True)
+    import_parser.add_argument("--empresas", nargs="+", required=True)
+    import_parser.add_argument("--municipios", nargs="+", help="Tabela de Municípios (nome da cidade).")
+    import_parser.add_argument("--cnaes", nargs="+", help="Tabela de CNAEs (descrição das atividades).")
+    import_parser.add_argument("--cnae-prefixo", help="Importa apenas CNAEs principais com este prefixo (ex.: 85).")
+
+    list_parser = commands.add_parser("listar", help="Lista os CNPJs do índice (CSV com a coluna 'cnpj').")
+    list_parser.add_argument("--cnae-prefixo")
+    list_parser.add_argument("--situacao", type=int, help="Situação cadastral (2 = Ativa).")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    index_path = os.path.join(PROJECT_ROOT, args.indice or os.getenv("RECEITA_INDEX_PATH", DEFAULT_RECEITA_INDEX_PATH))
+    if args.comando == "importar":
+        import_dumps(args.estabelecimentos, args.empresas, index_path, args.cnae_prefixo,
+                     args.municipios, args.cnaes)
+    else:
+        index = ReceitaIndex(index_path)
+        writer = csv.writer(sys.stdout)
+        writer.writerow(["cnpj"])
+        for cnpj in index.list_cnpjs(args.cnae_prefixo, args.situacao):
+            writer.writerow([cnpj])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+    Módulo Limitador de Taxa.
+
+    Fornece um token bucket thread-safe usado para respeitar o limite de
+    requisições da API CNPJA (plano gratuito: 3 requisições por minuto)
+    quando várias análises são executadas em paralelo.
+    """
+
+import os
+import threading
+import time
+
+DEFAULT_CNPJA_REQUESTS_PER_MINUTE = 3
+
+
+class TokenBucket:
+    """
+    Token bucket thread-safe.
+
+    Args:
+        rate (float): Tokens repostos por segundo. Valores <= 0 desativam o limite.
+        capacity (int): Quantidade máxima de tokens acumulados (rajada permitida).
+    """
+
+    def __init__(self, rate: float, capacity: int = 1):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self._last_refill
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._last_refill = now
+
+    def acquire(self, timeout: float | None = None) -> bool:
+        """
+        Bloqueia até que um token esteja disponível e o consome.
+
+        Args:
+            timeout (float | None): Tempo máximo de espera em segundos (None = sem limite).
+
+        Returns:
+            bool: True se o token foi obtido, False se o tempo limite expirou.
+        """
+        if self.rate <= 0:
+            return True
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+    def estimated_wait(self, queued: int = 0) -> float:
+        """
+        Estima em quantos segundos haverá um token disponível, sem consumi-lo.
+
+        Args:
+            queued (int): Requisições já aguardando à frente desta.
+
+        Returns:
+            float: Espera estimada em segundos (0 se houver token disponível agora).
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            self._refill(time.monotonic())
+            missing = queued + 1 - self._tokens
+        return max(0.0, missing / self.rate)
+
+
+def _rate_from_env() -> float:
+    requests_per_minute = float(os.getenv("CNPJA_RATE_LIMIT_PER_MINUTE", DEFAULT_CNPJA_REQUESTS_PER_MINUTE))
+    return requests_per_minute / 60.0
+
+
+_cnpja_bucket = None
+_cnpja_bucket_lock = threading.Lock()
+
+def get_cnpja_rate_limiter() -> TokenBucket:
+    """
+    Retorna o token bucket compartilhado da API CNPJA, criado na primeira chamada
+    a partir de CNPJA_RATE_LIMIT_PER_MINUTE (0 desativa o limite).
+    """
+    global _cnpja_bucket
+    with _cnpja_bucket_lock:
+        if _cnpja_bucket is None:
+            _cnpja_bucket = TokenBucket(_rate_from_env(), capacity=1)
+        return _cnpja_bucket
@@ -0,0 +1,179 @@
+"""
+    Módulo de Processamento em Lote.
+
+    Lê CNPJs de um arquivo CSV (ou da entrada padrão) e executa o pipeline de
+    análise de forma concorrente. As consultas à API CNPJA são serializadas pelo
+    limitador de taxa compartilhado, enquanto as chamadas ao Gemini de outros
+    CNPJs continuam em paralelo. Consultas com falha temporária na API CNPJA
+    voltam para a fila com espera (Retry-After ou backoff com jitter), sem
+    ocupar um worker enquanto aguardam. A entrada é lida aos poucos: no máximo
+    IN_FLIGHT_PER_WORKER CNPJs por worker ficam em andamento ou reagendados, de
+    modo que arquivos grandes não são carregados inteiros na memória. Cada
+    resultado é gravado como uma linha JSON.
+    """
+
+import csv
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from validador_cnpj import validate_cnpj
+from analise_cnpj import MAX_RETRIES, analyze_cnpj, cnpja_retry_delay
+from resiliencia import RetryScheduler, TransientCNPJAError
+from metricas import metrics
+from armazenamento_resultados import save_analysis
+
+DEFAULT_BATCH_WORKERS = 4
+IN_FLIGHT_PER_WORKER = 2 # CNPJs em andamento ou reagendados por worker; o restante da entrada ainda não foi lido
+
+
+def read_cnpjs(source: str):
+    """
+    Lê CNPJs de um arquivo CSV ou da entrada padrão ('-').
+
+    Se o CSV tiver uma coluna chamada 'cnpj', ela é usada; caso contrário,
+    usa-se a primeira coluna de cada linha. Linhas vazias são ignoradas.
+
+    Args:
+        source (str): Caminho do arquivo CSV ou '-' para ler da entrada padrão.
+
+    Yields:
+        str: O CNPJ bruto, como aparece na entrada.
+    """
+    stream = sys.stdin if source == '-' else open(source, 'r', encoding='utf-8-sig', newline='')
+    try:
+        reader = csv.reader(stream)
+        cnpj_column = 0
+        for line_number, row in enumerate(reader):
+            if not row or not row[0].strip():
+                continue
+            if line_number == 0:
+                header = [column.strip().lower() for column in row]
+                if 'cnpj' in header:
+                    cnpj_column = header.index('cnpj')
+                    continue
+            if cnpj_column < len(row):
+                yield row[cnpj_column].strip()
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def _analyze_row(raw_cnpj: str) -> dict:
+    """
+    Valida e analisa um CNPJ, retornando uma linha de saída. Falhas temporárias da
+    API CNPJA são levantadas (TransientCNPJAError) para que process_batch reagende o CNPJ.
+    """
+    valid_cnpj = validate_cnpj(raw_cnpj)
+    if not valid_cnpj:
+        return {"cnpj": raw_cnpj, "status": "invalido"}
+
+    started = time.perf_counter()
+    try:
+        analysis = analyze_cnpj(valid_cnpj, defer_retries=True)
+    except TransientCNPJAError:
+        raise
+    except Exception as e:
+        logging.error(f"ERRO inesperado ao analisar o CNPJ {valid_cnpj}: {e}")
+        analysis = None
+    elapsed = round(time.perf_counter() - started, 3)
+
+    if analysis is None:
+        return {"cnpj": valid_cnpj, "status": "erro", "tempo_segundos": elapsed}
+    save_analysis(analysis)
+    return {**analysis["resultado"], "status": "ok", "tempo_segundos": elapsed}
+
+
+def process_batch(cnpjs, output_path: str, max_workers: int | None = None, analyze_row=None) -> dict:
+    """
+    Analisa uma sequência de CNPJs de forma concorrente.
+
+    Args:
+        cnpjs (Iterable[str]): CNPJs brutos a serem analisados, consumidos à medida que há vaga.
+        output_path (str): Arquivo JSON Lines onde cada resultado é gravado, ou '-' para a saída padrão.
+        max_workers (int | None): Número de workers (padrão: BATCH_WORKERS ou 4).
+        analyze_row (Callable[[str], dict] | None): Função que processa um CNPJ bruto e retorna a linha
+            de saída com um campo 'status' (padrão: análise completa do pipeline). Se levantar
+            TransientCNPJAError, o CNPJ é reagendado até MAX_RETRIES tentativas.
+
+    Returns:
+        dict: Estatísticas do lote (total, sucessos, erros, inválidos, tempo e vazão).
+    """
+    if max_workers is None:
+        max_workers = int(os.getenv("BATCH_WORKERS", DEFAULT_BATCH_WORKERS))
+    analyze_row = analyze_row or _analyze_row
+
+    stats = {"total": 0, "ok": 0, "erro": 0, "invalido": 0}
+    write_lock = threading.Lock()
+    output = sys.stdout if output_path == '-' else open(output_path, 'a', encoding='utf-8')
+    started = time.perf_counter()
+
+    retries = RetryScheduler()
+    attempts = {}
+    window = max(1, max_workers) * IN_FLIGHT_PER_WORKER
+    remaining = iter(cnpjs)
+    batch_size = len(cnpjs) if hasattr(cnpjs, '__len__') else None
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = {}
+            while True:
+                for cnpj in retries.pop_due():
+                    pending[executor.submit(analyze_row, cnpj)] = cnpj
+                # Completa a janela com os próximos CNPJs; os reagendados também ocupam vaga
+                while remaining is not None and len(pending) + len(retries) < window:
+                    cnpj = next(remaining, None)
+                    if cnpj is None:
+                        remaining = None
+                    else:
+                        pending[executor.submit(analyze_row, cnpj)] = cnpj
+                if not pending:
+                    if not retries:
+                        break
+                    time.sleep(retries.next_delay()) # Apenas a thread principal espera pelo próximo reagendamento
+                    continue
+
+                done, _ = wait(pending, timeout=retries.next_delay(), return_when=FIRST_COMPLETED)
+                for future in done:
+                    cnpj = pending.pop(future)
+                    try:
+                        row = future.result()
+                    except TransientCNPJAError as e:
+                        attempt = attempts.get(cnpj, 0) + (1 if e.request_sent else 0)
+                        attempts[cnpj] = attempt
+                        if attempt < MAX_RETRIES:
+                            delay = cnpja_retry_delay(e, max(attempt - 1, 0))
+                            log = logging.warning if e.request_sent else logging.info
+                            log(f"Falha temporária para o CNPJ {cnpj} (tentativa {attempt}/{MAX_RETRIES}): {e} "
+                                f"- reagendado em {delay:.1f}s.")
+                            if e.request_sent:
+                                metrics.inc("retentativas_total", api="cnpja")
+                            retries.schedule(cnpj, delay)
+                            continue
+                        logging.error(f"Falha ao buscar dados para o CNPJ {cnpj} após {MAX_RETRIES} tentativas.")
+                        row = {"cnpj": validate_cnpj(cnpj) or cnpj, "status": "erro"}
+
+                    with write_lock:
+                        output.write(json.dumps(row, ensure_ascii=False) + "\n")
+                        output.flush()
+                        stats["total"] += 1
+                        stats[row["status"]] = stats.get(row["status"], 0) + 1
+                    progress = f"{stats['total']}/{batch_size}" if batch_size is not None else stats['total']
+                    logging.info(f"[{progress}] CNPJ {row['cnpj']}: {row['status']}")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    elapsed = time.perf_counter() - started
+    status_counts = ", ".join(f"{status}: {count}" for status, count in stats.items() if status != "total")
+    stats["tempo_total_segundos"] = round(elapsed, 3)
+    stats["cnpjs_por_minuto"] = round(stats["total"] / elapsed * 60, 2) if elapsed > 0 else 0.0
+    logging.info(
+        f"Lote concluído: {stats['total']} CNPJs em {stats['tempo_total_segundos']}s "
+        f"({stats['cnpjs_por_minuto']} CNPJs/min) - {status_counts}"
+    )
+    return stats
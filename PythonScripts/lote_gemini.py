@@ -0,0 +1,211 @@
+"""
+    Módulo de Agrupamento de Chamadas ao Gemini.
+
+    No modo lote, cada CNPJ paga o texto fixo do prompt do agente e uma ida e
+    volta ao Gemini. O GeminiBatcher reúne as chamadas simultâneas do mesmo
+    agente (feitas pelos workers do lote ou pelo serviço HTTP) em uma única
+    requisição: o prompt é enviado uma vez, os dados comuns a todas as
+    empresas (critérios de scoring, CNAEs aceitáveis...) aparecem uma só vez
+    em "contexto_comum", e a resposta pedida é um array JSON com um resultado
+    por empresa, identificado pelo CNPJ.
+
+    Se a resposta vier malformada ou sem alguma empresa, as empresas faltantes
+    são divididas ao meio e reenviadas; uma empresa isolada volta para a
+    chamada individual de sempre.
+
+    Configuração: LLM_BATCH_SIZE (empresas por requisição; 1 desativa) e
+    LLM_BATCH_WAIT_MS (espera máxima para completar um grupo).
+    """
+
+import json
+import logging
+import os
+import threading
+
+from metricas import metrics
+from projecao_contexto import compact_json
+
+DEFAULT_LLM_BATCH_SIZE = 1 # Desativado: uma chamada por CNPJ
+DEFAULT_LLM_BATCH_WAIT_MS = 200
+
+BATCH_INSTRUCTIONS = """
+
+ATENÇÃO: esta requisição contém {quantidade} empresas. No JSON acima, "contexto_comum" traz os dados
+compartilhados por todas elas e "empresas" traz os dados de cada uma, identificada pelo campo "cnpj".
+Analise cada empresa de forma independente, seguindo as instruções acima, e responda apenas com um
+array JSON contendo um objeto por empresa, no formato:
+[{{"cnpj": "<cnpj>", "resultado": <objeto JSON pedido acima para essa empresa>}}]"""
+
+
+def get_llm_batch_settings() -> tuple[int, float]:
+    """Retorna (empresas por requisição, espera máxima em segundos) de LLM_BATCH_SIZE e LLM_BATCH_WAIT_MS."""
+    batch_size = max(1, int(os.getenv("LLM_BATCH_SIZE", DEFAULT_LLM_BATCH_SIZE)))
+    wait_seconds = max(0.0, float(os.getenv("LLM_BATCH_WAIT_MS", DEFAULT_LLM_BATCH_WAIT_MS)) / 1000)
+    return batch_size, wait_seconds
+
+
+def split_shared_context(contexts: list[dict]) -> tuple[dict, list[dict]]:
+    """
+    Separa os campos iguais em todos os contextos (até o segundo nível) dos campos
+    próprios de cada empresa. Retorna (contexto_comum, contextos_individuais).
+    """
+    shared = {}
+    individual = [dict(context) for context in contexts]
+    for key, value in contexts[0].items():
+        values = [context.get(key) for context in contexts]
+        if all(key in context and item == value for context, item in zip(contexts, values)):
+            shared[key] = value
+            for context in individual:
+                del context[key]
+        elif all(isinstance(item, dict) for item in values):
+            common = {sub_key: sub_value for sub_key, sub_value in value.items()
+                      if all(sub_key in item and item[sub_key] == sub_value for item in values[1:])}
+            if common:
+                shared[key] = common
+                for context in individual:
+                    context[key] = {k: v for k, v in context[key].items() if k not in common}
+    return shared, individual
+
+
+def build_batch_content(prompt: str, cnpjs: list[str], contexts: list[dict]) -> str:
+    """Renderiza o prompt do agente uma única vez para um grupo de empresas."""
+    shared, individual = split_shared_context(contexts)
+    batch_data = {
+        "contexto_comum": shared,
+        "empresas": [{"cnpj": cnpj, **context} for cnpj, context in zip(cnpjs, individual)],
+    }
+    return prompt.replace('{response.json}', compact_json(batch_data)) + BATCH_INSTRUCTIONS.format(quantidade=len(cnpjs))
+
+
+def parse_batch_response(response_text: str | None, cnpjs: list[str]) -> dict:
+    """
+    Extrai o resultado de cada empresa da resposta agrupada. Retorna {cnpj: resultado}
+    apenas para os CNPJs pedidos cujo resultado é um objeto JSON; os demais ficam de fora.
+    """
+    if not response_text:
+        return {}
+    start = response_text.find('[')
+    end = response_text.rfind(']') + 1
+    if start == -1 or end <= start:
+        return {}
+    try:
+        entries = json.loads(response_text[start:end])
+    except json.JSONDecodeError:
+        return {}
+    if not isinstance(entries, list):
+        return {}
+
+    expected = set(cnpjs)
+    results = {}
+    for entry in entries:
+        if not isinstance(entry, dict) or not isinstance(entry.get("resultado"), dict):
+            continue
+        cnpj = "".join(filter(str.isdigit, str(entry.get("cnpj", ""))))
+        if cnpj in expected:
+            results[cnpj] = entry["resultado"]
+    return results
+
+
+class _BatchItem:
+    """Chamada de uma empresa aguardando o resultado do grupo."""
+
+    def __init__(self, cnpj: str, context: dict):
+        self.cnpj = cnpj
+        self.context = context
+        self.text = None
+        self.prompt_tokens = 0
+        self.response_tokens = 0
+        self.done = threading.Event()
+
+
+class GeminiBatcher:
+    """
+    Agrupa chamadas simultâneas ao Gemini do mesmo agente. A thread que completa o grupo
+    (ou cuja espera expira primeiro) envia a requisição e distribui os resultados.
+
+    Args:
+        send (Callable[[str], tuple[str | None, tuple[int, int]]]): Envia o conteúdo ao Gemini e
+            retorna o texto da resposta (None em caso de erro) e os tokens (prompt, resposta).
+        batch_size (int): Empresas por requisição.
+        wait_seconds (float): Espera máxima para completar um grupo.
+    """
+
+    def __init__(self, send, batch_size: int, wait_seconds: float):
+        self.send = send
+        self.batch_size = batch_size
+        self.wait_seconds = wait_seconds
+        self._pending = {} # (agente, prompt) -> chamadas aguardando o envio
+        self._lock = threading.Lock()
+
+    def submit(self, agent_name: str, prompt: str, cnpj: str, context: dict) -> tuple[str | None, int, int]:
+        """
+        Inclui a empresa no próximo grupo do agente e aguarda o resultado.
+
+        Returns:
+            tuple[str | None, int, int]: O JSON do resultado da empresa (None se ela deve ser
+            analisada por uma chamada individual) e a parcela de tokens (prompt, resposta)
+            das requisições agrupadas de que participou.
+        """
+        key = (agent_name, prompt)
+        item = _BatchItem(cnpj, context)
+        with self._lock:
+            group = self._pending.setdefault(key, [])
+            group.append(item)
+            items = self._pending.pop(key) if len(group) >= self.batch_size else None
+
+        if items is None and not item.done.wait(self.wait_seconds):
+            with self._lock:
+                group = self._pending.get(key)
+                if group is not None and any(pending is item for pending in group):
+                    items = self._pending.pop(key)
+
+        if items is not None:
+            try:
+                self._dispatch(agent_name, prompt, items)
+            finally:
+                for pending in items:
+                    pending.done.set()
+        item.done.wait()
+        return item.text, item.prompt_tokens, item.response_tokens
+
+    def _dispatch(self, agent_name: str, prompt: str, items: list[_BatchItem]):
+        if len(items) <= 1:
+            return # Uma empresa sozinha não compensa o cabeçalho do lote: vai para a chamada individual
+
+        cnpjs = [item.cnpj for item in items]
+        response_text, (prompt_tokens, response_tokens) = self.send(
+            build_batch_content(prompt, cnpjs, [item.context for item in items]))
+        results = parse_batch_response(response_text, cnpjs)
+        for item in items:
+            item.prompt_tokens += prompt_tokens // len(items)
+            item.response_tokens += response_tokens // len(items)
+            if item.cnpj in results:
+                item.text = compact_json(results[item.cnpj])
+
+        missing = [item for item in items if item.text is None]
+        metrics.inc("lotes_gemini_total", agente=agent_name, resultado="dividido" if missing else "ok")
+        metrics.inc("lotes_gemini_empresas_total", len(items) - len(missing), agente=agent_name)
+        if missing:
+            logging.warning(f"Resposta agrupada do Gemini ({agent_name}) sem resultado válido para "
+                            f"{len(missing)} de {len(items)} empresas. Reenviando em grupos menores.")
+            middle = len(missing) // 2
+            self._dispatch(agent_name, prompt, missing[:middle])
+            self._dispatch(agent_name, prompt, missing[middle:])
+
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+def get_gemini_batcher(send) -> GeminiBatcher | None:
+    """
+    Retorna o agrupador compartilhado, ou None se LLM_BATCH_SIZE for 1. O agrupador é
+    recriado quando LLM_BATCH_SIZE ou LLM_BATCH_WAIT_MS mudam.
+    """
+    global _batcher
+    batch_size, wait_seconds = get_llm_batch_settings()
+    if batch_size <= 1:
+        return None
+    with _batcher_lock:
+        if _batcher is None or (_batcher.batch_size, _batcher.wait_seconds) != (batch_size, wait_seconds):
+            _batcher = GeminiBatcher(send, batch_size, wait_seconds)
+        return _batcher
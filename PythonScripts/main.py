@@ -2,94 +2,160 @@ import logging
 import json
 import os
 import sys
-from dotenv import load_dotenv
+import argparse
 from validador_cnpj import validate_cnpj, format_cnpj
-from analise_cnpj import fetch_cnpj_data, analyze_business_criteria, analyze_scoring
+from metricas import configure_event_log, configure_logging, start_metrics_server, write_prometheus
+
+# O pipeline de análise (e os SDKs da API CNPJA e do Gemini) só é importado
+# quando necessário, para que 'validar' e 'formatar' iniciem instantaneamente.
 
 def process_cnpj(cnpj_valido: str):
     """Processa um único CNPJ válido."""
+    from analise_cnpj import analyze_cnpj
+    from armazenamento_resultados import save_analysis
+
     logging.info(f"O CNPJ {format_cnpj(cnpj_valido)} é válido.")
     
-    logging.info("Buscando dados na API...")
-    company_data = fetch_cnpj_data(cnpj_valido)
-
-    if not company_data:
-        logging.error("Não foi possível obter os dados da API para este CNPJ.")
-        return
+    logging.info("Buscando dados na API e executando os agentes...")
+    analysis = analyze_cnpj(cnpj_valido)
 
-    logging.info("Dados da empresa encontrados.")
-
-    # Análise de Negócio (CNAE)
-    logging.info("Analisando CNAE...")
-    business_result = analyze_business_criteria(company_data)
-
-    if not business_result:
-        logging.error("Não foi possível obter a análise de negócio da empresa.")
+    if not analysis:
+        logging.error("Não foi possível concluir a análise deste CNPJ.")
         return
 
-    # Verifica se houve desqualificação automática na análise de negócio
-    if business_result.get("classificacao") == "REPROVADO":
-        logging.info("Análise concluída com desqualificação automática.")
-        scoring_result = business_result  # Pula a etapa de scoring
-    else:
-        logging.info("Análise de negócio concluída.")
-        # Análise de Scoring
-        logging.info("Analisando Scoring...")
-        scoring_result = analyze_scoring(company_data, business_result)
-
-        if not scoring_result:
-            logging.error("Não foi possível obter o scoring da empresa.")
-            return
-        
-        logging.info("Análise de scoring concluída.")
+    output_data = analysis["resultado"]
+    save_analysis(analysis)
 
     # Saída Final
     print("\n=== ANÁLISE DE CNPJ ===")
     print(f"CNPJ: {format_cnpj(cnpj_valido)}")
-    print(f"Razão Social: {company_data.get('company', {}).get('name', 'N/A')}")
-    print(f"\n✅ RESULTADO: {scoring_result.get('classificacao', 'N/A')}")
-    print(f"📊 Score: {scoring_result.get('score', 'N/A')}/100")
+    print(f"Razão Social: {output_data['razao_social']}")
+    print(f"\n✅ RESULTADO: {output_data['classification']}")
+    print(f"📊 Score: {output_data['score']}/100")
 
     print("\nPontos Positivos:")
-    for point in scoring_result.get('pontos_positivos', []):
+    for point in output_data['criteria']['positives']:
         print(f"  ✓ {point}")
     
     print("\nPontos Negativos:")
-    for point in scoring_result.get('pontos_negativos', []):
+    for point in output_data['criteria']['negatives']:
         print(f"  ✗ {point}")
 
-    print(f"\nRecomendação: {scoring_result.get('recomendacao', 'N/A')}")
-
-    # Salvar resultado da análise em arquivo JSON
-    output_data = {
-        "cnpj": cnpj_valido,
-        "razao_social": company_data.get('company', {}).get('name', 'N/A'),
-        "classification": scoring_result.get('classificacao', 'N/A'),
-        "score": scoring_result.get('score', 'N/A'),
-        "criteria": {
-            "positives": scoring_result.get('pontos_positivos', []),
-            "negatives": scoring_result.get('pontos_negativos', []),
-        },
-        "recommendation": scoring_result.get('recomendacao', 'N/A')
-    }
+    print(f"\nRecomendação: {output_data['recommendation']}")
+
+    # Salvar o último resultado em resultado.json (escrita atômica; o histórico fica no armazenamento de resultados)
     output_path = os.path.join(os.path.dirname(__file__), 'resultado.json')
-    with open(output_path, 'w', encoding='utf-8') as f:
+    temporary_path = f"{output_path}.{os.getpid()}.tmp"
+    with open(temporary_path, 'w', encoding='utf-8') as f:
         json.dump(output_data, f, indent=2, ensure_ascii=False)
+    os.replace(temporary_path, output_path)
     logging.info("Resultado salvo em resultado.json")
 
+def read_cnpj_arguments(values: list[str]):
+    """Retorna os CNPJs informados na linha de comando, ou os lidos da entrada padrão (um por linha)."""
+    if values and values != ['-']:
+        return values
+    return (line.strip() for line in sys.stdin if line.strip())
+
+def run_validation_command(command: str, values: list[str]) -> int:
+    """
+    Executa os subcomandos 'validar' e 'formatar', que usam apenas o validador_cnpj
+    (sem .env, APIs ou carregamento do pipeline de análise).
+
+    Returns:
+        int: Código de saída (0 se todos os CNPJs forem válidos, 1 caso contrário).
+    """
+    exit_code = 0
+    for raw_cnpj in read_cnpj_arguments(values):
+        valid_cnpj = validate_cnpj(raw_cnpj)
+        if command == "validar":
+            print(f"{format_cnpj(valid_cnpj)}\tválido" if valid_cnpj else f"{raw_cnpj}\tinválido")
+        elif valid_cnpj:
+            print(format_cnpj(valid_cnpj))
+        else:
+            logging.error(f"O CNPJ '{raw_cnpj}' é inválido.")
+        if not valid_cnpj:
+            exit_code = 1
+    return exit_code
+
+def parse_args(argv=None):
+    """Interpreta os argumentos de linha de comando."""
+    parser = argparse.ArgumentParser(description="Validador e Analisador de CNPJ")
+    commands = parser.add_subparsers(dest="comando", metavar="{validar,formatar}")
+    for name, alias, description in (("validar", "validate", "Valida os CNPJs informados, sem consultar as APIs."),
+                                     ("formatar", "format", "Formata os CNPJs informados no padrão 00.000.000/0000-00.")):
+        command_parser = commands.add_parser(name, aliases=[alias], help=description, description=description)
+        command_parser.add_argument("cnpjs", nargs="*", metavar="CNPJ",
+                                    help="CNPJs a processar (sem argumentos ou '-': lê um por linha da entrada padrão).")
+        command_parser.set_defaults(comando=name)
+    parser.add_argument("--lote", metavar="ARQUIVO",
+                        help="Analisa em lote os CNPJs de um arquivo CSV ('-' para ler da entrada padrão).")
+    parser.add_argument("--carteira", metavar="ARQUIVO",
+                        help="Reavalia a carteira de CNPJs de um arquivo CSV, chamando os agentes apenas "
+                             "para as empresas cujos dados ou configuração mudaram desde a última análise.")
+    parser.add_argument("--saida", metavar="ARQUIVO", default="resultados_lote.jsonl",
+                        help="Arquivo JSON Lines com um resultado por linha ('-' para a saída padrão).")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Número de análises simultâneas no modo lote (padrão: BATCH_WORKERS ou 4).")
+    parser.add_argument("--modo", choices=("llm", "combinado", "local"), default=None,
+                        help="Modo do pipeline: 'llm' (dois agentes no Gemini), 'combinado' (uma única chamada ao Gemini) "
+                             "ou 'local' (score por regras, sem LLM). Padrão: PIPELINE_MODE ou 'llm'.")
+    parser.add_argument("--sem-cache-llm", action="store_true",
+                        help="Ignora as respostas memoizadas do Gemini e força novas chamadas.")
+    parser.add_argument("--metricas-arquivo", metavar="ARQUIVO", default=None,
+                        help="Grava as métricas no formato do Prometheus neste arquivo (padrão: METRICS_PROM_PATH).")
+    parser.add_argument("--metricas-porta", type=int, default=None,
+                        help="Expõe as métricas em http://127.0.0.1:<porta>/metrics (padrão: METRICS_PORT).")
+    return parser.parse_args(argv)
+
 def main():
     """Função principal que executa o programa."""
-    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    args = parse_args()
+    configure_logging(logging.INFO)
+    if args.comando:
+        sys.exit(run_validation_command(args.comando, args.cnpjs))
+
+    from dotenv import load_dotenv
+    from analise_cnpj import get_cnpj_data_source, get_pipeline_mode, recommendation_enabled
+    from lote_cnpj import read_cnpjs, process_batch
+    from clientes import close_clients
+    from monitoramento_carteira import refresh_cnpj
+
     current_script_dir = os.path.dirname(os.path.abspath(__file__))
     project_root = os.path.abspath(os.path.join(current_script_dir, '..'))
     dotenv_path = os.path.join(project_root, '.env')
     logging.info(f"Caminho do .env sendo procurado: {dotenv_path}")
     load_dotenv(dotenv_path)
-    logging.info(f"GEMINI_API_KEY carregada: {bool(os.getenv("GEMINI_API_KEY"))}")
-    logging.info(f"CNPJA_API_KEY carregada: {bool(os.getenv("CNPJA_API_KEY"))}")
-    if not os.getenv("GEMINI_API_KEY") or not os.getenv("CNPJA_API_KEY"):
+    if args.modo:
+        os.environ["PIPELINE_MODE"] = args.modo
+    if args.sem_cache_llm:
+        os.environ["LLM_CACHE_ENABLED"] = "false"
+
+    configure_event_log()
+    metrics_path = args.metricas_arquivo or os.getenv("METRICS_PROM_PATH")
+    metrics_port = args.metricas_porta or int(os.getenv("METRICS_PORT", 0))
+    if metrics_port:
+        start_metrics_server(metrics_port)
+
+    logging.info(f"GEMINI_API_KEY carregada: {bool(os.getenv('GEMINI_API_KEY'))}")
+    logging.info(f"CNPJA_API_KEY carregada: {bool(os.getenv('CNPJA_API_KEY'))}")
+    gemini_required = get_pipeline_mode() != "local" or recommendation_enabled()
+    cnpja_required = get_cnpj_data_source() != "local"
+    if (gemini_required and not os.getenv("GEMINI_API_KEY")) or (cnpja_required and not os.getenv("CNPJA_API_KEY")):
         logging.error("As chaves de API (GEMINI_API_KEY, CNPJA_API_KEY) não foram encontradas. Verifique se o arquivo .env existe e está configurado corretamente.")
         sys.exit(1)
+
+    if args.lote or args.carteira:
+        if args.carteira:
+            logging.info(f"--- Reavaliação da carteira: {args.carteira} -> {args.saida} ---")
+            process_batch(read_cnpjs(args.carteira), args.saida, args.workers, analyze_row=refresh_cnpj)
+        else:
+            logging.info(f"--- Análise em lote: {args.lote} -> {args.saida} ---")
+            process_batch(read_cnpjs(args.lote), args.saida, args.workers)
+        if metrics_path:
+            write_prometheus(metrics_path)
+        close_clients()
+        return
         
     logging.info("--- Validador e Analisador de CNPJ ---")
     logging.info("Digite um CNPJ para validar ou 'sair' para terminar.")
@@ -99,12 +165,15 @@ def main():
 
         if cnpj_input.lower() == 'sair':
             logging.info("Encerrando o programa.")
+            close_clients()
             break
 
         valid_cnpj = validate_cnpj(cnpj_input)
 
         if valid_cnpj:
             process_cnpj(valid_cnpj)
+            if metrics_path:
+                write_prometheus(metrics_path)
         else:
             logging.error(f"O CNPJ '{cnpj_input}' é inválido.")
         
@@ -0,0 +1,280 @@
+"""
+    Módulo de Métricas e Rastreabilidade.
+
+    Cada análise recebe um ID único (trace ID) propagado por contextvars. As
+    etapas do pipeline registram duração, retentativas, erros, tokens e custo
+    estimado, exportados como logs JSON estruturados e no formato texto do
+    Prometheus (arquivo ou endpoint HTTP), conforme a seção 12 do ARQUITETURA.md.
+    """
+
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+# Limites dos buckets dos histogramas, em segundos (e em USD para o custo)
+DURATION_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+COST_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1)
+
+# Preço padrão por 1.000 tokens (USD); ajuste conforme o modelo em LLM_MODEL
+DEFAULT_PRICE_INPUT_PER_1K_USD = 0.00125
+DEFAULT_PRICE_OUTPUT_PER_1K_USD = 0.005
+
+METRIC_HELP = {
+    "tempo_analise_segundos": "Duração total da análise por CNPJ.",
+    "etapa_duracao_segundos": "Duração de cada etapa do pipeline.",
+    "custo_analise_usd": "Custo estimado por análise, calculado a partir dos tokens usados.",
+    "erros_api_total": "Falhas por API externa (CNPJA, Gemini).",
+    "retentativas_total": "Retentativas de chamadas às APIs externas.",
+    "classificacao_final_total": "Resultados por classificação final.",
+    "tokens_total": "Tokens enviados (prompt) e recebidos (resposta) do LLM.",
+    "respostas_invalidas_total": "Respostas do LLM sem JSON válido.",
+    "cache_total": "Consultas aos caches locais por resultado (acerto/erro).",
+    "lotes_gemini_total": "Requisições agrupadas ao Gemini por resultado (ok/dividido).",
+    "lotes_gemini_empresas_total": "Empresas analisadas em requisições agrupadas ao Gemini.",
+}
+
+# Os eventos estruturados só são gravados quando configure_event_log indica um arquivo
+_events_logger = logging.getLogger("metricas")
+_events_logger.propagate = False
+_events_logger.addHandler(logging.NullHandler())
+_event_log_enabled = False
+
+
+class TraceContext:
+    """Estado de uma análise em andamento: trace ID e custo/tokens acumulados."""
+
+    def __init__(self, trace_id: str | None = None):
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.started = time.perf_counter()
+        self.prompt_tokens = 0
+        self.response_tokens = 0
+        self.cost_usd = 0.0
+
+
+_current_trace = contextvars.ContextVar("trace_atual", default=None)
+
+
+def current_trace_id() -> str | None:
+    """Retorna o trace ID da análise em andamento na thread atual, ou None."""
+    trace = _current_trace.get()
+    return trace.trace_id if trace else None
+
+
+class MetricsRegistry:
+    """Contadores e histogramas thread-safe, com rótulos no estilo Prometheus."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, buckets=DURATION_BUCKETS, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = {"buckets": buckets, "counts": [0] * len(buckets), "sum": 0.0, "count": 0}
+                self._histograms[key] = histogram
+            for index, limit in enumerate(buckets):
+                if value <= limit:
+                    histogram["counts"][index] += 1
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    def render_prometheus(self) -> str:
+        """Retorna as métricas no formato texto do Prometheus."""
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items(), key=lambda item: item[0])
+            described = set()
+            for (name, labels), value in counters:
+                if name not in described:
+                    described.add(name)
+                    lines.append(f"# HELP {name} {METRIC_HELP.get(name, name)}")
+                    lines.append(f"# TYPE {name} counter")
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+            for (name, labels), histogram in histograms:
+                if name not in described:
+                    described.add(name)
+                    lines.append(f"# HELP {name} {METRIC_HELP.get(name, name)}")
+                    lines.append(f"# TYPE {name} histogram")
+                for limit, count in zip(histogram["buckets"], histogram["counts"]):
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', str(limit)),))} {count}")
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {histogram['count']}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {round(histogram['sum'], 6)}")
+                lines.append(f"{name}_count{_format_labels(labels)} {histogram['count']}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape_label_value(value) -> str:
+    """Escapa o valor do rótulo conforme o formato texto do Prometheus (\\, \" e quebra de linha)."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label_value(value)}"' for key, value in labels) + "}"
+
+
+metrics = MetricsRegistry()
+
+
+def log_event(event: str, **fields):
+    """Emite um log JSON estruturado marcado com o trace ID da análise em andamento."""
+    if not _event_log_enabled:
+        return
+    record = {"evento": event, "trace_id": current_trace_id(), **fields}
+    _events_logger.info(json.dumps(record, ensure_ascii=False, default=str))
+
+
+@contextmanager
+def stage(name: str, **labels):
+    """
+    Mede a duração de uma etapa do pipeline (histograma etapa_duracao_segundos)
+    e emite um log estruturado ao final.
+    """
+    started = time.perf_counter()
+    status = "ok"
+    try:
+        yield
+    except Exception:
+        status = "erro"
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        metrics.observe("etapa_duracao_segundos", elapsed, etapa=name, **labels)
+        log_event("etapa", etapa=name, duracao_segundos=round(elapsed, 4), status=status, **labels)
+
+
+@contextmanager
+def analysis_trace(cnpj: str | None = None):
+    """
+    Abre o contexto de uma análise com um novo trace ID. Se já houver uma análise
+    em andamento na thread, reutiliza o mesmo contexto. Ao final da análise mais
+    externa, registra tempo_analise_segundos e custo_analise_usd.
+
+    Yields:
+        TraceContext: O contexto da análise.
+    """
+    trace = _current_trace.get()
+    if trace is not None:
+        yield trace
+        return
+
+    trace = TraceContext()
+    token = _current_trace.set(trace)
+    log_event("analise_iniciada", cnpj=cnpj)
+    try:
+        yield trace
+    finally:
+        elapsed = time.perf_counter() - trace.started
+        metrics.observe("tempo_analise_segundos", elapsed)
+        metrics.observe("custo_analise_usd", trace.cost_usd, buckets=COST_BUCKETS)
+        log_event("analise_finalizada", cnpj=cnpj, duracao_segundos=round(elapsed, 4),
+                  tokens_prompt=trace.prompt_tokens, tokens_resposta=trace.response_tokens,
+                  custo_usd=round(trace.cost_usd, 6))
+        _current_trace.reset(token)
+
+
+def estimate_cost_usd(prompt_tokens: int, response_tokens: int) -> float:
+    """Estima o custo de uma chamada a partir de LLM_PRICE_INPUT_PER_1K_USD e LLM_PRICE_OUTPUT_PER_1K_USD."""
+    input_price = float(os.getenv("LLM_PRICE_INPUT_PER_1K_USD", DEFAULT_PRICE_INPUT_PER_1K_USD))
+    output_price = float(os.getenv("LLM_PRICE_OUTPUT_PER_1K_USD", DEFAULT_PRICE_OUTPUT_PER_1K_USD))
+    return prompt_tokens / 1000 * input_price + response_tokens / 1000 * output_price
+
+
+def record_llm_usage(agent: str, prompt_tokens: int, response_tokens: int):
+    """Registra os tokens e o custo estimado de uma chamada ao LLM na análise em andamento."""
+    cost = estimate_cost_usd(prompt_tokens, response_tokens)
+    metrics.inc("tokens_total", prompt_tokens, tipo="prompt", agente=agent)
+    metrics.inc("tokens_total", response_tokens, tipo="resposta", agente=agent)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.prompt_tokens += prompt_tokens
+        trace.response_tokens += response_tokens
+        trace.cost_usd += cost
+    log_event("uso_llm", agente=agent, tokens_prompt=prompt_tokens, tokens_resposta=response_tokens,
+              custo_usd=round(cost, 6))
+
+
+def record_classification(classification: str):
+    """Incrementa classificacao_final_total para o resultado de uma análise."""
+    metrics.inc("classificacao_final_total", classificacao=classification)
+    log_event("classificacao_final", classificacao=classification)
+
+
+def write_prometheus(path: str):
+    """Grava as métricas no formato texto do Prometheus (escrita atômica)."""
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, 'w', encoding='utf-8') as f:
+        f.write(metrics.render_prometheus())
+    os.replace(temporary_path, path)
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1"):
+    """Expõe as métricas em http://<host>:<port>/metrics, em uma thread em segundo plano."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer # Só necessário quando o servidor é ativado
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip('/') != '/metrics':
+                self.send_error(404)
+                return
+            payload = metrics.render_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logging.info(f"Métricas disponíveis em http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+
+class TraceIdFilter(logging.Filter):
+    """Acrescenta o atributo trace_id aos registros de log."""
+
+    def filter(self, record):
+        record.trace_id = current_trace_id() or "-"
+        return True
+
+
+def configure_logging(level=logging.INFO):
+    """Configura o logging do terminal com o trace ID da análise em cada linha."""
+    logging.basicConfig(level=level, format='%(asctime)s - %(levelname)s - [%(trace_id)s] %(message)s')
+    for handler in logging.getLogger().handlers:
+        handler.addFilter(TraceIdFilter())
+
+
+def configure_event_log(path: str | None = None):
+    """
+    Direciona os eventos estruturados (logger 'metricas') para um arquivo JSON Lines
+    (path ou METRICS_LOG_PATH). Sem arquivo, os eventos ficam fora do log do terminal.
+    """
+    global _event_log_enabled
+    path = path or os.getenv("METRICS_LOG_PATH")
+    if not path:
+        return
+    file_handler = logging.FileHandler(path, encoding='utf-8')
+    file_handler.setFormatter(logging.Formatter('%(message)s'))
+    _events_logger.setLevel(logging.INFO)
+    _events_logger.addHandler(file_handler)
+    _event_log_enabled = True
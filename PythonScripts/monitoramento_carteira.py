@@ -0,0 +1,188 @@
+"""
+    Módulo de Monitoramento da Carteira.
+
+    Reavalia periodicamente os CNPJs parceiros sem repetir chamadas ao LLM para
+    empresas que não mudaram. Cada CNPJ é consultado na API CNPJA (sem cache),
+    os campos usados pelos agentes são normalizados e resumidos em um hash, e o
+    hash é comparado com o último snapshot gravado. Os agentes só rodam de novo
+    quando os dados, a versão dos arquivos de config/ que o modo do pipeline lê
+    ou o próprio modo mudam; nos demais casos o resultado anterior é reaproveitado.
+
+    Uso:
+        python PythonScripts/main.py --carteira parceiros.csv --saida carteira.jsonl
+    """
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import date, datetime, timezone
+
+from validador_cnpj import validate_cnpj
+from analise_cnpj import analyze_company_data, config_files_for_mode, fetch_cnpj_data, get_pipeline_mode
+from armazenamento_resultados import PROJECT_ROOT, save_analysis
+from cache_sqlite import lazy_singleton, open_sqlite
+from configuracao import get_config_registry
+from metricas import analysis_trace, metrics
+from projecao_contexto import BUSINESS_FIELDS, compact_json, project
+
+DEFAULT_WATCHLIST_DB_PATH = os.path.join(PROJECT_ROOT, 'dados', 'carteira.sqlite3')
+
+
+def normalize_company_data(company_data: dict) -> dict:
+    """
+    Retorna apenas os campos que os agentes recebem (situação, CNAEs, capital,
+    sócios, inscrições etc.), com listas em ordem canônica e textos sem espaços
+    nas pontas, para que a mesma empresa gere sempre o mesmo snapshot.
+    """
+    snapshot = _canonical(project(company_data, BUSINESS_FIELDS))
+    founded = company_data.get("founded")
+    if founded:
+        # O tempo de atividade entra no scoring: a virada de ano também dispara a reanálise
+        try:
+            snapshot["anos_atividade"] = _years_since(date.fromisoformat(founded[:10]))
+        except ValueError:
+            pass
+    return snapshot
+
+
+def _canonical(value):
+    if isinstance(value, dict):
+        return {key: _canonical(item) for key, item in value.items() if item is not None}
+    if isinstance(value, list):
+        return sorted((_canonical(item) for item in value), key=lambda item: compact_json(item))
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def _years_since(start: date) -> int:
+    today = date.today()
+    return today.year - start.year - ((today.month, today.day) < (start.month, start.day))
+
+
+def snapshot_hash(company_data: dict) -> str:
+    """Retorna o hash (sha256) dos campos normalizados da empresa."""
+    payload = json.dumps(normalize_company_data(company_data), sort_keys=True, ensure_ascii=False,
+                         separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class SnapshotStore:
+    """
+    Último snapshot de cada CNPJ da carteira em SQLite (modo WAL): hash dos dados,
+    versão da configuração e modo usados na última análise e o resultado obtido.
+
+    Args:
+        path (str): Caminho do arquivo SQLite.
+    """
+
+    def __init__(self, path: str = DEFAULT_WATCHLIST_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = open_sqlite(path)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS snapshots ("
+            " cnpj TEXT PRIMARY KEY,"
+            " hash_dados TEXT NOT NULL,"
+            " versao_config TEXT,"
+            " modo TEXT,"
+            " analisado_em TEXT NOT NULL,"
+            " verificado_em TEXT NOT NULL,"
+            " resultado TEXT NOT NULL)"
+        )
+
+    def get(self, cnpj: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM snapshots WHERE cnpj = ?", (cnpj,)).fetchone()
+        if row is None:
+            return None
+        snapshot = dict(row)
+        snapshot["resultado"] = json.loads(snapshot["resultado"])
+        return snapshot
+
+    def save(self, cnpj: str, data_hash: str, config_version: str, mode: str, result: dict):
+        """Grava o snapshot de uma análise nova, substituindo o anterior."""
+        now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO snapshots (cnpj, hash_dados, versao_config, modo, analisado_em,"
+                " verificado_em, resultado) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (cnpj, data_hash, config_version, mode, now, now, json.dumps(result, ensure_ascii=False)),
+            )
+
+    def touch(self, cnpj: str):
+        """Registra que o CNPJ foi verificado sem mudanças."""
+        now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        with self._lock:
+            self._conn.execute("UPDATE snapshots SET verificado_em = ? WHERE cnpj = ?", (now, cnpj))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+@lazy_singleton
+def get_snapshot_store() -> SnapshotStore:
+    """Retorna o armazenamento de snapshots compartilhado, em WATCHLIST_DB_PATH (relativo à raiz do projeto)."""
+    return SnapshotStore(os.path.join(PROJECT_ROOT, os.getenv("WATCHLIST_DB_PATH", DEFAULT_WATCHLIST_DB_PATH)))
+
+
+def _change_reason(previous: dict | None, data_hash: str, config_version: str, mode: str) -> str | None:
+    """Retorna o motivo da reanálise ('novo', 'dados', 'configuracao', 'modo'), ou None se nada mudou."""
+    if previous is None:
+        return "novo"
+    if previous["hash_dados"] != data_hash:
+        return "dados"
+    if previous["versao_config"] != config_version:
+        return "configuracao"
+    if previous["modo"] != mode:
+        return "modo"
+    return None
+
+
+def refresh_cnpj(raw_cnpj: str) -> dict:
+    """
+    Verifica um CNPJ da carteira e o reanalisa apenas se algo mudou desde o último snapshot.
+    Retorna uma linha de saída com 'status': 'inalterado', 'reanalisado', 'erro' ou 'invalido'.
+    Falhas temporárias da API CNPJA são levantadas para que process_batch reagende o CNPJ.
+    """
+    cnpj = validate_cnpj(raw_cnpj)
+    if not cnpj:
+        return {"cnpj": raw_cnpj, "status": "invalido"}
+
+    with analysis_trace(cnpj):
+        company_data = fetch_cnpj_data(cnpj, use_cache=False, defer_retries=True) # Dados atuais, não os do cache
+        if not company_data:
+            logging.error(f"Não foi possível obter os dados da API para o CNPJ {cnpj}.")
+            return {"cnpj": cnpj, "status": "erro"}
+
+        store = get_snapshot_store()
+        data_hash = snapshot_hash(company_data)
+        mode = get_pipeline_mode()
+        config_version = get_config_registry().version(config_files_for_mode(mode)) # Só os arquivos que o modo lê
+        previous = store.get(cnpj)
+
+        reason = _change_reason(previous, data_hash, config_version, mode)
+        if reason is None:
+            store.touch(cnpj)
+            metrics.inc("carteira_verificacoes_total", resultado="inalterado")
+            logging.info(f"CNPJ {cnpj} sem mudanças desde {previous['analisado_em']}. Reanálise dispensada.")
+            return {**previous["resultado"], "status": "inalterado", "analisado_em": previous["analisado_em"]}
+
+        logging.info(f"CNPJ {cnpj}: reanálise necessária (motivo: {reason}).")
+        try:
+            analysis = analyze_company_data(cnpj, company_data, mode)
+        except Exception as e:
+            logging.error(f"ERRO inesperado ao analisar o CNPJ {cnpj}: {e}")
+            analysis = None
+        if analysis is None:
+            return {"cnpj": cnpj, "status": "erro", "motivo": reason}
+
+        save_analysis(analysis)
+        store.save(cnpj, data_hash, config_version, mode, analysis["resultado"])
+        metrics.inc("carteira_verificacoes_total", resultado="reanalisado", motivo=reason)
+        return {**analysis["resultado"], "status": "reanalisado", "motivo": reason}
@@ -0,0 +1,160 @@
+"""
+    Módulo Motor de Scoring.
+
+    Calcula de forma determinística o score (0-100) e a classificação
+    (APROVADO/ATENÇÃO/REPROVADO) de uma empresa a partir do payload da API CNPJA
+    e dos critérios definidos em config/criterios_scoring.json.
+    """
+
+import logging
+from datetime import date
+
+from configuracao import get_config_registry
+
+SCORING_CRITERIA_FILE = 'criterios_scoring.json'
+
+
+def load_scoring_config() -> dict | None:
+    """
+    Retorna a configuração de scoring (critérios, faixas de classificação e recomendações).
+    """
+    return get_config_registry().get_json(SCORING_CRITERIA_FILE)
+
+
+def _points_for_range(value: float, faixas: list) -> int:
+    """
+    Retorna os pontos da faixa de maior limite_inferior que não excede o valor. As faixas
+    são contíguas (cada uma vai até o limite inferior da seguinte), então valores
+    fracionários como 99999.5 não ficam fora de todas elas.
+    """
+    for faixa in sorted(faixas, key=lambda item: item.get("limite_inferior", float("-inf")), reverse=True):
+        if value >= faixa.get("limite_inferior", float("-inf")):
+            return faixa["pontos"]
+    return 0
+
+
+def _years_since(founded: str | None, reference_date: date) -> float | None:
+    if not founded:
+        return None
+    try:
+        founded_date = date.fromisoformat(founded[:10])
+    except ValueError:
+        return None
+    return (reference_date - founded_date).days / 365.25
+
+
+def _format_currency(value: float) -> str:
+    return f"R$ {value:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def classify(score: int, scoring_config: dict) -> str:
+    """
+    Retorna a classificação correspondente ao score (APROVADO >= 70, ATENÇÃO >= 40, REPROVADO).
+    """
+    for faixa in sorted(scoring_config["classificacao"], key=lambda item: item["score_minimo"], reverse=True):
+        if score >= faixa["score_minimo"]:
+            return faixa["classificacao"]
+    return "REPROVADO"
+
+
+def compute_score(company_data: dict, scoring_config: dict | None = None,
+                  reference_date: date | None = None) -> dict | None:
+    """
+    Calcula o score e a classificação da empresa sem chamar o LLM.
+
+    Args:
+        company_data (dict): O payload retornado pela API CNPJA.
+        scoring_config (dict | None): Configuração de scoring (padrão: config/criterios_scoring.json).
+        reference_date (date | None): Data usada no cálculo do tempo de atividade (padrão: hoje).
+
+    Returns:
+        dict | None: Dicionário no mesmo formato do agente de scoring (score, classificacao,
+        pontos_positivos, pontos_negativos, recomendacao) acrescido de 'pontuacao_por_criterio' e
+        'criterios_indisponiveis' (critérios não pontuados porque a fonte dos dados não traz os
+        campos listados em 'dados_indisponiveis'), ou None se a configuração não puder ser carregada.
+    """
+    if scoring_config is None:
+        scoring_config = load_scoring_config()
+        if scoring_config is None:
+            logging.error(f"Configuração de scoring ({SCORING_CRITERIA_FILE}) indisponível.")
+            return None
+    criterios = scoring_config["criterios"]
+    reference_date = reference_date or date.today()
+
+    points = {}
+    positives = []
+    negatives = []
+    unavailable_fields = company_data.get("dados_indisponiveis") or []
+    unavailable_criteria = []
+
+    # Situação cadastral
+    criterio = criterios["situacao"]
+    status_text = (company_data.get("status") or {}).get("text", "") or ""
+    if status_text.upper() in criterio["valores_positivos"]:
+        points["situacao"] = criterio["peso"]
+        positives.append(f"Situação cadastral {status_text}.")
+    else:
+        points["situacao"] = 0
+        negatives.append(f"Situação cadastral {status_text or 'não informada'}.")
+
+    # CNAE principal
+    criterio = criterios["cnae"]
+    main_activity = company_data.get("mainActivity") or {}
+    cnae_id = str(main_activity.get("id", ""))
+    cnae_text = main_activity.get("text", "N/A")
+    if cnae_id.startswith(criterio["prefixo"]):
+        points["cnae"] = criterio["peso"]
+        positives.append(f"CNAE principal {cnae_id} ({cnae_text}) pertence ao setor de educação.")
+    else:
+        points["cnae"] = 0
+        negatives.append(f"CNAE principal {cnae_id or 'não informado'} ({cnae_text}) fora do setor de educação.")
+
+    # Capital social
+    criterio = criterios["capital_social"]
+    equity = (company_data.get("company") or {}).get("equity")
+    if equity is None:
+        points["capital_social"] = 0
+        negatives.append("Capital social não informado.")
+    else:
+        points["capital_social"] = _points_for_range(float(equity), criterio["faixas"])
+        message = f"Capital social de {_format_currency(float(equity))} ({points['capital_social']}/{criterio['peso']} pontos)."
+        (positives if points["capital_social"] > 0 else negatives).append(message)
+
+    # Tempo de atividade
+    criterio = criterios["tempo_atividade"]
+    years = _years_since(company_data.get("founded"), reference_date)
+    if years is not None and years >= criterio["anos_minimos"]:
+        points["tempo_atividade"] = criterio["peso"]
+        positives.append(f"Empresa ativa há {int(years)} anos.")
+    else:
+        points["tempo_atividade"] = 0
+        negatives.append("Tempo de atividade não informado." if years is None
+                         else f"Empresa com menos de {criterio['anos_minimos']} anos de atividade.")
+
+    # Restrições: inscrições estaduais não habilitadas
+    criterio = criterios["restricoes"]
+    if "registrations" in unavailable_fields:
+        # Fonte sem inscrições estaduais (ex.: índice da Receita): o critério não é pontuado
+        points["restricoes"] = 0
+        unavailable_criteria.append("restricoes")
+        negatives.append("Restrições cadastrais não verificadas: a fonte dos dados não traz as inscrições estaduais.")
+    else:
+        registrations = company_data.get("registrations") or []
+        restrictions = sum(1 for registration in registrations if registration.get("enabled") is False)
+        points["restricoes"] = _points_for_range(restrictions, criterio["faixas"])
+        if restrictions == 0:
+            positives.append("Sem restrições cadastrais.")
+        else:
+            negatives.append(f"{restrictions} inscrição(ões) estadual(is) não habilitada(s).")
+
+    score = int(sum(points.values()))
+    classification = classify(score, scoring_config)
+    return {
+        "score": score,
+        "classificacao": classification,
+        "pontos_positivos": positives,
+        "pontos_negativos": negatives,
+        "recomendacao": scoring_config.get("recomendacoes", {}).get(classification, "N/A"),
+        "pontuacao_por_criterio": points,
+        "criterios_indisponiveis": unavailable_criteria,
+    }
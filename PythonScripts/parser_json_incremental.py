@@ -0,0 +1,87 @@
+"""
+    Módulo de Parser JSON Incremental.
+
+    Processa a resposta do Gemini à medida que os trechos chegam (streaming) e
+    emite cada item de texto das listas observadas (ex.: 'pontos_positivos')
+    assim que ele é concluído, sem esperar o JSON completo.
+    """
+
+import json
+
+
+class IncrementalJSONListParser:
+    """
+    Parser incremental que emite os itens de listas de strings de um objeto JSON.
+
+    Texto anterior ao primeiro '{' (ex.: cercas ```json) é ignorado.
+
+    Args:
+        keys (Iterable[str]): Nomes das listas observadas (em qualquer nível do objeto).
+        on_item (Callable[[str, str], None]): Chamado com (chave, item) a cada item concluído.
+    """
+
+    def __init__(self, keys, on_item):
+        self.keys = frozenset(keys)
+        self.on_item = on_item
+        self._started = False
+        self._in_string = False
+        self._escape = False
+        self._buffer = []
+        self._stack = []  # Pilha de (tipo do contêiner, chave que o contém)
+        self._candidate_key = None
+        self._current_key = None
+
+    def feed(self, text: str):
+        """Processa mais um trecho da resposta."""
+        for char in text:
+            if not self._started:
+                if char != '{':
+                    continue
+                self._started = True
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    self._buffer.append(char)
+                elif char == '\\':
+                    self._escape = True
+                    self._buffer.append(char)
+                elif char == '"':
+                    self._in_string = False
+                    self._finish_string()
+                else:
+                    self._buffer.append(char)
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._buffer = []
+            elif char == ':':
+                self._current_key = self._candidate_key
+                self._candidate_key = None
+            elif char in '{[':
+                self._stack.append(('objeto' if char == '{' else 'lista', self._current_key))
+                self._current_key = None
+            elif char in '}]':
+                if self._stack:
+                    self._stack.pop()
+                self._current_key = None
+            elif char == ',':
+                if self._stack and self._stack[-1][0] == 'objeto':
+                    self._current_key = None
+
+    def _finish_string(self):
+        raw = "".join(self._buffer)
+        if not self._stack:
+            return
+        container, container_key = self._stack[-1]
+        if container == 'objeto':
+            if self._current_key is None:
+                self._candidate_key = raw  # String em posição de chave
+            return
+        if container_key in self.keys:
+            try:
+                item = json.loads(f'"{raw}"')
+            except json.JSONDecodeError:
+                item = raw
+            self.on_item(container_key, item)
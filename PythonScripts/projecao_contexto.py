@@ -0,0 +1,162 @@
+"""
+    Módulo de Projeção de Contexto.
+
+    Seleciona apenas os campos do payload da API CNPJA usados por cada agente,
+    serializa o contexto em JSON compacto e corta listas longas até que o
+    contexto caiba no orçamento de tokens (LLM_MAX_TOKENS).
+    """
+
+import json
+import logging
+import os
+
+DEFAULT_CONTEXT_TOKEN_BUDGET = 2000
+CHARS_PER_TOKEN = 4  # Aproximação usual para estimar tokens sem o tokenizador
+
+# Campos do payload CNPJA usados por cada agente (True = mantém o valor inteiro)
+BUSINESS_FIELDS = {
+    "taxId": True,
+    "alias": True,
+    "founded": True,
+    "head": True,
+    "status": {"text": True},
+    "statusDate": True,
+    "company": {
+        "name": True,
+        "equity": True,
+        "nature": {"text": True},
+        "size": {"text": True},
+        "members": {"since": True, "role": {"text": True}, "person": {"name": True}},
+    },
+    "address": {"city": True, "state": True},
+    "mainActivity": True,
+    "sideActivities": True,
+    "registrations": {"state": True, "enabled": True, "status": {"text": True}},
+    "dados_indisponiveis": True,
+}
+
+SCORING_FIELDS = {
+    "founded": True,
+    "status": {"text": True},
+    "company": {"name": True, "equity": True},
+    "mainActivity": True,
+    "registrations": {"state": True, "enabled": True},
+    "dados_indisponiveis": True,
+}
+
+# Listas que podem ser encurtadas para respeitar o orçamento, em ordem de prioridade
+TRIMMABLE_LISTS = (
+    ("dados_empresa", "company", "members"),
+    ("dados_empresa", "sideActivities"),
+    ("dados_empresa", "registrations"),
+    ("analise_negocio", "pontos_atencao"),
+    ("analise_negocio", "pontos_fracos"),
+    ("analise_negocio", "pontos_fortes"),
+)
+
+
+def compact_json(data) -> str:
+    """Serializa em JSON sem espaços desnecessários."""
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+def estimate_tokens(text: str) -> int:
+    """Estima o número de tokens de um texto (~4 caracteres por token)."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def get_token_budget() -> int:
+    """Retorna o orçamento de tokens do contexto (LLM_MAX_TOKENS, padrão: 2000; <= 0 desativa)."""
+    return int(os.getenv("LLM_MAX_TOKENS", DEFAULT_CONTEXT_TOKEN_BUDGET))
+
+
+def project(data, fields):
+    """
+    Retorna uma cópia de data contendo apenas os campos descritos em fields.
+    Listas são projetadas item a item.
+    """
+    if fields is True or data is None:
+        return data
+    if isinstance(data, list):
+        return [project(item, fields) for item in data]
+    if not isinstance(data, dict):
+        return data
+    return {key: project(data[key], sub_fields) for key, sub_fields in fields.items() if key in data}
+
+
+def enforce_token_budget(context: dict, budget: int | None = None) -> dict:
+    """
+    Encurta as listas de TRIMMABLE_LISTS (sempre a maior primeiro, pela metade) até que
+    o contexto caiba no orçamento. Os itens removidos são contados em '_omitidos', que
+    também entra na conta do orçamento.
+    """
+    budget = get_token_budget() if budget is None else budget
+    if budget <= 0:
+        return context
+
+    omitted = {}
+    while estimate_tokens(compact_json(context)) > budget:
+        candidates = []
+        for path in TRIMMABLE_LISTS:
+            parent = context
+            for key in path[:-1]:
+                parent = parent.get(key) if isinstance(parent, dict) else None
+            values = parent.get(path[-1]) if isinstance(parent, dict) else None
+            if isinstance(values, list) and values:
+                candidates.append((len(values), path, parent))
+        if not candidates:
+            logging.warning(f"Contexto excede o orçamento de {budget} tokens mesmo após cortar as listas.")
+            break
+        size, path, parent = max(candidates, key=lambda candidate: candidate[0])
+        keep = size // 2
+        parent[path[-1]] = parent[path[-1]][:keep]
+        omitted[".".join(path)] = omitted.get(".".join(path), 0) + size - keep
+        context["_omitidos"] = omitted # O resumo dos cortes também ocupa tokens do orçamento
+    return context
+
+
+def log_tokens_saved(agent_name: str, original_context: dict, projected_context: dict):
+    """Registra quantos tokens a projeção economizou em relação ao contexto completo e formatado."""
+    original_tokens = estimate_tokens(json.dumps(original_context, indent=2, ensure_ascii=False))
+    projected_tokens = estimate_tokens(compact_json(projected_context))
+    logging.info(
+        f"Contexto do agente de {agent_name}: ~{projected_tokens} tokens "
+        f"(economia de ~{original_tokens - projected_tokens} tokens em relação ao payload completo)."
+    )
+
+
+def build_business_context(company_data: dict, cnae_entry: dict | None, cnae_education_data: dict) -> dict:
+    """
+    Monta o contexto do agente de Negócio: campos relevantes da empresa e apenas
+    a entrada da tabela de CNAEs correspondente ao CNAE principal.
+    """
+    cnae_context = {
+        "cnae_correspondente": cnae_entry,
+        "prefixo_educacao": cnae_education_data.get("validacao", {}).get("prefixo_educacao", "85"),
+        "cnaes_secundarios_aceitaveis": cnae_education_data.get("cnaes_secundarios_aceitaveis", []),
+    }
+    context = {
+        "dados_empresa": project(company_data, BUSINESS_FIELDS),
+        "cnae_educacao": cnae_context,
+    }
+    enforced = enforce_token_budget(context)
+    log_tokens_saved("negócio", {"dados_empresa": company_data, "cnae_educacao": cnae_education_data}, enforced)
+    return enforced
+
+
+def build_scoring_context(company_data: dict, business_analysis: dict, scoring_criteria: dict) -> dict:
+    """
+    Monta o contexto do agente de Scoring: campos usados pelos critérios e a análise de negócio.
+    """
+    context = {
+        "dados_empresa": project(company_data, SCORING_FIELDS),
+        "analise_negocio": dict(business_analysis),
+        "criterios_scoring": scoring_criteria,
+    }
+    enforced = enforce_token_budget(context)
+    log_tokens_saved("scoring", {
+        "dados_empresa": company_data,
+        "analise_negocio": business_analysis,
+        "criterios_scoring": scoring_criteria,
+    }, enforced)
+    return enforced
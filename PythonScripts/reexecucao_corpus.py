@@ -0,0 +1,242 @@
+"""
+    Módulo de Reexecução do Corpus.
+
+    Reexecuta as regras de desqualificação e os agentes sobre as respostas da
+    API CNPJA gravadas no corpus (corpus_cnpja.py), em paralelo e sem consultar
+    a API, e compara a classificação e o score de cada CNPJ com a execução
+    anterior. Serve para medir o efeito de mudanças em agente_negocio_cnpj.txt,
+    agente_scoring_cnpj.txt ou cnae_educacao.json sobre um conjunto de
+    referência. Os resultados não entram no histórico de análises.
+
+    Uso:
+        python PythonScripts/reexecucao_corpus.py importar-historico
+        python PythonScripts/reexecucao_corpus.py executar --workers 8 --descricao "novo prompt de scoring"
+        python PythonScripts/reexecucao_corpus.py execucoes
+        python PythonScripts/reexecucao_corpus.py comparar 3 5 --saida diferencas.json
+    """
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+from analise_cnpj import PIPELINE_MODES, analyze_company_data, get_pipeline_mode
+from armazenamento_resultados import get_result_store
+from configuracao import get_config_registry
+from corpus_cnpja import get_corpus_store
+from lote_cnpj import DEFAULT_BATCH_WORKERS, read_cnpjs
+from metricas import analysis_trace, configure_logging
+from validador_cnpj import validate_cnpj
+
+PROGRESS_LOG_INTERVAL = 50 # CNPJs entre as mensagens de progresso
+
+
+def import_history() -> int:
+    """
+    Copia para o corpus os payloads da API CNPJA já guardados no histórico de análises
+    (dados/resultados.sqlite3), mantendo o mais recente de cada CNPJ.
+
+    Returns:
+        int: Quantidade de payloads lidos do histórico.
+    """
+    corpus = get_corpus_store()
+    imported = 0
+    for analysis in get_result_store().query(include_payload=True):
+        if analysis.get("dados_empresa"):
+            corpus.record(analysis["cnpj"], analysis["dados_empresa"], analysis["criado_em"])
+            imported += 1
+    return imported
+
+
+def replay_corpus(cnpjs: list[str] | None = None, mode: str | None = None, max_workers: int | None = None,
+                  description: str | None = None) -> int:
+    """
+    Reexecuta as regras e os agentes sobre o corpus (ou apenas sobre os CNPJs informados)
+    e grava os resultados em uma nova execução.
+
+    Returns:
+        int: O id da execução.
+    """
+    corpus = get_corpus_store()
+    mode = mode or get_pipeline_mode()
+    if max_workers is None:
+        max_workers = int(os.getenv("BATCH_WORKERS", DEFAULT_BATCH_WORKERS))
+    cnpjs = cnpjs if cnpjs is not None else corpus.cnpjs()
+    run_id = corpus.start_run(mode, get_config_registry().version(), description)
+    logging.info(f"Execução {run_id}: reexecutando {len(cnpjs)} CNPJs do corpus (modo {mode}, {max_workers} workers).")
+
+    def replay(cnpj: str) -> bool:
+        company_data = corpus.get(cnpj)
+        if company_data is None:
+            logging.error(f"CNPJ {cnpj} não está no corpus.")
+            return False
+        try:
+            with analysis_trace(cnpj):
+                analysis = analyze_company_data(cnpj, company_data, mode)
+        except Exception as e:
+            logging.error(f"ERRO inesperado ao reexecutar o CNPJ {cnpj}: {e}")
+            analysis = None
+        corpus.save_run_result(run_id, cnpj, analysis["resultado"] if analysis else None)
+        return analysis is not None
+
+    started = time.perf_counter()
+    failures = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for done, succeeded in enumerate(executor.map(replay, cnpjs), start=1):
+            failures += not succeeded
+            if done % PROGRESS_LOG_INTERVAL == 0:
+                logging.info(f"Execução {run_id}: {done}/{len(cnpjs)} CNPJs reexecutados.")
+    logging.info(f"Execução {run_id} concluída em {time.perf_counter() - started:.1f}s "
+                 f"({len(cnpjs) - failures} ok, {failures} com erro).")
+    return run_id
+
+
+def diff_runs(previous: dict, current: dict) -> dict:
+    """
+    Compara os resultados de duas execuções ({cnpj: {"classificacao", "score"}}).
+
+    Returns:
+        dict: Resumo das mudanças de classificação e de score, com a lista de CNPJs alterados
+        (maiores variações de score primeiro).
+    """
+    common = sorted(previous.keys() & current.keys())
+    transitions = {}
+    changes = []
+    deltas = []
+    for cnpj in common:
+        before, after = previous[cnpj], current[cnpj]
+        delta = None
+        if before["score"] is not None and after["score"] is not None:
+            delta = after["score"] - before["score"]
+            deltas.append(delta)
+        if before["classificacao"] != after["classificacao"]:
+            transition = f"{before['classificacao']} -> {after['classificacao']}"
+            transitions[transition] = transitions.get(transition, 0) + 1
+        if before["classificacao"] != after["classificacao"] or delta:
+            changes.append({
+                "cnpj": cnpj,
+                "classificacao_anterior": before["classificacao"],
+                "classificacao_atual": after["classificacao"],
+                "score_anterior": before["score"],
+                "score_atual": after["score"],
+                "variacao_score": delta,
+            })
+    changes.sort(key=lambda change: (change["classificacao_anterior"] == change["classificacao_atual"],
+                                     -abs(change["variacao_score"] or 0)))
+    return {
+        "cnpjs_comparados": len(common),
+        "inalterados": len(common) - len(changes),
+        "classificacao_alterada": sum(transitions.values()),
+        "score_alterado": sum(1 for delta in deltas if delta),
+        "transicoes": dict(sorted(transitions.items(), key=lambda item: -item[1])),
+        "variacao_media_score": round(statistics.mean(deltas), 2) if deltas else 0.0,
+        "variacao_absoluta_media_score": round(statistics.mean(abs(delta) for delta in deltas), 2) if deltas else 0.0,
+        "novos": sorted(current.keys() - previous.keys()),
+        "ausentes": sorted(previous.keys() - current.keys()),
+        "mudancas": changes,
+    }
+
+
+def compare_runs(previous_id: int, current_id: int) -> dict:
+    """Compara duas execuções gravadas no corpus."""
+    corpus = get_corpus_store()
+    report = diff_runs(corpus.run_results(previous_id), corpus.run_results(current_id))
+    return {"execucao_anterior": previous_id, "execucao_atual": current_id, **report}
+
+
+def print_report(report: dict, limit: int):
+    """Exibe o resumo da comparação e as maiores mudanças."""
+    print(f"\n=== Execução {report['execucao_atual']} x execução {report['execucao_anterior']} ===")
+    print(f"CNPJs comparados: {report['cnpjs_comparados']} | inalterados: {report['inalterados']} | "
+          f"classificação alterada: {report['classificacao_alterada']} | score alterado: {report['score_alterado']}")
+    print(f"Variação média do score: {report['variacao_media_score']:+} "
+          f"(absoluta: {report['variacao_absoluta_media_score']})")
+    for transition, count in report["transicoes"].items():
+        print(f"  {transition}: {count}")
+    if report["novos"] or report["ausentes"]:
+        print(f"Novos: {len(report['novos'])} | ausentes: {len(report['ausentes'])}")
+    for change in report["mudancas"][:limit]:
+        variation = f"{change['variacao_score']:+}" if change["variacao_score"] is not None else "n/d"
+        print(f"  {change['cnpj']}: {change['classificacao_anterior']} ({change['score_anterior']}) -> "
+              f"{change['classificacao_atual']} ({change['score_atual']}) [{variation}]")
+    if len(report["mudancas"]) > limit:
+        print(f"  ... e mais {len(report['mudancas']) - limit} mudanças (use --saida para a lista completa).")
+
+
+def write_report(report: dict, output_path: str | None):
+    if output_path:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        logging.info(f"Comparação gravada em {output_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reexecuta as regras e os agentes sobre o corpus de respostas da API CNPJA.")
+    commands = parser.add_subparsers(dest="comando", required=True)
+
+    commands.add_parser("importar-historico", help="Copia para o corpus os payloads do histórico de análises.")
+
+    run_parser = commands.add_parser("executar", help="Reexecuta o corpus e compara com a execução anterior.")
+    run_parser.add_argument("--modo", choices=PIPELINE_MODES, help="Modo do pipeline (padrão: PIPELINE_MODE).")
+    run_parser.add_argument("--workers", type=int, help="Reexecuções simultâneas (padrão: BATCH_WORKERS ou 4).")
+    run_parser.add_argument("--cnpjs", metavar="ARQUIVO", help="Reexecuta apenas os CNPJs deste CSV.")
+    run_parser.add_argument("--descricao", help="Descrição da execução (ex.: a mudança de prompt testada).")
+    run_parser.add_argument("--comparar-com", type=int, metavar="ID",
+                            help="Execução de referência (padrão: a anterior no mesmo modo).")
+    run_parser.add_argument("--sem-cache-llm", action="store_true",
+                            help="Ignora as respostas memoizadas do Gemini e força novas chamadas.")
+
+    commands.add_parser("execucoes", help="Lista as execuções gravadas.")
+
+    compare_parser = commands.add_parser("comparar", help="Compara duas execuções gravadas.")
+    compare_parser.add_argument("anterior", type=int)
+    compare_parser.add_argument("atual", type=int)
+
+    for command_parser in (run_parser, compare_parser):
+        command_parser.add_argument("--saida", metavar="ARQUIVO", help="Grava a comparação completa em JSON.")
+        command_parser.add_argument("--limite", type=int, default=20, help="Mudanças exibidas no terminal.")
+    args = parser.parse_args()
+
+    configure_logging(logging.INFO)
+    load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '.env'))
+    corpus = get_corpus_store()
+
+    if args.comando == "importar-historico":
+        imported = import_history()
+        logging.info(f"{imported} payloads importados do histórico; o corpus tem {len(corpus.cnpjs())} CNPJs.")
+    elif args.comando == "execucoes":
+        for run in corpus.runs():
+            print(json.dumps(run, ensure_ascii=False))
+    elif args.comando == "comparar":
+        report = compare_runs(args.anterior, args.atual)
+        print_report(report, args.limite)
+        write_report(report, args.saida)
+    else:
+        if args.sem_cache_llm:
+            os.environ["LLM_CACHE_ENABLED"] = "false"
+        cnpjs = None
+        if args.cnpjs:
+            cnpjs = list(dict.fromkeys(filter(None, (validate_cnpj(raw) for raw in read_cnpjs(args.cnpjs)))))
+        elif not corpus.cnpjs():
+            logging.error("O corpus está vazio. Analise alguns CNPJs ou use 'importar-historico'.")
+            sys.exit(1)
+
+        mode = args.modo or get_pipeline_mode()
+        run_id = replay_corpus(cnpjs, mode, args.workers, args.descricao)
+        previous_id = args.comparar_com or corpus.previous_run(run_id, mode)
+        if previous_id is None:
+            logging.info(f"Execução {run_id} é a primeira no modo {mode}; nada a comparar.")
+            return
+        report = compare_runs(previous_id, run_id)
+        print_report(report, args.limite)
+        write_report(report, args.saida)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+    Módulo de Resiliência das Chamadas à API CNPJA.
+
+    Reúne o circuit breaker que pausa todo o tráfego para a API CNPJA durante
+    uma indisponibilidade, o cálculo de espera entre retentativas (backoff
+    exponencial com jitter ou o Retry-After informado pela API) e o agendador
+    que devolve à fila as consultas que falharam, sem bloquear os workers.
+    """
+
+import heapq
+import itertools
+import logging
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+DEFAULT_CIRCUIT_FAILURE_THRESHOLD = 5
+DEFAULT_CIRCUIT_RESET_SECONDS = 30
+MAX_BACKOFF_SECONDS = 60
+HALF_OPEN_PROBE_WAIT = 1.0 # Espera sugerida aos demais enquanto uma requisição de teste está em andamento
+RETRY_AFTER_JITTER = 1.0 # Espalha as retentativas que receberam o mesmo Retry-After
+
+# Códigos 4xx que podem ter sucesso em uma nova tentativa; os demais 4xx são permanentes
+TRANSIENT_CLIENT_STATUS = (408, 425, 429)
+
+
+class TransientCNPJAError(Exception):
+    """
+    Falha temporária na consulta à API CNPJA (erro de rede, 5xx, 429 ou circuito aberto).
+
+    Args:
+        message (str): Descrição da falha.
+        retry_after (float | None): Espera indicada antes da próxima tentativa, em segundos
+            (Retry-After da API ou tempo até o circuito fechar). None usa o backoff padrão.
+        request_sent (bool): False quando a requisição nem foi enviada (circuito aberto),
+            caso em que a falha não conta como tentativa.
+    """
+
+    def __init__(self, message: str, retry_after: float | None = None, request_sent: bool = True):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.request_sent = request_sent
+
+
+def backoff_delay(attempt: int, base: float, cap: float = MAX_BACKOFF_SECONDS) -> float:
+    """
+    Espera antes da tentativa seguinte à tentativa `attempt` (0, 1, 2...): backoff
+    exponencial com jitter total, para que workers que falharam juntos não
+    tentem de novo ao mesmo tempo.
+    """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def retry_delay(error: TransientCNPJAError, attempt: int, base: float) -> float:
+    """Espera antes de repetir a tentativa `attempt` que falhou: o Retry-After indicado (com jitter) ou o backoff."""
+    if error.retry_after is not None:
+        return error.retry_after + random.uniform(0, RETRY_AFTER_JITTER)
+    return backoff_delay(attempt, base)
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Converte o cabeçalho Retry-After (segundos ou data HTTP) em segundos de espera, ou None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker thread-safe.
+
+    Após `failure_threshold` falhas temporárias consecutivas o circuito abre e
+    nenhuma requisição é enviada por `reset_timeout` segundos. Depois disso,
+    uma única requisição de teste é liberada (meio-aberto): se tiver sucesso o
+    circuito fecha; se falhar, volta a abrir. Quem recebe a vaga de teste deve chamar
+    release_probe() ao terminar (em um finally), para que uma exceção inesperada não
+    deixe o circuito meio-aberto sem requisição de teste para sempre.
+
+    Args:
+        failure_threshold (int): Falhas consecutivas que abrem o circuito.
+        reset_timeout (float): Tempo com o circuito aberto antes da requisição de teste, em segundos.
+        name (str): Nome usado nos logs.
+    """
+
+    def __init__(self, failure_threshold: int = DEFAULT_CIRCUIT_FAILURE_THRESHOLD,
+                 reset_timeout: float = DEFAULT_CIRCUIT_RESET_SECONDS, name: str = "CNPJA"):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.name = name
+        self.state = "fechado"
+        self._failures = 0
+        self._open_until = 0.0
+        self._probing = False
+        self._probe_thread = None # Thread que recebeu a vaga de teste
+        self._lock = threading.Lock()
+
+    def time_until_allowed(self) -> float:
+        """
+        Retorna 0 se a requisição pode ser enviada agora (reservando a vaga de teste
+        quando o circuito está meio-aberto), ou quantos segundos esperar.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now < self._open_until:
+                return self._open_until - now
+            if self.state == "aberto":
+                self.state = "meio-aberto"
+                logging.info(f"Circuito {self.name} meio-aberto: enviando requisição de teste.")
+            if self.state == "meio-aberto":
+                if self._probing:
+                    return HALF_OPEN_PROBE_WAIT
+                self._probing = True
+                self._probe_thread = threading.get_ident()
+            return 0.0
+
+    def release_probe(self):
+        """Libera a vaga de teste, se reservada pela thread atual e ainda não resolvida por record_*()."""
+        with self._lock:
+            if self._probing and self._probe_thread == threading.get_ident():
+                self._probing = False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != "fechado":
+                logging.info(f"Circuito {self.name} fechado: API respondendo novamente.")
+            self.state = "fechado"
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self.state == "meio-aberto" or self._failures >= self.failure_threshold:
+                if self.state != "aberto":
+                    logging.warning(f"Circuito {self.name} aberto por {self.reset_timeout}s após "
+                                    f"{self._failures} falhas consecutivas.")
+                self.state = "aberto"
+                self._open_until = time.monotonic() + self.reset_timeout
+
+    def pause(self, seconds: float):
+        """Suspende o envio de requisições por `seconds` (ex.: Retry-After de uma resposta 429)."""
+        with self._lock:
+            self._open_until = max(self._open_until, time.monotonic() + seconds)
+
+
+_cnpja_breaker = None
+_cnpja_breaker_lock = threading.Lock()
+
+def get_cnpja_circuit_breaker() -> CircuitBreaker:
+    """
+    Retorna o circuit breaker compartilhado da API CNPJA, criado na primeira chamada a partir
+    de CNPJA_CIRCUIT_FAILURES e CNPJA_CIRCUIT_RESET_SECONDS.
+    """
+    global _cnpja_breaker
+    with _cnpja_breaker_lock:
+        if _cnpja_breaker is None:
+            _cnpja_breaker = CircuitBreaker(
+                int(os.getenv("CNPJA_CIRCUIT_FAILURES", DEFAULT_CIRCUIT_FAILURE_THRESHOLD)),
+                float(os.getenv("CNPJA_CIRCUIT_RESET_SECONDS", DEFAULT_CIRCUIT_RESET_SECONDS)),
+            )
+        return _cnpja_breaker
+
+
+class RetryScheduler:
+    """
+    Fila de itens a serem reprocessados, ordenada pelo horário em que cada um fica
+    disponível. Usada pelo modo lote para reenfileirar consultas com falha
+    temporária em vez de manter um worker dormindo.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._sequence = itertools.count()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def schedule(self, item, delay: float):
+        heapq.heappush(self._heap, (time.monotonic() + max(0.0, delay), next(self._sequence), item))
+
+    def pop_due(self) -> list:
+        """Remove e retorna os itens cujo horário já chegou."""
+        now = time.monotonic()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due.append(heapq.heappop(self._heap)[2])
+        return due
+
+    def next_delay(self) -> float | None:
+        """Segundos até o próximo item ficar disponível, ou None se a fila estiver vazia."""
+        if not self._heap:
+            return None
+        return max(0.0, self._heap[0][0] - time.monotonic())
@@ -0,0 +1,253 @@
+"""
+    Módulo do Serviço HTTP de Análise.
+
+    Expõe o pipeline de análise para outros sistemas por um servidor HTTP local
+    baseado em asyncio:
+
+        GET /analise/{cnpj}  -> resultado no formato do resultado.json
+        GET /saude           -> {"status": "ok"}
+        GET /metrics         -> métricas no formato do Prometheus
+
+    Requisições simultâneas para o mesmo CNPJ compartilham uma única análise em
+    andamento (singleflight). Quando o limite de requisições da API CNPJA está
+    saturado, novas análises são recusadas com 429 e Retry-After em vez de
+    acumularem espera indefinidamente.
+
+    Uso:
+        python PythonScripts/servico_http.py --host 127.0.0.1 --porta 8080
+    """
+
+import argparse
+import asyncio
+import contextvars
+import json
+import logging
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+from dotenv import load_dotenv
+
+from validador_cnpj import validate_cnpj
+from analise_cnpj import analyze_company_data, fetch_cnpj_data, get_cnpj_data_source, get_cnpja_cache
+from limitador_taxa import get_cnpja_rate_limiter
+from armazenamento_resultados import save_analysis
+from lote_cnpj import DEFAULT_BATCH_WORKERS
+from metricas import analysis_trace, configure_logging, metrics
+
+DEFAULT_SERVICE_PORT = 8080
+DEFAULT_MAX_QUEUE_WAIT_SECONDS = 30 # Espera máxima aceitável pela API CNPJA antes de responder 429
+REQUEST_READ_TIMEOUT = 10 # segundos para receber a linha de requisição e os cabeçalhos
+MAX_HEADER_BYTES = 16 * 1024
+
+
+class HTTPError(Exception):
+    """Erro convertido em uma resposta HTTP com corpo JSON."""
+
+    def __init__(self, status: HTTPStatus, message: str, headers: dict | None = None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+
+class AnalysisService:
+    """
+    Servidor HTTP asyncio que executa as análises em um pool de threads.
+
+    Args:
+        max_workers (int | None): Análises simultâneas (padrão: SERVICE_WORKERS, BATCH_WORKERS ou 4).
+        max_queue_wait (float | None): Espera estimada máxima pela API CNPJA, em segundos,
+            acima da qual novas análises são recusadas (padrão: SERVICE_MAX_QUEUE_WAIT_SECONDS ou 30).
+    """
+
+    def __init__(self, max_workers: int | None = None, max_queue_wait: float | None = None):
+        if max_workers is None:
+            max_workers = int(os.getenv("SERVICE_WORKERS", os.getenv("BATCH_WORKERS", DEFAULT_BATCH_WORKERS)))
+        if max_queue_wait is None:
+            max_queue_wait = float(os.getenv("SERVICE_MAX_QUEUE_WAIT_SECONDS", DEFAULT_MAX_QUEUE_WAIT_SECONDS))
+        self.max_queue_wait = max_queue_wait
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analise")
+        self._in_flight = {} # cnpj -> asyncio.Task da análise em andamento
+        self._waiting_fetches = 0 # Análises que ainda aguardam a API CNPJA (alterado só no loop de eventos)
+
+    # Análise com singleflight e contrapressão
+
+    async def analyze(self, cnpj: str) -> dict:
+        """
+        Retorna a análise do CNPJ, reaproveitando a análise em andamento se houver.
+
+        Raises:
+            HTTPError: 429 se a API CNPJA estiver saturada, 502 se a análise falhar.
+        """
+        task = self._in_flight.get(cnpj)
+        if task is None:
+            # Registrada antes de qualquer await, para que as requisições simultâneas a encontrem
+            task = asyncio.get_running_loop().create_task(self._run_analysis(cnpj))
+            self._in_flight[cnpj] = task
+            task.add_done_callback(lambda done: self._forget(cnpj, done))
+        else:
+            metrics.inc("servico_requisicoes_agrupadas_total")
+            logging.info(f"Requisição para o CNPJ {cnpj} agrupada com a análise em andamento.")
+
+        analysis = await asyncio.shield(task) # A desconexão de um cliente não cancela a análise dos demais
+        if analysis is None:
+            raise HTTPError(HTTPStatus.BAD_GATEWAY, "Não foi possível concluir a análise deste CNPJ.")
+        return analysis
+
+    def _forget(self, cnpj: str, task: asyncio.Task):
+        """Remove a análise concluída, sem descartar uma análise mais nova do mesmo CNPJ."""
+        if self._in_flight.get(cnpj) is task:
+            del self._in_flight[cnpj]
+
+    async def _check_backpressure(self, cnpj: str) -> bool:
+        """
+        Recusa a análise se a espera estimada pela API CNPJA exceder max_queue_wait.
+        Retorna se a busca vai consumir o limite da API CNPJA (False sem limite, com a
+        fonte local ou com os dados no cache).
+        """
+        limiter = get_cnpja_rate_limiter()
+        if limiter.rate <= 0 or get_cnpj_data_source() == "local":
+            return False
+        cache = get_cnpja_cache()
+        if cache is not None:
+            loop = asyncio.get_running_loop()
+            if await loop.run_in_executor(self._executor, cache.get, cnpj) is not None:
+                return False # Dados no cache: a análise não consome o limite da API CNPJA
+
+        wait = limiter.estimated_wait(queued=self._waiting_fetches)
+        if wait > self.max_queue_wait:
+            metrics.inc("servico_requisicoes_recusadas_total")
+            raise HTTPError(
+                HTTPStatus.TOO_MANY_REQUESTS,
+                f"Limite de requisições da API CNPJA saturado. Tente novamente em {math.ceil(wait)}s.",
+                {"Retry-After": str(math.ceil(wait))},
+            )
+        return True
+
+    async def _run_analysis(self, cnpj: str) -> dict | None:
+        uses_api = await self._check_backpressure(cnpj) # O 429 é repassado a todas as requisições agrupadas
+        if uses_api:
+            self._waiting_fetches += 1 # Contado na admissão; descontado quando a busca termina
+        with analysis_trace(cnpj):
+            company_data = await self._fetch(cnpj, uses_api)
+            if not company_data:
+                logging.error(f"Não foi possível obter os dados da API para o CNPJ {cnpj}.")
+                return None
+            analysis = await self._run_in_executor(analyze_company_data, cnpj, company_data)
+            if analysis is not None:
+                await self._run_in_executor(save_analysis, analysis)
+            return analysis
+
+    async def _fetch(self, cnpj: str, uses_api: bool) -> dict | None:
+        try:
+            return await self._run_in_executor(fetch_cnpj_data, cnpj)
+        finally:
+            if uses_api:
+                self._waiting_fetches -= 1
+
+    def _run_in_executor(self, function, *args):
+        """Executa a função no pool de threads preservando o trace ID da análise."""
+        context = contextvars.copy_context()
+        return asyncio.get_running_loop().run_in_executor(self._executor, context.run, function, *args)
+
+    # Protocolo HTTP
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Atende uma requisição por conexão (Connection: close)."""
+        try:
+            try:
+                method, path = await asyncio.wait_for(self._read_request(reader), REQUEST_READ_TIMEOUT)
+                status, body, headers = await self._route(method, path)
+            except HTTPError as e:
+                status, body, headers = e.status, {"erro": e.message}, e.headers
+            except asyncio.TimeoutError:
+                status, body, headers = HTTPStatus.REQUEST_TIMEOUT, {"erro": "Tempo esgotado ao ler a requisição."}, {}
+            except Exception as e:
+                logging.error(f"ERRO inesperado no serviço HTTP: {e}")
+                status, body, headers = HTTPStatus.INTERNAL_SERVER_ERROR, {"erro": "Erro interno."}, {}
+            await self._write_response(writer, status, body, headers)
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> tuple[str, str]:
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.LimitOverrunError:
+            raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Cabeçalhos muito grandes.")
+        except asyncio.IncompleteReadError:
+            raise ConnectionError("Conexão encerrada antes do fim dos cabeçalhos.")
+
+        request_line = head.split(b"\r\n", 1)[0].decode("latin-1")
+        parts = request_line.split()
+        if len(parts) != 3 or not parts[2].startswith("HTTP/"):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Linha de requisição inválida.")
+        method, target, _ = parts
+        return method.upper(), target.split("?", 1)[0]
+
+    async def _route(self, method: str, path: str) -> tuple[HTTPStatus, dict | str, dict]:
+        if method != "GET":
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, "Apenas GET é suportado.", {"Allow": "GET"})
+
+        segments = [segment for segment in path.split("/") if segment]
+        if segments == ["saude"]:
+            return HTTPStatus.OK, {"status": "ok", "analises_em_andamento": len(self._in_flight)}, {}
+        if segments == ["metrics"]:
+            return HTTPStatus.OK, metrics.render_prometheus(), {}
+        if len(segments) == 2 and segments[0] == "analise":
+            cnpj = validate_cnpj(segments[1])
+            if not cnpj:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, f"O CNPJ '{segments[1]}' é inválido.")
+            analysis = await self.analyze(cnpj)
+            return HTTPStatus.OK, analysis["resultado"], {"X-Trace-Id": analysis.get("trace_id", "")}
+        raise HTTPError(HTTPStatus.NOT_FOUND, "Rota não encontrada.")
+
+    @staticmethod
+    async def _write_response(writer: asyncio.StreamWriter, status: HTTPStatus, body, headers: dict):
+        if isinstance(body, str):
+            payload = body.encode("utf-8")
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            content_type = "application/json; charset=utf-8"
+        lines = [f"HTTP/1.1 {status.value} {status.phrase}",
+                 f"Content-Type: {content_type}",
+                 f"Content-Length: {len(payload)}",
+                 "Connection: close"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + payload)
+        await writer.drain()
+
+    async def serve(self, host: str, port: int):
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_HEADER_BYTES)
+        logging.info(f"Serviço de análise disponível em http://{host}:{port}/analise/{{cnpj}}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serviço HTTP de análise de CNPJ.")
+    parser.add_argument("--host", default=os.getenv("SERVICE_HOST", "127.0.0.1"))
+    parser.add_argument("--porta", type=int, default=None, help="Porta (padrão: SERVICE_PORT ou 8080).")
+    parser.add_argument("--workers", type=int, default=None, help="Análises simultâneas (padrão: SERVICE_WORKERS).")
+    args = parser.parse_args()
+
+    configure_logging(logging.INFO)
+    load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '.env'))
+    port = args.porta or int(os.getenv("SERVICE_PORT", DEFAULT_SERVICE_PORT))
+
+    service = AnalysisService(max_workers=args.workers)
+    try:
+        asyncio.run(service.serve(args.host, port))
+    except KeyboardInterrupt:
+        logging.info("Encerrando o serviço.")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,9 +2,13 @@
     Módulo Validador de CNPJ.
 
     Fornece funções para validar números de CNPJ (Cadastro Nacional da Pessoa Jurídica)
-    brasileiros usando seus dígitos verificadores.
+    brasileiros usando seus dígitos verificadores, individualmente ou em lote (NumPy).
     """
 
+PESO1 = (5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2)
+PESO2 = (6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2)
+DEFAULT_CHUNK_SIZE = 1_000_000
+
 def validate_cnpj(cnpj: str) -> str | None:
     """
     Valida um número de CNPJ.
@@ -24,8 +28,8 @@ def validate_cnpj(cnpj: str) -> str | None:
     cnpj_base = cnpj_limpo[:12]
     digitos_informados = cnpj_limpo[12:]
 
-    peso1 = [5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]
-    peso2 = [6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]
+    peso1 = PESO1
+    peso2 = PESO2
 
     # Calcula o primeiro dígito
     soma1 = sum(int(cnpj_base[i]) * peso1[i] for i in range(12))
@@ -58,3 +62,80 @@ def format_cnpj(cnpj: str) -> str:
     """
     cnpj_limpo = ''.join(filter(str.isdigit, cnpj))
     return f"{cnpj_limpo[:2]}.{cnpj_limpo[2:5]}.{cnpj_limpo[5:8]}/{cnpj_limpo[8:12]}-{cnpj_limpo[12:]}"
+
+def validate_cnpjs(cnpjs):
+    """
+    Valida um lote de CNPJs de uma só vez, calculando os dígitos verificadores
+    com produtos matriz-vetor do NumPy.
+
+    Args:
+        cnpjs (Iterable[str] | numpy.ndarray): As strings de CNPJ (podem conter formatação).
+
+    Returns:
+        tuple[numpy.ndarray, numpy.ndarray]: A máscara booleana de CNPJs válidos e o array
+        com os CNPJs limpos (apenas dígitos; string vazia quando não há 14 dígitos).
+    """
+    import numpy as np  # Dependência opcional, carregada apenas no modo lote
+
+    values = np.asarray(cnpjs if isinstance(cnpjs, np.ndarray) else list(cnpjs), dtype=str)
+    if values.ndim != 1:
+        values = values.ravel()
+    total = values.shape[0]
+    if total == 0:
+        return np.zeros(0, dtype=bool), np.zeros(0, dtype='U14')
+
+    try:
+        raw = values.astype('S')
+    except UnicodeEncodeError:
+        # Caracteres não-ASCII nunca são dígitos; basta descartá-los
+        raw = np.array([value.encode('ascii', 'ignore') for value in values.tolist()], dtype='S')
+
+    width = max(raw.dtype.itemsize, 1)
+    chars = raw.view(np.uint8).reshape(total, width)
+    is_digit = (chars >= ord('0')) & (chars <= ord('9'))
+    has_14_digits = is_digit.sum(axis=1) == 14
+
+    digits = np.zeros((total, 14), dtype=np.int32)
+    if has_14_digits.any():
+        selected_chars = chars[has_14_digits]
+        selected_digits = selected_chars[is_digit[has_14_digits]]
+        digits[has_14_digits] = (selected_digits - ord('0')).reshape(-1, 14)
+
+    # Calcula o primeiro dígito
+    resto1 = (digits[:, :12] @ np.array(PESO1, dtype=np.int32)) % 11
+    digito1 = np.where(resto1 < 2, 0, 11 - resto1)
+
+    # Calcula o segundo dígito
+    peso2 = np.array(PESO2, dtype=np.int32)
+    resto2 = (digits[:, :12] @ peso2[:12] + digito1 * peso2[12]) % 11
+    digito2 = np.where(resto2 < 2, 0, 11 - resto2)
+
+    repeated = (digits == digits[:, :1]).all(axis=1)
+    valid = has_14_digits & ~repeated & (digits[:, 12] == digito1) & (digits[:, 13] == digito2)
+
+    cleaned = (digits + ord('0')).astype(np.uint8).view('S14').ravel().astype('U14')
+    cleaned[~has_14_digits] = ''
+    return valid, cleaned
+
+def validate_cnpj_file(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE, encoding: str = 'utf-8'):
+    """
+    Valida em blocos um arquivo com um CNPJ por linha (ou na primeira coluna de um CSV),
+    sem carregar o arquivo inteiro na memória.
+
+    Args:
+        path (str): Caminho do arquivo.
+        chunk_size (int): Número de linhas processadas por bloco.
+        encoding (str): Codificação do arquivo.
+
+    Yields:
+        tuple[numpy.ndarray, numpy.ndarray]: A máscara de válidos e os CNPJs limpos de cada bloco.
+    """
+    chunk = []
+    with open(path, 'r', encoding=encoding) as f:
+        for line in f:
+            chunk.append(line.split(',', 1)[0].split(';', 1)[0])
+            if len(chunk) >= chunk_size:
+                yield validate_cnpjs(chunk)
+                chunk = []
+    if chunk:
+        yield validate_cnpjs(chunk)
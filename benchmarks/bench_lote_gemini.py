@@ -0,0 +1,126 @@
+"""
+    Benchmark das Chamadas Agrupadas ao Gemini.
+
+    Compara, offline, uma chamada ao Gemini por CNPJ (LLM_BATCH_SIZE=1) com as
+    requisições agrupadas de lote_gemini.py em vários tamanhos de grupo:
+    vazão (CNPJs/s), número de chamadas, tokens e custo estimado por CNPJ.
+    Usa os substitutos locais da API CNPJA e do Gemini (benchmarks/fakes.py);
+    a latência do Gemini falso cresce com o tamanho da resposta gerada e as
+    chamadas respeitam uma cota de requisições por minuto, como na API real.
+
+    Uso:
+        python benchmarks/bench_lote_gemini.py --quantidade 32 --workers 16 --tamanhos 1 4 8 16
+        python benchmarks/bench_lote_gemini.py --modos combinado --taxa-malformada 0.2
+    """
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'PythonScripts')))
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from fakes import FakeCNPJAServer, FakeGenerativeModel, generate_valid_cnpjs, install_fake_gemini
+
+
+def configure_fake_gemini(args):
+    """Zera os contadores do Gemini falso e aplica a latência, a cota e a taxa de respostas truncadas."""
+    FakeGenerativeModel.configure(args.latencia_gemini, malformed_rate=args.taxa_malformada,
+                                  output_latency_per_1k=args.latencia_saida_1k,
+                                  requests_per_minute=args.limite_gemini_por_minuto)
+
+
+def bench_batch_size(cnpjs: list[str], batch_size: int, mode: str, args) -> dict:
+    from analise_cnpj import analyze_cnpj
+    from metricas import estimate_cost_usd
+
+    os.environ["LLM_BATCH_SIZE"] = str(batch_size)
+    configure_fake_gemini(args)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        analyses = list(executor.map(lambda cnpj: analyze_cnpj(cnpj, mode=mode), cnpjs))
+    elapsed = time.perf_counter() - started
+
+    cost = estimate_cost_usd(FakeGenerativeModel.prompt_tokens, FakeGenerativeModel.response_tokens)
+    return {
+        "tamanho_grupo": batch_size,
+        "modo": mode,
+        "erros": sum(1 for analysis in analyses if analysis is None),
+        "cnpjs_por_segundo": round(len(cnpjs) / elapsed, 3),
+        "tempo_total_segundos": round(elapsed, 3),
+        "chamadas_gemini": FakeGenerativeModel.calls,
+        "tokens_prompt": FakeGenerativeModel.prompt_tokens,
+        "tokens_resposta": FakeGenerativeModel.response_tokens,
+        "custo_usd": round(cost, 6),
+        "custo_por_cnpj_usd": round(cost / len(cnpjs), 8),
+        "classificacoes": {
+            classification: sum(1 for analysis in analyses
+                                if analysis and analysis["resultado"]["classification"] == classification)
+            for classification in sorted({analysis["resultado"]["classification"] for analysis in analyses if analysis})
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das chamadas agrupadas ao Gemini (LLM_BATCH_SIZE).")
+    parser.add_argument("--quantidade", type=int, default=32, help="CNPJs analisados em cada medição.")
+    parser.add_argument("--workers", type=int, default=16, help="Análises simultâneas.")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[1, 4, 8, 16], help="Valores de LLM_BATCH_SIZE.")
+    parser.add_argument("--modos", nargs="+", default=["llm"], choices=("llm", "combinado"))
+    parser.add_argument("--espera-ms", type=float, default=200, help="LLM_BATCH_WAIT_MS.")
+    parser.add_argument("--latencia-gemini", type=float, default=0.5, help="Latência fixa do Gemini falso (s).")
+    parser.add_argument("--latencia-saida-1k", type=float, default=2.0,
+                        help="Latência adicional do Gemini falso por 1.000 tokens gerados (s).")
+    parser.add_argument("--limite-gemini-por-minuto", type=float, default=120,
+                        help="Cota de requisições por minuto do Gemini falso (0 = sem limite).")
+    parser.add_argument("--taxa-malformada", type=float, default=0.0,
+                        help="Fração das respostas agrupadas que chegam truncadas (exercita a divisão).")
+    parser.add_argument("--saida", help="Arquivo JSON de saída (padrão: saída padrão).")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    os.environ.update({
+        "CACHE_ENABLED": "false",
+        "LLM_CACHE_ENABLED": "false",
+        "RESULTS_STORE_ENABLED": "false",
+        "CNPJA_CORPUS_ENABLED": "false",
+        "CNPJA_RATE_LIMIT_PER_MINUTE": "0",
+        "CNPJA_API_KEY": "chave-falsa-benchmark",
+        "LLM_BATCH_WAIT_MS": str(args.espera_ms),
+    })
+
+    server = FakeCNPJAServer(latency=0.01).start()
+    os.environ["CNPJA_BASE_URL"] = server.base_url
+    install_fake_gemini(args.latencia_gemini)
+
+    cnpjs = generate_valid_cnpjs(args.quantidade)
+    report = {"parametros": vars(args), "resultados": []}
+    try:
+        for mode in args.modos:
+            baseline = None
+            for batch_size in args.tamanhos:
+                result = bench_batch_size(cnpjs, batch_size, mode, args)
+                if batch_size == 1:
+                    baseline = result
+                elif baseline is not None:
+                    result["aceleracao"] = round(result["cnpjs_por_segundo"] / baseline["cnpjs_por_segundo"], 2)
+                    result["reducao_custo"] = round(1 - result["custo_usd"] / baseline["custo_usd"], 3)
+                report["resultados"].append(result)
+    finally:
+        server.stop()
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+    Benchmark dos Modos do Pipeline.
+
+    Compara lado a lado a latência do modo 'llm' (duas chamadas sequenciais ao
+    Gemini) com o modo 'combinado' (uma única chamada) para os mesmos CNPJs.
+    Os dados da API CNPJA são buscados uma única vez antes das medições e a
+    memoização do Gemini é desativada para que cada medição pague a latência real.
+
+    Requer GEMINI_API_KEY e CNPJA_API_KEY no .env.
+
+    Uso:
+        python benchmarks/bench_modos_pipeline.py 34075739000184 33000167000101 --repeticoes 2
+    """
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'PythonScripts')))
+
+from dotenv import load_dotenv
+
+from validador_cnpj import validate_cnpj
+from analise_cnpj import analyze_company_data, fetch_cnpj_data
+
+MODES = ("llm", "combinado")
+
+
+def summarize(latencies: list[float]) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "execucoes": len(ordered),
+        "media_segundos": round(statistics.mean(ordered), 3),
+        "p50_segundos": round(statistics.median(ordered), 3),
+        "max_segundos": round(ordered[-1], 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara a latência dos modos 'llm' e 'combinado'.")
+    parser.add_argument("cnpjs", nargs="+", help="CNPJs a serem analisados.")
+    parser.add_argument("--repeticoes", type=int, default=1, help="Execuções por CNPJ e modo.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
+    os.environ["LLM_CACHE_ENABLED"] = "false"
+
+    companies = []
+    for raw_cnpj in args.cnpjs:
+        cnpj = validate_cnpj(raw_cnpj)
+        company_data = fetch_cnpj_data(cnpj) if cnpj else None
+        if company_data is None:
+            logging.warning(f"CNPJ {raw_cnpj} ignorado (inválido ou sem dados).")
+            continue
+        companies.append((cnpj, company_data))
+
+    latencies = {mode: [] for mode in MODES}
+    per_cnpj = []
+    for cnpj, company_data in companies:
+        row = {"cnpj": cnpj}
+        for _ in range(args.repeticoes):
+            for mode in MODES:  # Alterna os modos para diluir variações do serviço
+                started = time.perf_counter()
+                analysis = analyze_company_data(cnpj, company_data, mode)
+                elapsed = time.perf_counter() - started
+                latencies[mode].append(elapsed)
+                row[mode] = {
+                    "segundos": round(elapsed, 3),
+                    "classificacao": analysis["resultado"]["classification"] if analysis else None,
+                    "score": analysis["resultado"]["score"] if analysis else None,
+                }
+        per_cnpj.append(row)
+
+    report = {"por_cnpj": per_cnpj}
+    for mode in MODES:
+        if latencies[mode]:
+            report[mode] = summarize(latencies[mode])
+    if latencies["llm"] and latencies["combinado"]:
+        report["reducao_percentual"] = round(
+            100 * (1 - statistics.mean(latencies["combinado"]) / statistics.mean(latencies["llm"])), 1
+        )
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+    Benchmark de Inicialização.
+
+    Mede o tempo de inicialização e a memória (RSS máximo) de cada ponto de
+    entrada em um processo Python novo, e usa `python -X importtime` para
+    listar os imports mais lentos e indicar se os SDKs pesados (Gemini e
+    requests) foram carregados. Não faz chamadas às APIs.
+
+    Uso:
+        python benchmarks/bench_startup.py --repeticoes 5
+        python benchmarks/bench_startup.py --saida startup.json
+    """
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SCRIPTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'PythonScripts'))
+HEAVY_MODULES = ("google.generativeai", "requests")
+VALID_CNPJ = "11222333000181"
+
+# nome -> argumentos passados ao interpretador (executados a partir de PythonScripts/)
+ENTRY_POINTS = {
+    "main.py validar": ["main.py", "validar", VALID_CNPJ],
+    "main.py (import)": ["-c", "import main"],
+    "gui.py (import)": ["-c", "import gui"],
+    "servico_http.py (import)": ["-c", "import servico_http"],
+    "analise_cnpj (import)": ["-c", "import analise_cnpj"],
+    "google.generativeai (referência)": ["-c", "import google.generativeai"],
+}
+
+
+def run_entry_point(arguments: list[str], importtime: bool = False) -> dict:
+    """
+    Executa o ponto de entrada em um processo novo e retorna o tempo de parede,
+    o RSS máximo (KB, quando os.wait4 está disponível) e a saída de erro.
+    """
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + arguments
+    started = time.perf_counter()
+    process = subprocess.Popen(command, cwd=SCRIPTS_DIR, stdin=subprocess.DEVNULL,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    stderr = process.stderr.read()
+    process.stderr.close()
+    rss_kb = None
+    if hasattr(os, "wait4"):
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        # ru_maxrss é informado em KB no Linux e em bytes no macOS
+        rss_kb = usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+    else:
+        process.wait()
+    return {"segundos": time.perf_counter() - started, "rss_kb": rss_kb,
+            "codigo_saida": process.returncode, "stderr": stderr}
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int]]:
+    """Retorna (módulo, profundidade, microssegundos acumulados) de cada linha do -X importtime."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        imports.append((name.strip(), depth, int(cumulative)))
+    return imports
+
+
+def profile_entry_point(arguments: list[str], repetitions: int, top: int) -> dict:
+    runs = [run_entry_point(arguments) for _ in range(repetitions)]
+    failed = [run for run in runs if run["codigo_saida"] not in (0, None)]
+    if failed:
+        return {"erro": failed[0]["stderr"].strip().splitlines()[-1:] or ["falhou"]}
+
+    imports = parse_importtime(run_entry_point(arguments, importtime=True)["stderr"])
+    loaded = {name for name, _, _ in imports}
+    top_level = sorted((item for item in imports if item[1] == 0), key=lambda item: item[2], reverse=True)
+    rss_values = [run["rss_kb"] for run in runs if run["rss_kb"] is not None]
+    return {
+        "segundos_p50": round(statistics.median(run["segundos"] for run in runs), 4),
+        "segundos_min": round(min(run["segundos"] for run in runs), 4),
+        "rss_max_mb": round(max(rss_values) / 1024, 1) if rss_values else None,
+        "imports_segundos": round(sum(item[2] for item in top_level) / 1e6, 4),
+        "sdks_carregados": [module for module in HEAVY_MODULES if module in loaded],
+        "imports_mais_lentos": [{"modulo": name, "ms": round(cumulative / 1000, 1)}
+                                for name, _, cumulative in top_level[:top]],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de inicialização dos pontos de entrada")
+    parser.add_argument("--repeticoes", type=int, default=5, help="Execuções por ponto de entrada (mediana do tempo).")
+    parser.add_argument("--top", type=int, default=5, help="Quantidade de imports mais lentos listados.")
+    parser.add_argument("--saida", metavar="ARQUIVO", help="Grava o relatório JSON neste arquivo.")
+    args = parser.parse_args()
+
+    report = {"python": sys.version.split()[0], "pontos_de_entrada": {}}
+    for name, arguments in ENTRY_POINTS.items():
+        print(f"Medindo {name}...", file=sys.stderr)
+        report["pontos_de_entrada"][name] = profile_entry_point(arguments, args.repeticoes, args.top)
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
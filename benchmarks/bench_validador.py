@@ -0,0 +1,63 @@
+"""
+    Benchmark do Validador de CNPJ.
+
+    Compara a validação escalar (validate_cnpj) com a validação vetorizada
+    (validate_cnpjs) sobre um lote sintético de CNPJs formatados e não formatados.
+
+    Uso:
+        python benchmarks/bench_validador.py --quantidade 1000000
+    """
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'PythonScripts')))
+
+from validador_cnpj import validate_cnpj, validate_cnpjs, format_cnpj
+
+
+def generate_cnpjs(quantity: int, seed: int = 42) -> list[str]:
+    """Gera CNPJs aleatórios (cerca de 1% válidos), metade deles formatados."""
+    rng = random.Random(seed)
+    cnpjs = []
+    for i in range(quantity):
+        cnpj = "".join(rng.choice("0123456789") for _ in range(14))
+        cnpjs.append(format_cnpj(cnpj) if i % 2 else cnpj)
+    return cnpjs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do validador de CNPJ (escalar x vetorizado)")
+    parser.add_argument("--quantidade", type=int, default=200_000, help="Número de CNPJs do lote sintético.")
+    args = parser.parse_args()
+
+    cnpjs = generate_cnpjs(args.quantidade)
+
+    started = time.perf_counter()
+    scalar_valid = [validate_cnpj(cnpj) is not None for cnpj in cnpjs]
+    scalar_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    vector_valid, _ = validate_cnpjs(cnpjs)
+    vector_seconds = time.perf_counter() - started
+
+    if vector_valid.tolist() != scalar_valid:
+        raise SystemExit("ERRO: resultados divergentes entre validate_cnpj e validate_cnpjs.")
+
+    print(json.dumps({
+        "quantidade": args.quantidade,
+        "validos": int(vector_valid.sum()),
+        "escalar_segundos": round(scalar_seconds, 4),
+        "vetorizado_segundos": round(vector_seconds, 4),
+        "escalar_cnpjs_por_segundo": round(args.quantidade / scalar_seconds),
+        "vetorizado_cnpjs_por_segundo": round(args.quantidade / vector_seconds),
+        "aceleracao": round(scalar_seconds / vector_seconds, 1),
+    }, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
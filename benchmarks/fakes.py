@@ -0,0 +1,246 @@
+"""
+    Substitutos locais da API CNPJA e do Gemini para benchmarks offline.
+
+    FakeCNPJAServer atende /office/{cnpj} em 127.0.0.1 com latência, taxa de
+    erros e respostas 429 configuráveis. FakeGenerativeModel substitui
+    genai.GenerativeModel com latência e taxa de erros configuráveis, e
+    responde também às requisições agrupadas de lote_gemini.py.
+    """
+
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'PythonScripts')))
+
+from validador_cnpj import validate_cnpj
+from limitador_taxa import TokenBucket
+
+EDUCATION_CNAE = {"id": 8531700, "text": "Educação superior - graduação"}
+RETAIL_CNAE = {"id": 4711302, "text": "Comércio varejista de mercadorias em geral"}
+
+
+def generate_valid_cnpjs(quantity: int, seed: int = 7) -> list[str]:
+    """Gera CNPJs válidos (dígitos verificadores corretos) de forma determinística."""
+    rng = random.Random(seed)
+    cnpjs = []
+    while len(cnpjs) < quantity:
+        base = "".join(rng.choice("0123456789") for _ in range(8)) + "0001"
+        for check_digits in range(100):
+            cnpj = validate_cnpj(f"{base}{check_digits:02d}")
+            if cnpj:
+                cnpjs.append(cnpj)
+                break
+    return cnpjs
+
+
+def fake_company_payload(cnpj: str) -> dict:
+    """Monta um payload no formato da API CNPJA. Um em cada cinco CNPJs não é educacional."""
+    number = int(cnpj)
+    return {
+        "taxId": cnpj,
+        "founded": f"{1990 + number % 30}-03-10",
+        "head": True,
+        "status": {"id": 2, "text": "Ativa"},
+        "company": {
+            "name": f"INSTITUTO DE ENSINO {cnpj[:8]} LTDA",
+            "equity": float((number % 7) * 100000),
+            "nature": {"text": "Sociedade Empresária Limitada"},
+            "size": {"text": "Demais"},
+            "members": [
+                {"since": "2015-01-01", "role": {"text": "Sócio-Administrador"}, "person": {"name": f"SOCIO {i}"}}
+                for i in range(number % 4)
+            ],
+        },
+        "address": {"city": "São Paulo", "state": "SP"},
+        "mainActivity": RETAIL_CNAE if number % 5 == 0 else EDUCATION_CNAE,
+        "sideActivities": [],
+        "registrations": [{"state": "SP", "enabled": number % 3 != 0, "status": {"text": "Sem restrição"}}],
+    }
+
+
+class FakeCNPJAServer:
+    """
+    Servidor HTTP local que imita o endpoint /office/{cnpj} da API CNPJA.
+
+    Args:
+        latency (float): Latência de cada resposta, em segundos.
+        error_rate (float): Fração das requisições respondidas com 503.
+        rate_limited_rate (float): Fração das requisições respondidas com 429 (com Retry-After).
+        retry_after (int): Valor do cabeçalho Retry-After das respostas 429, em segundos.
+        seed (int): Semente do gerador de erros.
+    """
+
+    def __init__(self, latency: float = 0.05, error_rate: float = 0.0, rate_limited_rate: float = 0.0,
+                 retry_after: int = 1, seed: int = 1):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limited_rate = rate_limited_rate
+        self.retry_after = retry_after
+        self.requests = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def _draw(self) -> float:
+        with self._lock:
+            self.requests += 1
+            return self._rng.random()
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                time.sleep(fake.latency)
+                parts = self.path.strip("/").split("/")
+                draw = fake._draw()
+                if len(parts) != 2 or parts[0] != "office":
+                    self._send(404, {"message": "Not Found"})
+                elif draw < fake.rate_limited_rate:
+                    self._send(429, {"message": "Too Many Requests"}, {"Retry-After": str(fake.retry_after)})
+                elif draw < fake.rate_limited_rate + fake.error_rate:
+                    self._send(503, {"message": "Service Unavailable"})
+                else:
+                    self._send(200, fake_company_payload(parts[1]))
+
+            def _send(self, status, body, headers=None):
+                payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class FakeResponse:
+    """Resposta no formato mínimo usado do SDK do Gemini (.text e .usage_metadata)."""
+
+    def __init__(self, text: str, prompt_tokens: int):
+        self.text = text
+        self.usage_metadata = type("UsageMetadata", (), {
+            "prompt_token_count": prompt_tokens,
+            "candidates_token_count": len(text) // 4,
+            "total_token_count": prompt_tokens + len(text) // 4,
+        })()
+
+
+class FakeGenerativeModel:
+    """
+    Substituto de genai.GenerativeModel. A latência e a taxa de erros são atributos
+    de classe, configurados pelo benchmark antes da execução. A latência cresce com o
+    tamanho da resposta (output_latency_per_1k segundos por 1.000 tokens gerados),
+    malformed_rate é a fração das respostas agrupadas que chegam truncadas e
+    requests_per_minute simula a cota de requisições do Gemini (as chamadas aguardam a vez).
+    """
+
+    latency = 0.5
+    error_rate = 0.0
+    malformed_rate = 0.0
+    output_latency_per_1k = 0.0
+    calls = 0
+    prompt_tokens = 0
+    response_tokens = 0
+    _quota = TokenBucket(0)
+    _rng = random.Random(3)
+    _lock = threading.Lock()
+
+    def __init__(self, model_name, generation_config=None, **kwargs):
+        self.model_name = model_name
+        self.generation_config = generation_config
+
+    @classmethod
+    def configure(cls, latency: float, error_rate: float = 0.0, seed: int = 3, malformed_rate: float = 0.0,
+                  output_latency_per_1k: float = 0.0, requests_per_minute: float = 0):
+        cls.latency = latency
+        cls.error_rate = error_rate
+        cls.malformed_rate = malformed_rate
+        cls.output_latency_per_1k = output_latency_per_1k
+        cls.calls = 0
+        cls.prompt_tokens = 0
+        cls.response_tokens = 0
+        cls._quota = TokenBucket(requests_per_minute / 60)
+        cls._rng = random.Random(seed)
+
+    def generate_content(self, content, stream=False, **kwargs):
+        self._quota.acquire()
+        with self._lock:
+            FakeGenerativeModel.calls += 1
+            failed = self._rng.random() < self.error_rate
+            malformed = self._rng.random() < self.malformed_rate
+        if failed:
+            time.sleep(self.latency)
+            raise RuntimeError("Falha simulada do Gemini")
+
+        business = {
+            "resumo_analise": "Instituição de ensino ativa com capital compatível.",
+            "pontos_fortes": ["Empresa ativa há mais de 2 anos.", "CNAE de educação."],
+            "pontos_fracos": [],
+            "pontos_atencao": ["Verificar documentação societária."],
+            "recomendacao_qualitativa": "Seguir com a análise padrão.",
+        }
+        scoring = {
+            "score": 80,
+            "classificacao": "APROVADO",
+            "pontos_positivos": ["Situação ATIVA.", "CNAE 85.xx.", "Sem restrições."],
+            "pontos_negativos": [],
+            "recomendacao": "Aprovar parceria com verificação padrão de documentos.",
+        }
+        result = {**business, **scoring, "analise_negocio": business, "scoring": scoring}
+        content = str(content)
+        if '"empresas":[' in content:
+            # Requisição agrupada: um resultado por CNPJ; truncada, perde a última empresa
+            cnpjs = dict.fromkeys(re.findall(r'\{"cnpj":"(\d{14})"', content)) # O prompt pode repetir os dados
+            entries = [{"cnpj": cnpj, "resultado": result} for cnpj in cnpjs]
+            text = "```json\n" + json.dumps(entries[:-1] if malformed else entries, ensure_ascii=False) + "\n```"
+        else:
+            text = "```json\n" + json.dumps(result, ensure_ascii=False) + "\n```"
+        response = FakeResponse(text, prompt_tokens=len(content) // 4)
+        with self._lock:
+            FakeGenerativeModel.prompt_tokens += response.usage_metadata.prompt_token_count
+            FakeGenerativeModel.response_tokens += response.usage_metadata.candidates_token_count
+        time.sleep(self.latency + self.output_latency_per_1k * response.usage_metadata.candidates_token_count / 1000)
+        if stream:
+            return [FakeResponse(text[i:i + 40], 0) for i in range(0, len(text), 40)]
+        return response
+
+
+def install_fake_gemini(latency: float, error_rate: float = 0.0):
+    """Substitui o GenerativeModel e o configure do SDK do Gemini pelos substitutos locais."""
+    import clientes
+
+    FakeGenerativeModel.configure(latency, error_rate)
+    genai = clientes.load_genai()
+    genai.GenerativeModel = FakeGenerativeModel
+    genai.configure = lambda **kwargs: None
+    clientes.close_clients()
+    os.environ.setdefault("GEMINI_API_KEY", "chave-falsa-benchmark")
@@ -0,0 +1,206 @@
+"""
+    Suíte de Benchmarks Offline.
+
+    Mede, sem gastar cota das APIs, a vazão e a latência por etapa do pipeline
+    usando os substitutos locais da API CNPJA e do Gemini (benchmarks/fakes.py).
+    Executa o validador de CNPJ, o carregamento de configuração e analyze_cnpj
+    em vários tamanhos de lote e níveis de concorrência, e grava um JSON
+    comparável entre versões.
+
+    Uso:
+        python benchmarks/suite.py --lotes 20 100 --concorrencia 1 4 16 --saida bench.json
+        python benchmarks/suite.py --latencia-cnpja 0.2 --taxa-429 0.1 --latencia-gemini 1.0 --taxa-erro-gemini 0.05
+    """
+
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'PythonScripts')))
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from fakes import FakeCNPJAServer, FakeGenerativeModel, generate_valid_cnpjs, install_fake_gemini
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """Percentil por interpolação linear (fraction entre 0 e 1)."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def latency_summary(latencies: list[float]) -> dict:
+    return {
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "max_ms": round(max(latencies) * 1000, 3) if latencies else 0.0,
+    }
+
+
+def bench_validator(quantity: int) -> dict:
+    from validador_cnpj import validate_cnpj, validate_cnpjs
+
+    cnpjs = generate_valid_cnpjs(min(quantity, 2000)) * (quantity // min(quantity, 2000) or 1)
+
+    started = time.perf_counter()
+    for cnpj in cnpjs:
+        validate_cnpj(cnpj)
+    scalar_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    validate_cnpjs(cnpjs)
+    vector_seconds = time.perf_counter() - started
+
+    return {
+        "quantidade": len(cnpjs),
+        "escalar_cnpjs_por_segundo": round(len(cnpjs) / scalar_seconds),
+        "vetorizado_cnpjs_por_segundo": round(len(cnpjs) / vector_seconds),
+    }
+
+
+def bench_config(iterations: int) -> dict:
+    from configuracao import ConfigRegistry
+
+    def load(registry):
+        registry.get_prompt('agente_negocio_cnpj')
+        registry.get_prompt('agente_scoring_cnpj')
+        registry.get_valid_cnae_ids()
+
+    cold = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        load(ConfigRegistry())
+        cold.append(time.perf_counter() - started)
+
+    registry = ConfigRegistry()
+    load(registry)
+    warm = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        load(registry)
+        warm.append(time.perf_counter() - started)
+
+    return {"iteracoes": iterations, "frio": latency_summary(cold), "aquecido": latency_summary(warm)}
+
+
+def bench_pipeline(cnpjs: list[str], concurrency: int, mode: str, server: FakeCNPJAServer) -> dict:
+    from analise_cnpj import analyze_cnpj
+
+    def run(cnpj):
+        started = time.perf_counter()
+        analysis = analyze_cnpj(cnpj, mode=mode)
+        return time.perf_counter() - started, analysis
+
+    requests_before = server.requests
+    gemini_calls_before = FakeGenerativeModel.calls
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(run, cnpjs))
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency for latency, _ in outcomes]
+    stage_latencies = {}
+    for _, analysis in outcomes:
+        for stage, seconds in ((analysis or {}).get("tempos") or {}).items():
+            stage_latencies.setdefault(stage, []).append(seconds)
+
+    return {
+        "tamanho_lote": len(cnpjs),
+        "concorrencia": concurrency,
+        "modo": mode,
+        "erros": sum(1 for _, analysis in outcomes if analysis is None),
+        "cnpjs_por_segundo": round(len(cnpjs) / elapsed, 3),
+        "tempo_total_segundos": round(elapsed, 3),
+        "latencia": latency_summary(latencies),
+        "latencia_por_etapa": {stage: latency_summary(values) for stage, values in sorted(stage_latencies.items())},
+        "requisicoes_cnpja": server.requests - requests_before,
+        "chamadas_gemini": FakeGenerativeModel.calls - gemini_calls_before,
+    }
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(__file__), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks offline do pipeline de análise de CNPJ.")
+    parser.add_argument("--lotes", type=int, nargs="+", default=[20, 100], help="Tamanhos de lote.")
+    parser.add_argument("--concorrencia", type=int, nargs="+", default=[1, 4, 16], help="Níveis de concorrência.")
+    parser.add_argument("--modos", nargs="+", default=["llm"], choices=("llm", "combinado", "local"))
+    parser.add_argument("--latencia-cnpja", type=float, default=0.05, help="Latência do CNPJA falso (s).")
+    parser.add_argument("--taxa-erro-cnpja", type=float, default=0.0, help="Fração de respostas 503.")
+    parser.add_argument("--taxa-429", type=float, default=0.0, help="Fração de respostas 429.")
+    parser.add_argument("--latencia-gemini", type=float, default=0.2, help="Latência do Gemini falso (s).")
+    parser.add_argument("--taxa-erro-gemini", type=float, default=0.0, help="Fração de falhas do Gemini.")
+    parser.add_argument("--limite-cnpja-por-minuto", type=float, default=0,
+                        help="Limite de requisições ao CNPJA (0 = sem limite, para medir o pipeline).")
+    parser.add_argument("--atraso-retentativa", type=float, default=0.05,
+                        help="RETRY_DELAY usado nas retentativas (s).")
+    parser.add_argument("--quantidade-validador", type=int, default=100_000)
+    parser.add_argument("--saida", help="Arquivo JSON de saída (padrão: saída padrão).")
+    parser.add_argument("--metricas", metavar="ARQUIVO",
+                        help="Grava as métricas por etapa (formato do Prometheus) acumuladas na execução.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    os.environ.update({
+        "CACHE_ENABLED": "false",
+        "LLM_CACHE_ENABLED": "false",
+        "RESULTS_STORE_ENABLED": "false",
+        "CNPJA_CORPUS_ENABLED": "false",
+        "CNPJA_RATE_LIMIT_PER_MINUTE": str(args.limite_cnpja_por_minuto),
+        "CNPJA_API_KEY": "chave-falsa-benchmark",
+    })
+
+    server = FakeCNPJAServer(args.latencia_cnpja, args.taxa_erro_cnpja, args.taxa_429).start()
+    os.environ["CNPJA_BASE_URL"] = server.base_url
+    install_fake_gemini(args.latencia_gemini, args.taxa_erro_gemini)
+
+    import analise_cnpj
+    analise_cnpj.RETRY_DELAY = args.atraso_retentativa
+
+    report = {
+        "versao": git_revision(),
+        "data": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "parametros": vars(args),
+        "validador": bench_validator(args.quantidade_validador),
+        "configuracao": bench_config(200),
+        "pipeline": [],
+    }
+    try:
+        for mode in args.modos:
+            for batch_size in args.lotes:
+                cnpjs = generate_valid_cnpjs(batch_size)
+                for concurrency in args.concorrencia:
+                    report["pipeline"].append(bench_pipeline(cnpjs, concurrency, mode, server))
+    finally:
+        server.stop()
+
+    if args.metricas:
+        from metricas import write_prometheus
+        write_prometheus(args.metricas)
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
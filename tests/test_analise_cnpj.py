@@ -0,0 +1,106 @@
+"""
+    Testes do cancelamento de uma análise em andamento.
+
+    Usa o substituto local da API CNPJA e o modelo falso do Gemini (benchmarks/fakes.py).
+    """
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'PythonScripts'))
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import analise_cnpj
+import limitador_taxa
+from fakes import FakeCNPJAServer, FakeGenerativeModel, fake_company_payload, generate_valid_cnpjs
+
+
+class CancellationTest(unittest.TestCase):
+
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        environment = mock.patch.dict(os.environ, {
+            "CACHE_ENABLED": "false",
+            "LLM_CACHE_ENABLED": "true",
+            "CACHE_DIR": cache_dir.name,
+            "CNPJA_RATE_LIMIT_PER_MINUTE": "600",
+            "CNPJA_API_KEY": "chave-falsa-teste",
+            "CNPJA_CORPUS_ENABLED": "false",
+            "CNPJ_DATA_SOURCE": "api",
+            "PIPELINE_MODE": "llm",
+            "LLM_BATCH_SIZE": "1",
+        })
+        environment.start()
+        self.addCleanup(environment.stop)
+        analise_cnpj._open_llm_cache.reset()
+        self.addCleanup(self._close_llm_cache)
+        mock.patch.object(limitador_taxa, "_cnpja_bucket", None).start()
+        FakeGenerativeModel.configure(latency=0.05)
+        mock.patch.object(analise_cnpj, "get_gemini_model", return_value=FakeGenerativeModel("gemini-teste")).start()
+        self.addCleanup(mock.patch.stopall)
+        # Empresa educacional, com capital e inscrição ativa: não cai na desqualificação automática
+        self.cnpj = next(cnpj for cnpj in generate_valid_cnpjs(20) if all(int(cnpj) % n for n in (3, 5, 7)))
+        self.cancel_event = threading.Event()
+
+    def _close_llm_cache(self):
+        cache = analise_cnpj._open_llm_cache.reset()
+        if cache is not None:
+            cache.close()
+
+    def start_server(self, **kwargs) -> FakeCNPJAServer:
+        server = FakeCNPJAServer(**kwargs).start()
+        self.addCleanup(server.stop)
+        os.environ["CNPJA_BASE_URL"] = server.base_url
+        return server
+
+    def cancel_after(self, seconds: float):
+        timer = threading.Timer(seconds, self.cancel_event.set)
+        timer.start()
+        self.addCleanup(timer.cancel)
+
+    def test_cancel_during_slow_fetch_skips_the_agents(self):
+        self.start_server(latency=0.3)
+        self.cancel_after(0.1)
+
+        analysis = analise_cnpj.analyze_cnpj(self.cnpj, on_item=lambda key, item: None,
+                                             cancel_event=self.cancel_event)
+
+        self.assertIsNone(analysis)
+        self.assertEqual(FakeGenerativeModel.calls, 0)
+
+    def test_cancel_interrupts_the_retry_wait(self):
+        server = self.start_server(latency=0.05, error_rate=1.0)
+        self.cancel_after(0.2)
+
+        started = time.perf_counter()
+        company_data = analise_cnpj.fetch_cnpj_data(self.cnpj, cancel_event=self.cancel_event)
+
+        self.assertIsNone(company_data)
+        self.assertLess(time.perf_counter() - started, analise_cnpj.RETRY_DELAY) # Não esperou o backoff
+        self.assertEqual(server.requests, 1)
+
+    def test_cancel_stops_streaming_and_skips_the_cache(self):
+        items = []
+
+        def on_item(key, item):
+            items.append(item)
+            self.cancel_event.set() # Cancela ao receber o primeiro item
+
+        analysis = analise_cnpj.analyze_company_data(self.cnpj, fake_company_payload(self.cnpj), "llm",
+                                                     on_item=on_item, cancel_event=self.cancel_event)
+
+        self.assertIsNone(analysis)
+        self.assertEqual(FakeGenerativeModel.calls, 1) # O agente de scoring não foi chamado
+        self.assertLess(len(items), 3) # pontos_fortes (2) + pontos_atencao (1) se o stream fosse até o fim
+        self.assertEqual(analise_cnpj.get_llm_cache().stats()["entradas"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+"""
+    Testes do armazenamento de resultados das análises.
+    """
+
+import os
+import sys
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from unittest import mock
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'PythonScripts'))
+
+import armazenamento_resultados
+from armazenamento_resultados import ResultStore, get_result_store, save_analysis
+
+
+def analysis_for(cnpj: str, classification: str, score) -> dict:
+    return {
+        "resultado": {"cnpj": cnpj, "razao_social": f"EMPRESA {cnpj}", "classification": classification,
+                      "score": score},
+        "dados_empresa": {"taxId": cnpj},
+        "analise_negocio": {"pontos_fortes": []},
+        "analise_scoring": {"score": score},
+        "tempos": {"total_segundos": 1.0},
+        "modo": "local",
+        "versao_config": "abc123",
+    }
+
+
+class FrozenDatetime(datetime):
+    """datetime com now() controlado pelo teste."""
+    current = None
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.current
+
+
+class ResultStoreQueryTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.store = ResultStore(os.path.join(directory.name, 'resultados.sqlite3'))
+        self.addCleanup(self.store.close)
+        rows = [
+            ("2025-09-30T23:59:59", "11111111000111", "APROVADO", 85),
+            ("2025-10-01T00:00:00", "22222222000122", "ATENÇÃO", 60),
+            ("2025-10-15T12:00:00", "11111111000111", "ATENÇÃO", 70),
+            ("2025-10-31T23:59:59", "33333333000133", "REPROVADO", 10),
+            ("2025-11-01T00:00:00", "22222222000122", "APROVADO", 90),
+            ("2025-11-01T00:00:00", "44444444000144", "REPROVADO", "n/d"), # Score não numérico
+        ]
+        with mock.patch.object(armazenamento_resultados, "datetime", FrozenDatetime):
+            for created_at, cnpj, classification, score in rows:
+                FrozenDatetime.current = datetime.fromisoformat(created_at).replace(tzinfo=timezone.utc)
+                self.store.append(analysis_for(cnpj, classification, score))
+
+    def cnpjs(self, **filters) -> list[str]:
+        return [analysis["cnpj"] for analysis in self.store.query(**filters)]
+
+    def test_filters(self):
+        self.assertEqual(self.cnpjs(cnpj="11111111000111"), ["11111111000111"] * 2)
+        self.assertEqual(self.cnpjs(classificacao="REPROVADO"), ["44444444000144", "33333333000133"])
+        self.assertEqual(self.cnpjs(score_min=70), ["22222222000122", "11111111000111", "11111111000111"])
+        self.assertEqual(self.cnpjs(score_min=60, score_max=70), ["11111111000111", "22222222000122"])
+        self.assertEqual(self.cnpjs(classificacao="ATENÇÃO", score_min=65), ["11111111000111"])
+
+    def test_date_range_is_inclusive_start_exclusive_end(self):
+        october = self.cnpjs(desde="2025-10-01", ate="2025-11-01")
+        self.assertEqual(october, ["33333333000133", "11111111000111", "22222222000122"])
+        self.assertEqual(len(self.cnpjs(desde="2025-11-01")), 2)
+
+    def test_results_are_newest_first_and_limited(self):
+        analyses = self.store.query()
+        self.assertEqual([analysis["criado_em"][:10] for analysis in analyses],
+                         ["2025-11-01", "2025-11-01", "2025-10-31", "2025-10-15", "2025-10-01", "2025-09-30"])
+        self.assertGreater(analyses[0]["id"], analyses[1]["id"]) # Mesmo horário: a última gravada primeiro
+        self.assertEqual(len(self.store.query(limit=2)), 2)
+        self.assertIsNone(analyses[0]["score"])
+
+    def test_latest(self):
+        latest = self.store.latest("22222222000122", include_payload=True)
+        self.assertEqual((latest["classificacao"], latest["score"]), ("APROVADO", 90))
+        self.assertEqual(latest["dados_empresa"], {"taxId": "22222222000122"})
+        self.assertNotIn("dados_empresa", self.store.latest("22222222000122"))
+        self.assertIsNone(self.store.latest("99999999000199"))
+
+
+class SaveAnalysisTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        environment = mock.patch.dict(os.environ, {
+            "RESULTS_STORE_ENABLED": "true",
+            "RESULTS_DB_PATH": os.path.join(directory.name, 'resultados.sqlite3'),
+        })
+        environment.start()
+        self.addCleanup(environment.stop)
+        get_result_store.reset()
+        self.addCleanup(self._close_store)
+
+    def _close_store(self):
+        store = get_result_store.reset()
+        if store is not None:
+            store.close()
+
+    def test_concurrent_saves_from_threads(self):
+        def save(index):
+            return save_analysis(analysis_for(f"{index % 10:014d}", "APROVADO", index % 100))
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            ids = list(executor.map(save, range(200)))
+
+        self.assertNotIn(None, ids)
+        self.assertEqual(len(set(ids)), 200)
+        self.assertEqual(len(get_result_store().query()), 200)
+        self.assertEqual(len(get_result_store().query(cnpj=f"{3:014d}")), 20)
+
+    def test_disabled_store_saves_nothing(self):
+        with mock.patch.dict(os.environ, {"RESULTS_STORE_ENABLED": "false"}):
+            self.assertIsNone(save_analysis(analysis_for("11111111000111", "APROVADO", 80)))
+        self.assertEqual(get_result_store().query(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+"""
+    Testes dos limites e dos contadores incrementais do cache em disco.
+    """
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'PythonScripts'))
+
+from cache_sqlite import EVICTION_LOW_WATER, SQLiteCache, lazy_singleton, open_sqlite
+
+
+class SQLiteCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, 'cache.sqlite3')
+
+    def open(self, **limits) -> SQLiteCache:
+        cache = SQLiteCache(self.path, **limits)
+        self.addCleanup(cache.close)
+        return cache
+
+    def assert_totals_match(self, cache: SQLiteCache):
+        stats = cache.stats()
+        self.assertEqual((cache._entries, cache._bytes), (stats["entradas"], stats["bytes"]))
+
+    def test_entry_limit_evicts_least_recently_used(self):
+        cache = self.open(ttl_seconds=0, max_entries=10)
+        for index in range(10):
+            cache.set(f"chave{index}", {"valor": index})
+        cache.get("chave0") # Passa a ser a mais recente
+        cache.set("chave10", {"valor": 10})
+
+        self.assertEqual(cache.stats()["entradas"], int(10 * EVICTION_LOW_WATER))
+        self.assertIsNotNone(cache.get("chave0"))
+        self.assertIsNotNone(cache.get("chave10"))
+        self.assertIsNone(cache.get("chave1"))
+        self.assert_totals_match(cache)
+
+    def test_byte_limit(self):
+        cache = self.open(ttl_seconds=0, max_entries=0, max_bytes=1000)
+        for index in range(50):
+            cache.set(f"chave{index}", "x" * 98)
+            self.assertLessEqual(cache.stats()["bytes"], 1000)
+        self.assert_totals_match(cache)
+
+    def test_totals_follow_replace_delete_and_expiry(self):
+        cache = self.open(ttl_seconds=0.05, max_entries=100)
+        cache.set("a", "1")
+        cache.set("a", "1234")
+        cache.set("b", [1, 2, 3])
+        cache.delete("b")
+        cache.delete("inexistente")
+        self.assert_totals_match(cache)
+        time.sleep(0.1)
+        self.assertIsNone(cache.get("a"))
+        self.assert_totals_match(cache)
+
+    def test_totals_are_loaded_from_existing_file(self):
+        cache = self.open(ttl_seconds=0)
+        for index in range(5):
+            cache.set(f"chave{index}", index)
+        reopened = self.open(ttl_seconds=0)
+        self.assertEqual(reopened._entries, 5)
+        self.assert_totals_match(reopened)
+
+
+class SharedHelpersTest(unittest.TestCase):
+
+    def test_open_sqlite_uses_wal(self):
+        with tempfile.TemporaryDirectory() as directory:
+            conn = open_sqlite(os.path.join(directory, 'sub', 'banco.sqlite3'))
+            self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+            conn.close()
+
+    def test_lazy_singleton_creates_once(self):
+        calls = []
+        barrier = threading.Barrier(8)
+
+        @lazy_singleton
+        def get_resource():
+            calls.append(1)
+            time.sleep(0.05)
+            return object()
+
+        def call():
+            barrier.wait()
+            return get_resource()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            instances = list(executor.map(lambda _: call(), range(8)))
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(instance is instances[0] for instance in instances))
+        self.assertIs(get_resource.reset(), instances[0])
+        self.assertIsNot(get_resource(), instances[0])
+
+    def test_lazy_singleton_retries_after_none(self):
+        results = [None, "recurso"]
+
+        @lazy_singleton
+        def get_resource():
+            return results.pop(0)
+
+        self.assertIsNone(get_resource())
+        self.assertEqual(get_resource(), "recurso")
+        self.assertEqual(get_resource(), "recurso")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+"""
+    Testes do módulo de configuração.
+    """
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'PythonScripts'))
+
+from analise_cnpj import config_files_for_mode
+from configuracao import ConfigRegistry, env_flag
+
+
+class EnvFlagTest(unittest.TestCase):
+
+    def test_accepted_values(self):
+        for value, expected in {"1": True, "true": True, " SIM ": True, "Yes": True,
+                                "0": False, "false": False, "não": False, "": False}.items():
+            with self.subTest(value=value), mock.patch.dict(os.environ, {"FLAG_TESTE": value}):
+                self.assertIs(env_flag("FLAG_TESTE", not expected), expected)
+
+    def test_default_when_unset(self):
+        with mock.patch.dict(os.environ):
+            os.environ.pop("FLAG_TESTE", None)
+            self.assertIs(env_flag("FLAG_TESTE", True), True)
+            self.assertIs(env_flag("FLAG_TESTE", False), False)
+
+
+class VersionTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.config_dir = os.path.join(directory.name, 'config')
+        shutil.copytree(os.path.join(ROOT, 'config'), self.config_dir)
+        self.registry = ConfigRegistry(self.config_dir)
+
+    def edit(self, file_name: str, text: str):
+        path = os.path.join(self.config_dir, file_name)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(text)
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000)) # Garante um mtime diferente
+
+    def test_version_is_memoized_until_a_file_changes(self):
+        version = self.registry.version()
+        with mock.patch("configuracao.os.stat", side_effect=AssertionError("arquivo conferido")), \
+                mock.patch("configuracao.os.listdir", side_effect=AssertionError("diretório listado")), \
+                mock.patch("configuracao.hashlib.sha256", side_effect=AssertionError("hash recalculado")):
+            self.assertEqual(self.registry.version(), version)
+
+        self.edit('agente_scoring_cnpj.txt', "\n")
+        self.assertEqual(self.registry.version(), version) # Ainda não conferido
+        self.registry.get_prompt('agente_scoring_cnpj') # Como o pipeline faz a cada análise
+        changed = self.registry.version()
+        self.assertNotEqual(changed, version)
+        self.assertEqual(ConfigRegistry(self.config_dir).version(), changed)
+
+    def test_version_covers_every_file_after_a_single_prompt_read(self):
+        expected = ConfigRegistry(self.config_dir).version()
+        self.registry.get_prompt('agente_scoring_cnpj')
+        self.assertEqual(self.registry.version(), expected)
+
+    def test_mode_version_ignores_files_the_mode_does_not_read(self):
+        files = config_files_for_mode("llm")
+        version = self.registry.version(files)
+        self.assertNotEqual(version, self.registry.version())
+
+        self.edit('agente_combinado_cnpj.txt', "\n")
+        self.edit('agente_recomendacao_cnpj.txt', "\n")
+        self.assertEqual(self.registry.version(files), version)
+
+        self.edit('criterios_scoring.json', " ")
+        changed = self.registry.version(files)
+        self.assertNotEqual(changed, version)
+        self.edit('agente_negocio_cnpj.txt', "\n")
+        self.assertNotEqual(self.registry.version(files), changed)
+
+    def test_local_mode_reads_the_recommendation_prompt_only_when_enabled(self):
+        with mock.patch.dict(os.environ, {"LLM_RECOMENDACAO": "false"}):
+            self.assertEqual(config_files_for_mode("local"), ('criterios_scoring.json', 'cnae_educacao.json'))
+        with mock.patch.dict(os.environ, {"LLM_RECOMENDACAO": "true"}):
+            self.assertIn('agente_recomendacao_cnpj.txt', config_files_for_mode("local"))
+
+
+if __name__ == "__main__":
+    unittest.main()
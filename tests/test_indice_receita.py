@@ -0,0 +1,76 @@
+"""
+    Testes da importação dos dados abertos da Receita Federal e da conversão para o
+    formato da API CNPJA, com os arquivos sintéticos de tests/fixtures/receita.
+    """
+
+import os
+import sys
+import tempfile
+import unittest
+from datetime import date
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'PythonScripts'))
+
+from indice_receita import ReceitaIndex, import_dumps
+from motor_scoring import compute_score
+
+FIXTURES = os.path.join(ROOT, 'tests', 'fixtures', 'receita')
+
+
+def fixture(name: str) -> list[str]:
+    return [os.path.join(FIXTURES, name)]
+
+
+class ReceitaIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.index_path = os.path.join(self.directory.name, 'receita.sqlite3')
+        self.stats = import_dumps(fixture('Estabelecimentos.zip'), fixture('Empresas.zip'), self.index_path,
+                                  cnae_prefix='85', municipios_paths=fixture('Municipios.zip'),
+                                  cnaes_paths=fixture('Cnaes.zip'))
+        self.index = ReceitaIndex(self.index_path)
+        self.addCleanup(self.index.close)
+
+    def test_import_filters_by_cnae_prefix(self):
+        self.assertEqual(self.stats["estabelecimentos"], 2)
+        self.assertEqual(self.stats["empresas"], 2)
+        self.assertEqual(self.stats["municipios"], 2)
+        self.assertEqual(self.stats["cnaes"], 2)
+        self.assertIsNone(self.index.get("00000000000191"))
+
+    def test_list_cnpjs(self):
+        self.assertEqual(sorted(self.index.list_cnpjs()), ["11222333000181", "33000167000101"])
+        self.assertEqual(list(self.index.list_cnpjs(cnae_prefix="85.13", situacao=2)), ["11222333000181"])
+        self.assertEqual(list(self.index.list_cnpjs(cnae_prefix="8520-1")), ["33000167000101"])
+        self.assertEqual(list(self.index.list_cnpjs(situacao=3)), [])
+
+    def test_to_cnpja_format(self):
+        company = self.index.get("11222333000181")
+        self.assertEqual(company["taxId"], "11222333000181")
+        self.assertEqual(company["founded"], "2005-01-03")
+        self.assertEqual(company["status"], {"id": 2, "text": "Ativa"})
+        self.assertEqual(company["company"]["name"], "ESCOLA ALFA LTDA")
+        self.assertEqual(company["company"]["equity"], 99999.5)
+        self.assertEqual(company["company"]["size"]["text"], "Empresa de Pequeno Porte")
+        self.assertEqual(company["address"], {"state": "SP", "city": "SAO PAULO"})
+        self.assertEqual(company["mainActivity"]["id"], 8513900)
+        self.assertEqual(company["sideActivities"][1],
+                         {"id": 4761003, "text": "Comércio varejista de artigos de papelaria"})
+        self.assertEqual(company["sideActivities"][2], {"id": 9999999}) # Sem descrição conhecida
+        self.assertNotIn("registrations", company)
+        self.assertNotIn("members", company["company"])
+        self.assertEqual(company["dados_indisponiveis"], ["company.members", "registrations"])
+
+    def test_unavailable_restrictions_are_not_scored(self):
+        scoring = compute_score(self.index.get("11222333000181"), reference_date=date(2025, 10, 16))
+        self.assertEqual(scoring["pontuacao_por_criterio"]["restricoes"], 0)
+        self.assertEqual(scoring["pontuacao_por_criterio"]["capital_social"], 5)
+        self.assertEqual(scoring["criterios_indisponiveis"], ["restricoes"])
+        self.assertEqual(scoring["score"], 65)
+
+
+if __name__ == "__main__":
+    unittest.main()
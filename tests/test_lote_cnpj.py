@@ -0,0 +1,76 @@
+"""
+    Testes do processamento em lote (janela de CNPJs em andamento).
+    """
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'PythonScripts'))
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import lote_cnpj
+from fakes import generate_valid_cnpjs
+from resiliencia import TransientCNPJAError
+
+
+class ProcessBatchWindowTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.output_path = os.path.join(directory.name, "saida.jsonl")
+        self.cnpjs = generate_valid_cnpjs(60)
+        self.read = 0
+        self.finished = 0
+        self.max_outstanding = 0
+        self.lock = threading.Lock()
+
+    def source(self):
+        """Entrada lida sob demanda, como read_cnpjs."""
+        for cnpj in self.cnpjs:
+            with self.lock:
+                self.read += 1
+                self.max_outstanding = max(self.max_outstanding, self.read - self.finished)
+            yield cnpj
+
+    def analyze_row(self, cnpj):
+        time.sleep(0.002)
+        with self.lock:
+            self.finished += 1
+        return {"cnpj": cnpj, "status": "ok"}
+
+    def test_input_is_read_within_the_window(self):
+        stats = lote_cnpj.process_batch(self.source(), self.output_path, max_workers=3, analyze_row=self.analyze_row)
+
+        self.assertEqual(stats["ok"], len(self.cnpjs))
+        self.assertLessEqual(self.max_outstanding, 3 * lote_cnpj.IN_FLIGHT_PER_WORKER)
+        with open(self.output_path, encoding='utf-8') as f:
+            self.assertEqual(sorted(json.loads(line)["cnpj"] for line in f), sorted(self.cnpjs))
+
+    def test_scheduled_retries_hold_their_slot(self):
+        failures = {}
+
+        def analyze_row(cnpj):
+            with self.lock:
+                failures[cnpj] = failures.get(cnpj, 0) + 1
+                first_try = failures[cnpj] == 1
+            if first_try:
+                raise TransientCNPJAError("503 Service Unavailable")
+            return self.analyze_row(cnpj)
+
+        with mock.patch.object(lote_cnpj, "cnpja_retry_delay", return_value=0.01):
+            stats = lote_cnpj.process_batch(self.source(), self.output_path, max_workers=2, analyze_row=analyze_row)
+
+        self.assertEqual(stats["ok"], len(self.cnpjs))
+        self.assertLessEqual(self.max_outstanding, 2 * lote_cnpj.IN_FLIGHT_PER_WORKER)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+"""
+    Testes do agrupamento de chamadas ao Gemini (GeminiBatcher) com o modelo falso
+    de benchmarks/fakes.py.
+    """
+
+import json
+import os
+import sys
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'PythonScripts'))
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from fakes import FakeGenerativeModel, generate_valid_cnpjs
+from lote_gemini import GeminiBatcher, build_batch_content, parse_batch_response, split_shared_context
+from projecao_contexto import compact_json
+
+PROMPT = "Analise a empresa: {response.json}"
+CRITERIA = {"situacao": {"peso": 30, "faixas": [{"limite_inferior": 0, "pontos": 10}]}, "capital": {"peso": 20}}
+
+
+def context_for(cnpj: str) -> dict:
+    return {
+        "criterios_scoring": CRITERIA,
+        "dados_empresa": {"taxId": cnpj, "situacao": "Ativa", "capital": int(cnpj[:4])},
+    }
+
+
+def batch_data(content: str) -> dict:
+    """Dados JSON de uma requisição agrupada (as instruções do lote vêm depois deles)."""
+    return json.JSONDecoder().raw_decode(content, content.index('{'))[0]
+
+
+def batch_entries(content: str) -> list[str]:
+    """CNPJs das empresas de uma requisição agrupada."""
+    return [company["cnpj"] for company in batch_data(content)["empresas"]]
+
+
+class ParseBatchResponseTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cnpjs = generate_valid_cnpjs(3)
+
+    def test_missing_duplicate_and_unrequested_cnpjs(self):
+        first, second, third = self.cnpjs
+        formatted = f"{first[:2]}.{first[2:5]}.{first[5:8]}/{first[8:12]}-{first[12:]}"
+        response = "```json\n" + json.dumps([
+            {"cnpj": formatted, "resultado": {"score": 1}},
+            {"cnpj": second, "resultado": {"score": 2}},
+            {"cnpj": second, "resultado": {"score": 3}}, # Duplicado: vale o último
+            {"cnpj": "00000000000191", "resultado": {"score": 4}}, # Não pedido
+            {"cnpj": third, "resultado": "texto em vez de objeto"},
+        ]) + "\n```"
+        self.assertEqual(parse_batch_response(response, self.cnpjs), {first: {"score": 1}, second: {"score": 3}})
+
+    def test_truncated_or_empty_response(self):
+        text = json.dumps([{"cnpj": cnpj, "resultado": {"score": 1}} for cnpj in self.cnpjs])
+        for response in (text[:-10], text[:len(text) // 2], "", None, "sem JSON", '{"cnpj": "1"}'):
+            with self.subTest(response=response):
+                self.assertEqual(parse_batch_response(response, self.cnpjs), {})
+
+
+class SharedContextTest(unittest.TestCase):
+
+    def test_shared_context_is_sent_once_and_expands_back_per_company(self):
+        cnpjs = generate_valid_cnpjs(3)
+        contexts = [context_for(cnpj) for cnpj in cnpjs]
+        shared, individual = split_shared_context(contexts)
+
+        self.assertEqual(shared, {"criterios_scoring": CRITERIA, "dados_empresa": {"situacao": "Ativa"}})
+        for context, own in zip(contexts, individual):
+            expanded = {**shared, **own, "dados_empresa": {**shared["dados_empresa"], **own["dados_empresa"]}}
+            self.assertEqual(expanded, context)
+
+        content = build_batch_content(PROMPT, cnpjs, contexts)
+        self.assertEqual(content.count(compact_json(CRITERIA)), 1)
+        self.assertEqual(batch_entries(content), cnpjs)
+
+    def test_identical_contexts_leave_only_the_cnpj_per_company(self):
+        cnpjs = generate_valid_cnpjs(2)
+        context = {"criterios_scoring": CRITERIA}
+        content = build_batch_content(PROMPT, cnpjs, [context, dict(context)])
+        data = batch_data(content)
+        self.assertEqual(data["contexto_comum"], context)
+        self.assertEqual(data["empresas"], [{"cnpj": cnpj} for cnpj in cnpjs])
+
+
+class GeminiBatcherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cnpjs = generate_valid_cnpjs(4)
+        self.sent = []
+
+    def fake_send(self, content: str):
+        self.sent.append(batch_entries(content))
+        response = FakeGenerativeModel("gemini-teste").generate_content(content)
+        usage = response.usage_metadata
+        return response.text, (usage.prompt_token_count, usage.candidates_token_count)
+
+    def submit_all(self, batcher: GeminiBatcher) -> dict:
+        with ThreadPoolExecutor(max_workers=len(self.cnpjs)) as executor:
+            futures = {cnpj: executor.submit(batcher.submit, "scoring", PROMPT, cnpj, context_for(cnpj))
+                       for cnpj in self.cnpjs}
+        return {cnpj: future.result() for cnpj, future in futures.items()}
+
+    def test_full_response_answers_every_company_in_one_call(self):
+        FakeGenerativeModel.configure(latency=0.0)
+        results = self.submit_all(GeminiBatcher(self.fake_send, batch_size=4, wait_seconds=5))
+
+        self.assertEqual(len(self.sent), 1)
+        self.assertEqual(sorted(self.sent[0]), sorted(self.cnpjs))
+        for text, prompt_tokens, response_tokens in results.values():
+            self.assertEqual(json.loads(text)["score"], 80)
+            self.assertGreater(prompt_tokens, 0)
+        self.assertLessEqual(sum(result[1] for result in results.values()), FakeGenerativeModel.prompt_tokens)
+
+    def test_truncated_array_falls_back_for_the_missing_company(self):
+        FakeGenerativeModel.configure(latency=0.0, malformed_rate=1.0) # Cada resposta perde a última empresa
+        results = self.submit_all(GeminiBatcher(self.fake_send, batch_size=4, wait_seconds=5))
+
+        self.assertEqual(len(self.sent), 1) # Uma empresa isolada não é reenviada em lote
+        missing = self.sent[0][-1]
+        self.assertIsNone(results[missing][0])
+        self.assertTrue(all(results[cnpj][0] for cnpj in self.cnpjs if cnpj != missing))
+
+    def test_split_and_resend_down_to_single_calls(self):
+        def answer_first_only(content):
+            cnpjs = batch_entries(content)
+            self.sent.append(cnpjs)
+            return json.dumps([{"cnpj": cnpjs[0], "resultado": {"score": len(self.sent)}}]), (40, 8)
+
+        results = self.submit_all(GeminiBatcher(answer_first_only, batch_size=4, wait_seconds=5))
+
+        first, second = self.sent[0][0], self.sent[1][0]
+        self.assertEqual(len(self.sent), 2) # 4 empresas -> faltam 3 -> [1] individual + [2] em lote -> falta 1
+        self.assertEqual(self.sent[1], self.sent[0][2:])
+        self.assertEqual(json.loads(results[first][0]), {"score": 1})
+        self.assertEqual(json.loads(results[second][0]), {"score": 2})
+        fallbacks = [cnpj for cnpj in self.cnpjs if results[cnpj][0] is None]
+        self.assertEqual(sorted(fallbacks), sorted({self.sent[0][1], self.sent[1][1]}))
+        self.assertEqual(results[first][1:], (10, 2)) # Parcela dos tokens da requisição de que participou
+        self.assertEqual(results[second][1:], (10 + 20, 2 + 4))
+
+    def test_single_company_goes_to_the_individual_call(self):
+        batcher = GeminiBatcher(self.fake_send, batch_size=4, wait_seconds=0.01)
+        self.assertEqual(batcher.submit("scoring", PROMPT, self.cnpjs[0], context_for(self.cnpjs[0])), (None, 0, 0))
+        self.assertEqual(self.sent, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
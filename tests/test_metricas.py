@@ -0,0 +1,25 @@
+"""
+    Testes da exportação das métricas no formato texto do Prometheus.
+    """
+
+import os
+import sys
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'PythonScripts'))
+
+from metricas import MetricsRegistry
+
+
+class PrometheusLabelsTest(unittest.TestCase):
+
+    def test_label_values_are_escaped(self):
+        registry = MetricsRegistry()
+        registry.inc("erros_api_total", api="gemini", tipo='Erro "quota"\nC:\\tmp')
+        self.assertIn('erros_api_total{api="gemini",tipo="Erro \\"quota\\"\\nC:\\\\tmp"} 1',
+                      registry.render_prometheus().splitlines())
+
+
+if __name__ == "__main__":
+    unittest.main()
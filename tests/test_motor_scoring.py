@@ -0,0 +1,37 @@
+"""
+    Testes das faixas de pontuação do motor de scoring.
+    """
+
+import json
+import os
+import sys
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'PythonScripts'))
+
+from motor_scoring import _points_for_range
+
+
+class PointsForRangeTest(unittest.TestCase):
+
+    def setUp(self):
+        with open(os.path.join(ROOT, 'config', 'criterios_scoring.json'), encoding='utf-8') as f:
+            self.criterios = json.load(f)["criterios"]
+
+    def test_capital_bands_cover_fractional_values(self):
+        faixas = self.criterios["capital_social"]["faixas"]
+        expected = {0: 0, 49999.99: 0, 50000: 5, 99999.5: 5, 100000: 10, 499999.99: 10, 500000: 15, 1e9: 15}
+        for equity, points in expected.items():
+            with self.subTest(equity=equity):
+                self.assertEqual(_points_for_range(equity, faixas), points)
+
+    def test_restriction_bands(self):
+        faixas = self.criterios["restricoes"]["faixas"]
+        for restrictions, points in {0: 25, 1: 12, 2: 0, 7: 0}.items():
+            with self.subTest(restrictions=restrictions):
+                self.assertEqual(_points_for_range(restrictions, faixas), points)
+
+
+if __name__ == "__main__":
+    unittest.main()
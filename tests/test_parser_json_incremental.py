@@ -0,0 +1,99 @@
+"""
+    Testes do parser JSON incremental usado no streaming das respostas do Gemini.
+    """
+
+import json
+import os
+import sys
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'PythonScripts'))
+
+from parser_json_incremental import IncrementalJSONListParser
+
+KEYS = ("pontos_fortes", "pontos_positivos")
+
+RESPONSE = {
+    "resumo_analise": "Mencionar \"pontos_fortes\" no texto não é uma lista.",
+    "pontos_fortes": [
+        "Aspas \"internas\" e barra \\ invertida.",
+        "Acentuação: educação, São Paulo é — travessão.",
+        "Unicode escapado: ção e emoji \U0001F393.",
+    ],
+    "pontos_fracos": ["Não observado."],
+    "scoring": {
+        "score": 72,
+        "detalhes": {"pontos_positivos": ["Aninhado em dois níveis.", {"nota": "objeto ignorado"}, "Depois do objeto."]},
+        "pontos_negativos": [["lista", "interna"]],
+    },
+}
+
+
+def expected_items(value, keys=KEYS, key=None) -> list[tuple[str, str]]:
+    """Itens que o parser deve emitir, obtidos do JSON completo."""
+    items = []
+    if isinstance(value, dict):
+        for child_key, child in value.items():
+            items += expected_items(child, keys, child_key)
+    elif isinstance(value, list):
+        for child in value:
+            if isinstance(child, str):
+                if key in keys:
+                    items.append((key, child))
+            else:
+                items += expected_items(child, keys)
+    return items
+
+
+def parse(chunks, keys=KEYS) -> list[tuple[str, str]]:
+    items = []
+    parser = IncrementalJSONListParser(keys, lambda key, item: items.append((key, item)))
+    for chunk in chunks:
+        parser.feed(chunk)
+    return items
+
+
+class IncrementalJSONListParserTest(unittest.TestCase):
+
+    def test_one_char_at_a_time_matches_json_loads(self):
+        for ensure_ascii in (True, False):
+            with self.subTest(ensure_ascii=ensure_ascii):
+                text = json.dumps(RESPONSE, ensure_ascii=ensure_ascii, indent=2)
+                self.assertEqual(parse(text), expected_items(json.loads(text)))
+
+    def test_every_split_point_gives_the_same_items(self):
+        text = json.dumps(RESPONSE) # ensure_ascii: escapes \uXXXX e \" pelo texto todo
+        expected = expected_items(RESPONSE)
+        for cut in range(1, len(text)):
+            self.assertEqual(parse([text[:cut], text[cut:]]), expected, f"corte na posição {cut}")
+
+    def test_escapes_split_across_chunks(self):
+        chunks = ['{"pontos_fortes": ["a\\', '"b\\', '\\c\\u00', 'e7d\\', 'u00e3o"]}']
+        self.assertEqual(parse(chunks), [("pontos_fortes", 'a"b\\cçdão')])
+
+    def test_watched_key_as_string_value_is_not_a_list(self):
+        text = '{"resumo": "pontos_fortes", "outros": ["pontos_fortes", "x"], "pontos_fortes": "texto"}'
+        self.assertEqual(parse(text), [])
+
+    def test_nested_objects_and_lists(self):
+        text = json.dumps({"a": {"b": {"pontos_positivos": ["um", ["fora"], {"pontos_fortes": ["dois"]}, "três"]}}})
+        self.assertEqual(parse(text), [("pontos_positivos", "um"), ("pontos_fortes", "dois"),
+                                       ("pontos_positivos", "três")])
+
+    def test_markdown_fence_is_ignored(self):
+        text = "```json\n" + json.dumps({"pontos_fortes": ["Item com ``` crases."]}) + "\n```"
+        self.assertEqual(parse(text[i:i + 7] for i in range(0, len(text), 7)),
+                         [("pontos_fortes", "Item com ``` crases.")])
+
+    def test_items_are_emitted_as_soon_as_they_close(self):
+        items = []
+        parser = IncrementalJSONListParser(KEYS, lambda key, item: items.append(item))
+        parser.feed('{"pontos_fortes": ["primeiro", "segu')
+        self.assertEqual(items, ["primeiro"])
+        parser.feed('ndo"')
+        self.assertEqual(items, ["primeiro", "segundo"])
+
+
+if __name__ == "__main__":
+    unittest.main()
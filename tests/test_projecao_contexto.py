@@ -0,0 +1,80 @@
+"""
+    Testes do corte de listas para respeitar o orçamento de tokens do contexto.
+    """
+
+import copy
+import os
+import sys
+import unittest
+from unittest import mock
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'PythonScripts'))
+
+from projecao_contexto import compact_json, enforce_token_budget, estimate_tokens
+
+
+def oversized_context(members: int = 40, side_activities: int = 12, registrations: int = 27) -> dict:
+    return {
+        "dados_empresa": {
+            "taxId": "11222333000181",
+            "company": {
+                "name": "INSTITUTO DE ENSINO EXEMPLO LTDA",
+                "members": [{"since": "2015-01-01", "role": {"text": "Sócio"}, "person": {"name": f"SOCIO {i:03d}"}}
+                            for i in range(members)],
+            },
+            "sideActivities": [{"id": 8599600 + i, "text": f"Atividade secundária {i}"} for i in range(side_activities)],
+            "registrations": [{"state": "SP", "enabled": i % 2 == 0} for i in range(registrations)],
+        },
+        "analise_negocio": {"pontos_fortes": ["Empresa ativa."], "pontos_atencao": []},
+    }
+
+
+def tokens(context: dict) -> int:
+    return estimate_tokens(compact_json(context))
+
+
+class EnforceTokenBudgetTest(unittest.TestCase):
+
+    def test_oversized_context_ends_within_the_budget(self):
+        original = oversized_context()
+        for budget in (1500, 600, 300, 120):
+            with self.subTest(budget=budget):
+                context = enforce_token_budget(copy.deepcopy(original), budget)
+                self.assertLessEqual(tokens(context), budget)
+
+    def test_budget_comes_from_llm_max_tokens(self):
+        with mock.patch.dict(os.environ, {"LLM_MAX_TOKENS": "500"}):
+            self.assertLessEqual(tokens(enforce_token_budget(oversized_context())), 500)
+        with mock.patch.dict(os.environ, {"LLM_MAX_TOKENS": "0"}): # Desativado
+            self.assertEqual(enforce_token_budget(oversized_context()), oversized_context())
+
+    def test_largest_list_is_cut_first(self):
+        original = oversized_context()
+        budget = tokens(original) - 10 # Basta um corte
+        context = enforce_token_budget(copy.deepcopy(original), budget)
+        self.assertEqual(context["_omitidos"], {"dados_empresa.company.members": 20})
+        self.assertEqual(context["dados_empresa"]["company"]["members"], original["dados_empresa"]["company"]["members"][:20])
+        self.assertEqual(context["dados_empresa"]["registrations"], original["dados_empresa"]["registrations"])
+
+    def test_omitted_counts_match_the_removed_items(self):
+        original = oversized_context()
+        context = enforce_token_budget(copy.deepcopy(original), 300)
+
+        lists = {
+            "dados_empresa.company.members": lambda data: data["dados_empresa"]["company"]["members"],
+            "dados_empresa.sideActivities": lambda data: data["dados_empresa"]["sideActivities"],
+            "dados_empresa.registrations": lambda data: data["dados_empresa"]["registrations"],
+        }
+        expected = {path: len(get(original)) - len(get(context)) for path, get in lists.items()}
+        self.assertEqual(context["_omitidos"], {path: count for path, count in expected.items() if count})
+        for path, get in lists.items():
+            self.assertEqual(get(context), get(original)[:len(get(context))]) # Mantém os primeiros itens
+
+    def test_context_within_budget_is_untouched(self):
+        context = oversized_context(members=1, side_activities=1, registrations=1)
+        self.assertEqual(enforce_token_budget(copy.deepcopy(context), 2000), context)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+"""
+    Testes da comparação entre duas execuções do corpus (diff_runs).
+    """
+
+import os
+import sys
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'PythonScripts'))
+
+from reexecucao_corpus import diff_runs
+
+
+def run(**results) -> dict:
+    """Monta {cnpj: {"classificacao", "score"}} a partir de c<n>=(classificação, score)."""
+    return {cnpj: {"classificacao": classification, "score": score}
+            for cnpj, (classification, score) in results.items()}
+
+
+class DiffRunsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.previous = run(
+            c1=("APROVADO", 80), c2=("APROVADO", 75), c3=("ATENÇÃO", 60), c4=("ATENÇÃO", 55),
+            c5=("REPROVADO", 30), c6=("APROVADO", 90), c7=("ATENÇÃO", None), sai=("APROVADO", 70),
+        )
+        self.current = run(
+            c1=("APROVADO", 80),   # Inalterado
+            c2=("ATENÇÃO", 65),    # Transição, -10
+            c3=("ATENÇÃO", 64),    # Só o score, +4
+            c4=("APROVADO", 71),   # Transição, +16
+            c5=("REPROVADO", 18),  # Só o score, -12
+            c6=("ATENÇÃO", 89),    # Transição, -1
+            c7=("REPROVADO", 20),  # Transição sem score anterior
+            novo=("APROVADO", 85),
+        )
+        self.report = diff_runs(self.previous, self.current)
+
+    def test_counts_and_transitions(self):
+        report = self.report
+        self.assertEqual(report["cnpjs_comparados"], 7)
+        self.assertEqual(report["inalterados"], 1)
+        self.assertEqual(report["classificacao_alterada"], 4)
+        self.assertEqual(report["score_alterado"], 5)
+        self.assertEqual(report["transicoes"], {"APROVADO -> ATENÇÃO": 2, "ATENÇÃO -> APROVADO": 1,
+                                                "ATENÇÃO -> REPROVADO": 1})
+        self.assertEqual(next(iter(report["transicoes"])), "APROVADO -> ATENÇÃO") # Mais frequente primeiro
+
+    def test_mean_and_absolute_deltas_skip_missing_scores(self):
+        deltas = [0, -10, 4, 16, -12, -1] # c7 não tem score anterior
+        self.assertEqual(self.report["variacao_media_score"], round(sum(deltas) / len(deltas), 2))
+        self.assertEqual(self.report["variacao_absoluta_media_score"],
+                         round(sum(abs(delta) for delta in deltas) / len(deltas), 2))
+
+    def test_new_and_missing_cnpjs(self):
+        self.assertEqual(self.report["novos"], ["novo"])
+        self.assertEqual(self.report["ausentes"], ["sai"])
+        self.assertNotIn("novo", [change["cnpj"] for change in self.report["mudancas"]])
+
+    def test_changes_list_transitions_first_then_largest_delta(self):
+        self.assertEqual([change["cnpj"] for change in self.report["mudancas"]],
+                         ["c4", "c2", "c6", "c7", "c5", "c3"])
+        c7 = next(change for change in self.report["mudancas"] if change["cnpj"] == "c7")
+        self.assertEqual(c7, {"cnpj": "c7", "classificacao_anterior": "ATENÇÃO", "classificacao_atual": "REPROVADO",
+                              "score_anterior": None, "score_atual": 20, "variacao_score": None})
+
+    def test_identical_and_empty_runs(self):
+        report = diff_runs(self.previous, self.previous)
+        self.assertEqual((report["inalterados"], report["mudancas"], report["transicoes"]), (8, [], {}))
+        self.assertEqual(diff_runs({}, {})["variacao_media_score"], 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,206 @@
+"""
+    Testes do circuit breaker, do Retry-After e do reagendamento do modo lote.
+    """
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from unittest import mock
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'PythonScripts'))
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import analise_cnpj
+import limitador_taxa
+import lote_cnpj
+import resiliencia
+from fakes import FakeCNPJAServer, generate_valid_cnpjs
+from resiliencia import (
+    HALF_OPEN_PROBE_WAIT, CircuitBreaker, RetryScheduler, TransientCNPJAError, parse_retry_after,
+)
+
+
+class CircuitBreakerTest(unittest.TestCase):
+
+    def open_breaker(self, reset_timeout: float = 0.05) -> CircuitBreaker:
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=reset_timeout)
+        breaker.record_failure()
+        breaker.record_failure()
+        return breaker
+
+    def half_open_breaker(self) -> CircuitBreaker:
+        breaker = self.open_breaker()
+        time.sleep(0.06)
+        self.assertEqual(breaker.time_until_allowed(), 0.0) # A vaga de teste
+        self.assertEqual(breaker.state, "meio-aberto")
+        return breaker
+
+    def test_opens_after_threshold_consecutive_failures(self):
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+        breaker.record_failure()
+        breaker.record_failure()
+        self.assertEqual(breaker.time_until_allowed(), 0.0)
+        breaker.record_success() # Zera a sequência
+        breaker.record_failure()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "fechado")
+
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "aberto")
+        self.assertGreater(breaker.time_until_allowed(), 59)
+
+    def test_half_open_allows_a_single_probe(self):
+        breaker = self.half_open_breaker()
+        self.assertEqual(breaker.time_until_allowed(), HALF_OPEN_PROBE_WAIT)
+        self.assertEqual(breaker.time_until_allowed(), HALF_OPEN_PROBE_WAIT)
+
+    def test_successful_probe_closes_the_circuit(self):
+        breaker = self.half_open_breaker()
+        breaker.record_success()
+        self.assertEqual(breaker.state, "fechado")
+        self.assertEqual(breaker.time_until_allowed(), 0.0)
+        self.assertEqual(breaker.time_until_allowed(), 0.0)
+
+    def test_failed_probe_reopens_the_circuit(self):
+        breaker = self.half_open_breaker()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "aberto")
+        self.assertGreater(breaker.time_until_allowed(), 0.0)
+
+    def test_release_probe_frees_the_slot_only_for_its_owner(self):
+        breaker = self.half_open_breaker()
+        thread = threading.Thread(target=breaker.release_probe)
+        thread.start()
+        thread.join()
+        self.assertEqual(breaker.time_until_allowed(), HALF_OPEN_PROBE_WAIT) # Outra thread não libera
+
+        breaker.release_probe()
+        self.assertEqual(breaker.time_until_allowed(), 0.0)
+        self.assertEqual(breaker.state, "meio-aberto")
+
+
+class CNPJARequestBreakerTest(unittest.TestCase):
+
+    def setUp(self):
+        environment = mock.patch.dict(os.environ, {
+            "CNPJA_RATE_LIMIT_PER_MINUTE": "600",
+            "CNPJA_API_KEY": "chave-falsa-teste",
+            "CNPJA_CORPUS_ENABLED": "false",
+        })
+        environment.start()
+        self.addCleanup(environment.stop)
+        mock.patch.object(limitador_taxa, "_cnpja_bucket", None).start()
+        self.addCleanup(mock.patch.stopall)
+        self.cnpj = generate_valid_cnpjs(1)[0]
+
+    def use_breaker(self, breaker: CircuitBreaker) -> CircuitBreaker:
+        mock.patch.object(resiliencia, "_cnpja_breaker", breaker).start()
+        return breaker
+
+    def test_rate_limited_response_pauses_without_counting_a_failure(self):
+        server = FakeCNPJAServer(latency=0.0, rate_limited_rate=1.0, retry_after=30).start()
+        self.addCleanup(server.stop)
+        os.environ["CNPJA_BASE_URL"] = server.base_url
+        breaker = self.use_breaker(CircuitBreaker(failure_threshold=1, reset_timeout=60))
+
+        with self.assertRaises(TransientCNPJAError) as raised:
+            analise_cnpj._request_cnpj_data(self.cnpj)
+
+        self.assertEqual(raised.exception.retry_after, 30)
+        self.assertEqual(breaker.state, "fechado")
+        self.assertEqual(breaker._failures, 0)
+        self.assertGreater(breaker.time_until_allowed(), 25) # Todos os workers aguardam o Retry-After
+
+    def test_unexpected_error_in_the_probe_releases_the_slot(self):
+        breaker = self.use_breaker(CircuitBreaker(failure_threshold=1, reset_timeout=0.05))
+        breaker.record_failure()
+        time.sleep(0.06)
+
+        with mock.patch.object(analise_cnpj, "get_http_session", side_effect=RuntimeError("falha inesperada")):
+            with self.assertRaises(RuntimeError):
+                analise_cnpj._request_cnpj_data(self.cnpj)
+
+        self.assertEqual(breaker.state, "meio-aberto")
+        self.assertEqual(breaker.time_until_allowed(), 0.0) # A próxima requisição pode ser o teste
+
+
+class ParseRetryAfterTest(unittest.TestCase):
+
+    def test_delta_seconds(self):
+        self.assertEqual(parse_retry_after("120"), 120.0)
+        self.assertEqual(parse_retry_after(" 0 "), 0.0)
+
+    def test_http_date(self):
+        retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+        self.assertAlmostEqual(parse_retry_after(format_datetime(retry_at, usegmt=True)), 30, delta=1.5)
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0.0) # Data no passado
+
+    def test_missing_or_garbage(self):
+        for value in (None, "", "em breve", "-5", "1.5e3"):
+            with self.subTest(value=value):
+                self.assertIsNone(parse_retry_after(value))
+
+
+class RetrySchedulerTest(unittest.TestCase):
+
+    def test_items_come_out_in_due_time_order(self):
+        scheduler = RetryScheduler()
+        scheduler.schedule("tarde", 0.1)
+        scheduler.schedule("agora-1", 0)
+        scheduler.schedule("meio", 0.05)
+        scheduler.schedule("agora-2", -1) # Espera negativa vale como imediata
+
+        self.assertEqual(scheduler.pop_due(), ["agora-1", "agora-2"])
+        self.assertEqual(len(scheduler), 2)
+        self.assertLessEqual(scheduler.next_delay(), 0.05)
+
+        time.sleep(0.11)
+        self.assertEqual(scheduler.pop_due(), ["meio", "tarde"])
+        self.assertIsNone(scheduler.next_delay())
+
+
+class ProcessBatchRetryTest(unittest.TestCase):
+
+    def setUp(self):
+        mock.patch.object(lote_cnpj, "cnpja_retry_delay", return_value=0.0).start()
+        self.addCleanup(mock.patch.stopall)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.output_path = os.path.join(directory.name, "saida.jsonl")
+        self.cnpj = generate_valid_cnpjs(1)[0]
+
+    def test_open_circuit_does_not_consume_attempts(self):
+        calls = []
+
+        def analyze_row(cnpj):
+            calls.append(cnpj)
+            if len(calls) <= lote_cnpj.MAX_RETRIES + 2:
+                raise TransientCNPJAError("Circuito aberto", retry_after=0.0, request_sent=False)
+            return {"cnpj": cnpj, "status": "ok"}
+
+        stats = lote_cnpj.process_batch([self.cnpj], self.output_path, max_workers=1, analyze_row=analyze_row)
+
+        self.assertEqual(stats["ok"], 1)
+        self.assertEqual(len(calls), lote_cnpj.MAX_RETRIES + 3)
+
+    def test_sent_requests_stop_after_max_retries(self):
+        calls = []
+
+        def analyze_row(cnpj):
+            calls.append(cnpj)
+            raise TransientCNPJAError("503 Service Unavailable")
+
+        stats = lote_cnpj.process_batch([self.cnpj], self.output_path, max_workers=1, analyze_row=analyze_row)
+
+        self.assertEqual(stats["erro"], 1)
+        self.assertEqual(len(calls), lote_cnpj.MAX_RETRIES)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+"""
+    Testes do agrupamento de requisições (singleflight) e da contrapressão do serviço
+    HTTP de análise.
+
+    Usa o substituto local da API CNPJA (benchmarks/fakes.py) e o modo de pipeline
+    'local', sem chamadas ao Gemini.
+    """
+
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'PythonScripts'))
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import analise_cnpj
+import limitador_taxa
+import servico_http
+from fakes import FakeCNPJAServer, fake_company_payload, generate_valid_cnpjs
+from servico_http import AnalysisService
+
+
+class ServiceTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.server = FakeCNPJAServer(latency=0.2).start()
+        environment = mock.patch.dict(os.environ, {
+            "CACHE_ENABLED": "true",
+            "CACHE_DIR": self.cache_dir.name,
+            "CNPJA_RATE_LIMIT_PER_MINUTE": "600",
+            "CNPJA_BASE_URL": self.server.base_url,
+            "CNPJA_API_KEY": "chave-falsa-teste",
+            "CNPJA_CORPUS_ENABLED": "false",
+            "CNPJ_DATA_SOURCE": "api",
+            "PIPELINE_MODE": "local",
+            "RESULTS_STORE_ENABLED": "false",
+        })
+        environment.start()
+        self.addCleanup(environment.stop)
+        # Os singletons são recriados a partir do ambiente do teste
+        analise_cnpj._open_cnpja_cache.reset()
+        mock.patch.object(limitador_taxa, "_cnpja_bucket", None).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def tearDown(self):
+        self.server.stop()
+        cache = analise_cnpj._open_cnpja_cache.reset()
+        if cache is not None:
+            cache.close()
+        self.cache_dir.cleanup()
+
+
+class SingleflightTest(ServiceTestCase):
+
+    def test_concurrent_requests_share_one_fetch(self):
+        cnpj = generate_valid_cnpjs(1)[0]
+        service = AnalysisService(max_workers=4)
+
+        async def run():
+            return await asyncio.gather(*(service.analyze(cnpj) for _ in range(5)))
+
+        try:
+            analyses = asyncio.run(run())
+        finally:
+            service._executor.shutdown(wait=True)
+
+        self.assertEqual(self.server.requests, 1)
+        self.assertTrue(all(analysis is analyses[0] for analysis in analyses))
+        self.assertEqual(service._in_flight, {})
+
+    def test_finished_task_does_not_remove_newer_one(self):
+        service = AnalysisService(max_workers=1)
+        self.addCleanup(service._executor.shutdown)
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            older = loop.create_future()
+            newer = loop.create_future()
+            service._in_flight["00000000000191"] = newer
+            older.set_result(None)
+            service._forget("00000000000191", older)
+            return service._in_flight.get("00000000000191") is newer
+
+        self.assertTrue(asyncio.run(run()))
+
+
+class BackpressureTest(ServiceTestCase):
+
+    def waiting_fetches_during_fetch(self, cnpj: str) -> tuple[int, int]:
+        """Retorna o contador de buscas aguardando a API durante e depois da busca do CNPJ."""
+        service = AnalysisService(max_workers=2)
+        self.addCleanup(service._executor.shutdown)
+        observed = []
+        fetch = servico_http.fetch_cnpj_data
+
+        def observing_fetch(cnpj):
+            observed.append(service._waiting_fetches)
+            return fetch(cnpj)
+
+        with mock.patch.object(servico_http, "fetch_cnpj_data", side_effect=observing_fetch):
+            asyncio.run(service.analyze(cnpj))
+        return observed[0], service._waiting_fetches
+
+    def test_api_fetch_is_counted_until_it_finishes(self):
+        self.assertEqual(self.waiting_fetches_during_fetch(generate_valid_cnpjs(1)[0]), (1, 0))
+        self.assertEqual(self.server.requests, 1)
+
+    def test_cache_hit_is_not_counted(self):
+        cnpj = generate_valid_cnpjs(1)[0]
+        analise_cnpj.get_cnpja_cache().set(cnpj, fake_company_payload(cnpj))
+        self.assertEqual(self.waiting_fetches_during_fetch(cnpj), (0, 0))
+        self.assertEqual(self.server.requests, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()